@@ -0,0 +1,127 @@
+"""
+Compares best_fit_decreasing with the previous list based implementation, and best_fit_decreasing_counts
+with best_fit_decreasing on the expanded pieces.
+
+    python benchmarks/bench_best_fit.py [number of parts...]
+
+Solvers run on the same random cut lists, their stocks must hold the same parts in the same order.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freecad.frameforge.best_fit import CutItem, CutPart, best_fit_decreasing, best_fit_decreasing_counts  # noqa: E402
+
+
+class ReferenceStock:
+    def __init__(self, length):
+        self.length = length
+        self.parts = []
+
+    @property
+    def used(self):
+        return sum([p.cut_size for p in self.parts])
+
+    @property
+    def left(self):
+        return self.length - self.used
+
+
+def reference_best_fit_decreasing(l_stock, parts):
+    """best_fit_decreasing before the stocks were indexed by remaining length"""
+    sorted_parts = sorted(parts, key=lambda x: x.cut_size, reverse=True)
+
+    stocks = []
+    for p in sorted_parts:
+        sorted_stocks = list(filter(lambda x: (x.left - p.cut_size) >= 0.0, sorted(stocks, key=lambda s: s.left)))
+        if len(sorted_stocks) == 0:
+            stock = ReferenceStock(l_stock)
+            stocks.append(stock)
+        else:
+            stock = sorted_stocks[0]
+        stock.parts.append(p)
+
+    return stocks
+
+
+def make_parts(n, seed=0):
+    """Frame like cut list: a few recurring lengths and many one-off ones"""
+    rng = random.Random(seed)
+    recurring = [rng.choice(range(200, 3000, 50)) for _ in range(12)]
+
+    parts = []
+    for i in range(n):
+        if rng.random() < 0.6:
+            length = rng.choice(recurring)
+        else:
+            length = round(rng.uniform(50.0, 5800.0), 1)
+        parts.append(CutPart(f"P{i}", length, 3.0))
+    return parts
+
+
+def make_items(n, seed=0):
+    """Grouped BOM: n pieces spread over a few dozen distinct lengths"""
+    rng = random.Random(seed)
+    lengths = sorted({round(rng.uniform(150.0, 3000.0), 1) for _ in range(40)})
+
+    counts = [0] * len(lengths)
+    for _ in range(n):
+        counts[rng.randrange(len(lengths))] += 1
+
+    return [CutItem(f"I{i}", length, count, 3.0) for i, (length, count) in enumerate(zip(lengths, counts))]
+
+
+def expand(items):
+    return [CutPart(item.name, item.length, item.kerf, item.obj) for item in items for _ in range(item.count)]
+
+
+def check_same_packing(n, stocks, expected):
+    if [[p.name for p in s.parts] for s in stocks] != [[p.name for p in s.parts] for s in expected]:
+        raise SystemExit(f"{n} parts: packings differ")
+    if [s.left for s in stocks] != [s.left for s in expected]:
+        raise SystemExit(f"{n} parts: remaining lengths differ")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    stock_length = 6000.0
+    print(f"{'parts':>8} {'stocks':>8} {'reference (s)':>14} {'indexed (s)':>12} {'speedup':>8}")
+
+    for n in sizes:
+        parts = make_parts(n)
+
+        expected, t_ref = timed(reference_best_fit_decreasing, stock_length, parts)
+        stocks, t_new = timed(best_fit_decreasing, stock_length, parts)
+
+        check_same_packing(n, stocks, expected)
+
+        print(f"{n:>8} {len(stocks):>8} {t_ref:>14.4f} {t_new:>12.4f} {t_ref / max(t_new, 1e-9):>7.1f}x")
+
+    print()
+    print(f"{'pieces':>8} {'stocks':>8} {'patterns':>8} {'expanded (s)':>13} {'counts (s)':>11} {'speedup':>8}")
+
+    for n in sizes:
+        items = make_items(n)
+
+        expected, t_expanded = timed(best_fit_decreasing, stock_length, expand(items))
+        packing, t_counts = timed(best_fit_decreasing_counts, stock_length, items)
+
+        check_same_packing(n, list(packing), expected)
+
+        print(
+            f"{n:>8} {len(packing):>8} {len(packing.patterns):>8} {t_expanded:>13.4f} {t_counts:>11.4f} "
+            f"{t_expanded / max(t_counts, 1e-9):>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100, 500, 1000, 2000, 5000])
@@ -0,0 +1,124 @@
+"""
+Compares create_bom.group_profiles (rows gathered in a dict, group keys sorted) and BOMTable.grouped_rows with
+the previous implementation (sort the row dicts on a tuple key, then itertools.groupby).
+
+    python benchmarks/bench_bom_table.py [number of rows...]
+
+All run on the same random BOMs and must return the same rows. "repeated" BOMs use a few dozen lengths,
+as real frames do, "distinct" ones give every row its own length, weight and price (no row is grouped).
+"""
+
+import os
+import random
+import sys
+import time
+from itertools import groupby
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freecad.frameforge.bom_table import BOMTable, group_profiles  # noqa: E402
+
+
+def reference_group_key(x):
+    return (
+        x["parent"],
+        x["family"],
+        round(float(x["length"]), 1),
+        x["material"],
+        x["size_name"],
+        x["cut_angle_1"],
+        x["cut_angle_2"],
+        x["cutout"],
+    )
+
+
+def reference_group_profiles(profiles_data):
+    """group_profiles before BOMTable"""
+    out = []
+    for k, group in groupby(sorted(profiles_data, key=reference_group_key), key=reference_group_key):
+        group = list(group)
+        g = group[0]
+        out.append(
+            {
+                "parent": g["parent"],
+                "label": ", ".join([p["label"] for p in group]),
+                "family": g["family"],
+                "size_name": g["size_name"],
+                "material": g["material"],
+                "length": g["length"],
+                "cut_angle_1": g["cut_angle_1"],
+                "cut_angle_2": g["cut_angle_2"],
+                "cutout": g["cutout"],
+                "approx_weight": g["approx_weight"],
+                "price": g["price"],
+                "quantity": len(group),
+            }
+        )
+    return out
+
+
+def make_rows(n, distinct, seed=0):
+    rng = random.Random(seed)
+    lengths = [round(rng.uniform(150.0, 6000.0), 1) for _ in range(40)]
+
+    rows = []
+    for i in range(n):
+        length = round(rng.uniform(150.0, 6000.0), 1) if distinct else rng.choice(lengths)
+        rows.append(
+            {
+                "name": f"Profile{i:06d}",
+                "parent": f"Part{rng.randrange(20)}",
+                "label": f"Profile{i:06d}",
+                "family": rng.choice(["HEA", "IPE", "SquareHollow"]),
+                "size_name": rng.choice(["100", "120", "140"]),
+                "material": "S235",
+                "length": str(length),
+                "cut_angle_1": rng.choice(["0.0", "45.0"]),
+                "cut_angle_2": "0.0",
+                "cutout": "",
+                "approx_weight": str(round(length * 0.0167, 3)) if distinct else "N/A",
+                "price": str(round(length * 0.0021, 2)) if distinct else "N/A",
+                "quantity": "1",
+            }
+        )
+    return rows
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main(sizes):
+    print(
+        f"{'rows':>8} {'BOM':>9} {'groups':>8} {'reference (s)':>14} {'dict (s)':>9} {'speedup':>8} "
+        f"{'table (s)':>10} {'speedup':>8} {'grouping':>9}"
+    )
+
+    for n in sizes:
+        for distinct in (False, True):
+            rows = make_rows(n, distinct)
+
+            expected, t_ref = timed(reference_group_profiles, rows)
+            by_dict, t_dict = timed(group_profiles, rows)
+            grouped, t_new = timed(lambda r: BOMTable.from_rows(r).grouped_rows(), rows)
+            table = BOMTable.from_rows(rows)
+            _, t_grouping = timed(table.grouped_rows)
+
+            if grouped != expected or by_dict != expected:
+                raise SystemExit(f"{n} rows: grouped rows differ")
+
+            print(
+                f"{n:>8} {'distinct' if distinct else 'repeated':>9} {len(grouped):>8} {t_ref:>14.4f} {t_dict:>9.4f} "
+                f"{t_ref / max(t_dict, 1e-9):>7.2f}x {t_new:>10.4f} {t_ref / max(t_new, 1e-9):>7.2f}x "
+                f"{t_ref / max(t_grouping, 1e-9):>8.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,368 @@
+"""
+Cut list benchmark and quality regression suite, runs without FreeCAD.
+
+    python benchmarks/bench_cut_list.py [--sizes 10 100 1000] [--recorded bom.csv frame.FCStd] [--time-budget 1]
+
+Every case is a BOM (profile rows of a few material / family / size sections) packed by each solver:
+
+    bfd           best_fit_decreasing on the expanded pieces
+    bfd-counts    best_fit_decreasing_counts on the grouped rows
+    solve         solve_cut_list, the grouping and packing done by the Create BOM tool
+    optimize      cutting_stock.optimize_cut_list, with --time-budget seconds per section
+
+Cases are synthetic (uniform, bimodal and frame-like length distributions) or recorded: BOMs exported by
+the Create BOM tool (.csv, .jsonl) or read straight from .FCStd files. Each run records, for every case and
+solver, the runtime, the bars used, the waste and the gap to the lower bound, and appends them to a JSON
+lines history (kept out of git, it's specific to the machine). The run is compared with the last one of the
+same case, solver, seed, stock length, kerf and time budget: more bars than before, or a runtime more than
+--slowdown times the previous one, is reported as a regression and the exit status is 1. Each
+case also checks that repairing its cut plan after a changed or deleted piece leaves the other bars in place.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freecad.frameforge.best_fit import (  # noqa: E402
+    CutItem,
+    CutPart,
+    best_fit_decreasing,
+    best_fit_decreasing_counts,
+    group_rows_by_section,
+    solve_cut_list,
+)
+from freecad.frameforge.bom_export import PROFILES_COLUMNS  # noqa: E402
+from freecad.frameforge.bom_table import get_quantity  # noqa: E402
+from freecad.frameforge.cut_plan import cut_plan, piece_key, repair_cut_list  # noqa: E402
+from freecad.frameforge.cutting_stock import item_types, l2_lower_bound, optimize_cut_list  # noqa: E402
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cut_list_history.jsonl")
+
+SECTIONS = (
+    ("S235", "Square Hollow", "40x40x2"),
+    ("S235", "Rectangular Hollow", "60x40x3"),
+    ("AW-6060", "Angle", "30x30x3"),
+)
+
+CUT_ANGLES = (("0.0", "0.0"), ("45.0", "45.0"), ("45.0", "0.0"), ("-30.0", "30.0"), ("* 45.0", "45.0"))
+
+# the expanded solver is skipped above this number of pieces
+EXPANDED_LIMIT = 200000
+# and the repair check
+REPAIR_LIMIT = 20000
+
+
+def uniform_lengths(rng, n):
+    return [round(rng.uniform(50.0, 5900.0), 1) for _ in range(n)]
+
+
+def bimodal_lengths(rng, n):
+    """Short braces and long rails, the mix that packs worst"""
+    lengths = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            length = rng.gauss(400.0, 120.0)
+        else:
+            length = rng.gauss(3800.0, 700.0)
+        lengths.append(round(min(max(length, 50.0), 5900.0), 1))
+    return lengths
+
+
+def frame_lengths(rng, n):
+    """A few recurring lengths (posts, rails) repeated many times, and one-off pieces"""
+    recurring = [rng.choice(range(200, 3000, 50)) for _ in range(max(3, min(40, n // 25)))]
+    lengths = []
+    for _ in range(n):
+        if rng.random() < 0.7:
+            lengths.append(float(rng.choice(recurring)))
+        else:
+            lengths.append(round(rng.uniform(80.0, 2500.0), 1))
+    return lengths
+
+
+DISTRIBUTIONS = {"uniform": uniform_lengths, "bimodal": bimodal_lengths, "frame": frame_lengths}
+
+
+def make_rows(lengths, rng):
+    """Groups pieces into BOM rows, one per section / length / angles, as the Create BOM tool does"""
+    counts = {}
+    for length in lengths:
+        material, family, size_name = rng.choice(SECTIONS)
+        angles = rng.choice(CUT_ANGLES)
+        key = (material, family, size_name, length, angles)
+        counts[key] = counts.get(key, 0) + 1
+
+    rows = []
+    for i, ((material, family, size_name, length, angles), count) in enumerate(sorted(counts.items())):
+        rows.append(
+            {
+                "parent": "",
+                "label": f"P{i}",
+                "family": family,
+                "size_name": size_name,
+                "material": material,
+                "length": str(length),
+                "cut_angle_1": angles[0],
+                "cut_angle_2": angles[1],
+                "quantity": str(count),
+            }
+        )
+    return rows
+
+
+def read_recorded(path):
+    """Returns the profile rows of a BOM exported as .csv / .jsonl, or of a .FCStd file"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".fcstd":
+        from freecad.frameforge.fcstd_reader import read_bom
+
+        return read_bom(path)[0]
+
+    if ext in (".jsonl", ".json"):
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [{k: str(v) for k, v in r.items()} for r in records if r.get("type") == "profile"]
+
+    if ext == ".csv":
+        keys = {header: key for key, header in PROFILES_COLUMNS}
+        with open(path, newline="", encoding="utf-8") as f:
+            return [{keys.get(h, h): v for h, v in row.items()} for row in csv.DictReader(f)]
+
+    raise ValueError(f"Unsupported recorded BOM: {path}")
+
+
+def section_items(rows, kerf):
+    return {
+        k: [CutItem(r["label"], float(r["length"]), get_quantity(r), kerf, r) for r in section_rows]
+        for k, (section, section_rows) in group_rows_by_section(rows).items()
+    }
+
+
+def lower_bound(groups, stock_length):
+    bound = 0
+    for items in groups.values():
+        types = item_types(items)
+        if len(types) > 0:
+            bound += l2_lower_bound([t[0] for t in types], [t[1] for t in types], stock_length)
+    return bound
+
+
+def run_bfd(rows, stock_length, kerf):
+    packings = {}
+    for k, items in section_items(rows, kerf).items():
+        parts = [CutPart(item.name, item.length, kerf, item.obj) for item in items for _ in range(item.count)]
+        packings[k] = best_fit_decreasing(stock_length, parts)
+    return packings
+
+
+def run_bfd_counts(rows, stock_length, kerf):
+    return {k: best_fit_decreasing_counts(stock_length, items) for k, items in section_items(rows, kerf).items()}
+
+
+def run_solve(rows, stock_length, kerf):
+    return solve_cut_list(rows, stock_length, kerf)
+
+
+def run_optimize(rows, stock_length, kerf, time_budget):
+    return {k: optimize_cut_list(stock_length, items, time_budget) for k, items in section_items(rows, kerf).items()}
+
+
+def measure(solver, rows, stock_length, kerf, bound, pieces, *args):
+    start = time.perf_counter()
+    packings = solver(rows, stock_length, kerf, *args)
+    runtime = time.perf_counter() - start
+
+    bars = 0
+    stock = 0.0
+    left = 0.0
+    for stocks in packings.values():
+        for s in stocks:
+            bars += 1
+            stock += s.length
+            left += s.left
+
+    return {
+        "pieces": pieces,
+        "runtime": round(runtime, 6),
+        "bars": bars,
+        "waste": round(left / stock, 6) if stock > 0 else 0.0,
+        "lower_bound": bound,
+        "gap": round((bars - bound) / bound, 6) if bound > 0 else 0.0,
+    }
+
+
+REPAIR_CHANGES = ("shorten", "delete")
+
+
+def repair_moves(rows, stock_length, kerf, change):
+    """
+    Changes the design and repairs the plan: returns the number of bars without changed pieces that didn't
+    keep their place in the plan (should be 0).
+
+    shorten: the pieces of the first row are 1 mm shorter. delete: the rows cut on the first bar are
+    removed, that bar is left empty.
+    """
+    plan = cut_plan(solve_cut_list(rows, stock_length, kerf), stock_length, kerf)
+    if change == "shorten":
+        changed = {piece_key(rows[0])}
+        new_rows = [dict(rows[0], length=str(float(rows[0]["length"]) - 1.0))] + rows[1:]
+    else:
+        first_bar = next(iter(plan["sections"].values()))["bars"][0]
+        changed = {tuple(key) for key, n in first_bar["pieces"]}
+        new_rows = [r for r in rows if piece_key(r) not in changed]
+    repaired, _, _ = repair_cut_list(plan, group_rows_by_section(new_rows), stock_length, kerf)
+    new_plan = cut_plan(repaired, stock_length, kerf)
+
+    moved = 0
+    for k, section in plan["sections"].items():
+        new_bars = new_plan["sections"].get(k, {}).get("bars", [])
+        for i, bar in enumerate(section["bars"]):
+            if any(tuple(key) in changed for key, _ in bar["pieces"]):
+                continue
+            if i >= len(new_bars) or new_bars[i] != bar:
+                moved += 1
+    return moved
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def history_key(record):
+    """Runs are only compared with runs of the same case, solver and settings"""
+    return tuple(record.get(k) for k in ("case", "solver", "seed", "stock_length", "kerf", "time_budget"))
+
+
+def last_run(history_path):
+    """Returns {history_key: record} of the last run of each case / solver / settings in the history"""
+    if not os.path.exists(history_path):
+        return {}
+
+    last = {}
+    with open(history_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                key = history_key(record)
+                if key not in last or record["run"] >= last[key]["run"]:
+                    last[key] = record
+
+    return last
+
+
+def regressions(record, previous, slowdown):
+    found = []
+    if previous is None:
+        return found
+    if record["bars"] > previous["bars"]:
+        found.append(f"{previous['bars']} -> {record['bars']} bars")
+    # very short runs are mostly noise
+    if record["runtime"] > 0.05 and record["runtime"] > slowdown * previous["runtime"]:
+        found.append(f"{previous['runtime']:.4f} -> {record['runtime']:.4f} s")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FrameForge cut list benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--distributions", nargs="+", choices=sorted(DISTRIBUTIONS), default=sorted(DISTRIBUTIONS))
+    parser.add_argument("--recorded", nargs="*", default=[], help="exported BOMs (.csv, .jsonl) or .FCStd files")
+    parser.add_argument("--stock-length", type=float, default=6000.0)
+    parser.add_argument("--kerf", type=float, default=3.0)
+    parser.add_argument("--time-budget", type=float, default=0.0, help="seconds per section for the optimizer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--no-history", action="store_true", help="don't append this run to the history")
+    parser.add_argument("--slowdown", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    cases = []
+    for name in args.distributions:
+        for n in args.sizes:
+            rng = random.Random(f"{args.seed}/{name}/{n}")
+            cases.append((f"{name}-{n}", make_rows(DISTRIBUTIONS[name](rng, n), rng)))
+    for path in args.recorded:
+        cases.append((f"recorded-{os.path.basename(path)}", read_recorded(path)))
+
+    solvers = [("bfd", run_bfd, ()), ("bfd-counts", run_bfd_counts, ()), ("solve", run_solve, ())]
+    if args.time_budget > 0:
+        solvers.append(("optimize", run_optimize, (args.time_budget,)))
+
+    previous = last_run(args.history)
+    run = {
+        "run": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "stock_length": args.stock_length,
+        "kerf": args.kerf,
+        "time_budget": args.time_budget,
+    }
+
+    records = []
+    found = []
+    print(
+        f"{'case':<24} {'solver':<12} {'pieces':>8} {'bars':>7} {'bound':>7} {'gap':>7} {'waste':>7} {'time (s)':>10}"
+    )
+    for case, rows in cases:
+        pieces = sum(get_quantity(r) for r in rows)
+        bound = lower_bound(section_items(rows, args.kerf), args.stock_length)
+
+        for solver, func, extra in solvers:
+            if solver == "bfd" and pieces > EXPANDED_LIMIT:
+                continue
+
+            record = dict(run, case=case, solver=solver)
+            record.update(measure(func, rows, args.stock_length, args.kerf, bound, pieces, *extra))
+            records.append(record)
+
+            problems = regressions(record, previous.get(history_key(record)), args.slowdown)
+            found += [f"{case} {solver}: {p}" for p in problems]
+
+            print(
+                f"{case:<24} {solver:<12} {pieces:>8} {record['bars']:>7} {bound:>7} {record['gap']:>7.1%} "
+                f"{record['waste']:>7.1%} {record['runtime']:>10.4f}{'  !' if problems else ''}"
+            )
+
+        if pieces <= REPAIR_LIMIT:
+            for change in REPAIR_CHANGES:
+                moved = repair_moves(rows, args.stock_length, args.kerf, change)
+                if moved > 0:
+                    found.append(f"{case} repair ({change}): {moved} unchanged bars moved")
+
+    if not args.no_history:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    if len(found) > 0:
+        print()
+        print("Regressions since the previous run:")
+        for problem in found:
+            print(f"    {problem}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
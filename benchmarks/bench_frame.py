@@ -0,0 +1,343 @@
+"""
+End to end frame benchmark, runs headless under FreeCADCmd:
+
+    FreeCADCmd benchmarks/bench_frame.py
+    FRAMEFORGE_BENCH_ARGS="--sizes 100 1000 --threshold 20" FreeCADCmd benchmarks/bench_frame.py
+
+(FreeCADCmd doesn't pass arguments to scripts, they are read from FRAMEFORGE_BENCH_ARGS.)
+
+Each case is a generated frame of n members: rectangular panels (two posts, two rails and a brace) drawn in
+sketches and grouped in Parts, the materials cycling through the metal, wood and aluminium extrusion
+catalogs. Braces have bevels, the top rail and a post are joined by an end miter, the bottom rail is
+trimmed by the posts (perfect fit) and every other panel has an extruded cutout in a post.
+
+The phases of each case are timed: creation of the objects, full recompute, BOM, cut list, save and load.
+The peak resident memory after each phase is recorded as well (it's the peak of the process, cases run in
+increasing size). Results are appended to a JSON lines history (kept out of git), and each phase is
+compared with the last run of the same case, stock length and kerf: a phase more than --threshold percent
+slower, or using more than --threshold percent more memory, is reported as a regression and the exit status
+is 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import FreeCAD as App  # noqa: E402
+import Part  # noqa: E402
+
+from freecad.frameforge.best_fit import solve_cut_list  # noqa: E402
+from freecad.frameforge.create_bom import TraversalCache, make_bom, traverse_assembly  # noqa: E402
+from freecad.frameforge.create_bom_tool import make_cut_list  # noqa: E402
+from freecad.frameforge.extruded_cutout import ExtrudedCutout  # noqa: E402
+from freecad.frameforge.profile import Profile  # noqa: E402
+from freecad.frameforge.profile_catalog import CATALOG  # noqa: E402
+from freecad.frameforge.trimmed_profile import TrimmedProfile  # noqa: E402
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frame_history.jsonl")
+
+# (material, family, size), cycled panel by panel
+SECTIONS = (
+    ("Metal", "Rectangular Hollow", "50x25x3"),
+    ("Wood", "Square", "75x75"),
+    ("Aluminium_extrusion", "V-Slot", "20x40"),
+    ("Metal", "Square Hollow", "40x3.0"),
+    ("Metal", "Equal Leg Angles", "50x50x5"),
+)
+
+BRACE_BEVELS = (30.0, 45.0, -20.0, 0.0)
+
+PANEL_WIDTH = 1200.0
+PANEL_HEIGHT = 800.0
+PANEL_SPACING = 1500.0
+# members of a panel
+PANEL_MEMBERS = 5
+PANELS_PER_PART = 10
+
+PHASES = ("create", "recompute", "bom", "cut_list", "save", "load")
+
+
+def section_values(material, family, size_name):
+    """Profile constructor arguments of a catalog size, the first size of the family if it doesn't exist"""
+    sizes = CATALOG.sizes(material, family)
+    if size_name not in sizes:
+        size_name = next(iter(sizes))
+    size = sizes[size_name]
+    fillet = CATALOG[material][family].get("fillet", True)
+    return (
+        size.get("Width", size.get("Height", 0.0)),
+        size.get("Height", 0.0),
+        size.get("Thickness", 0.0),
+        size.get("Flange Thickness", 0.0),
+        size.get("Radius1", 0.0),
+        size.get("Radius2", 0.0),
+        size.get("Weight", 0.0),
+        fillet,
+        size_name,
+    )
+
+
+def make_panel_sketch(doc, part, index):
+    """Bottom rail, right post, top rail, left post and brace, as Edge1 .. Edge5"""
+    sketch = doc.addObject("Sketcher::SketchObject", f"Panel{index:05d}")
+    sketch.Placement = App.Placement(App.Vector(index * PANEL_SPACING, 0, 0), App.Rotation(App.Vector(1, 0, 0), 90))
+    v = App.Vector
+    corners = [v(0, 0, 0), v(PANEL_WIDTH, 0, 0), v(PANEL_WIDTH, PANEL_HEIGHT, 0), v(0, PANEL_HEIGHT, 0)]
+    for i in range(4):
+        sketch.addGeometry(Part.LineSegment(corners[i], corners[(i + 1) % 4]))
+    sketch.addGeometry(Part.LineSegment(corners[0], corners[2]))
+    part.addObject(sketch)
+    return sketch
+
+
+def make_profile(doc, part, sketch, edge, section, bevel=0.0):
+    width, height, thickness, flange, r1, r2, weight, fillet, size_name = section_values(*section)
+
+    obj = doc.addObject("Part::FeaturePython", f"{sketch.Name}_{edge}")
+    obj.addExtension("Part::AttachExtensionPython")
+    part.addObject(obj)
+
+    obj.MapMode = "NormalToEdge"
+    try:
+        obj.AttachmentSupport = (sketch, edge)
+    except AttributeError:  # for Freecad <= 0.21 support
+        obj.Support = (sketch, edge)
+    obj.MapPathParameter = 1
+
+    Profile(
+        obj,
+        width,
+        height,
+        thickness,
+        flange,
+        r1,
+        r2,
+        0.0,
+        weight,
+        0.0,
+        fillet,
+        True,
+        True,
+        section[0],
+        section[1],
+        size_name,
+        False,
+        (sketch, edge),
+    )
+    if bevel != 0.0:
+        obj.BevelStartCut1 = bevel
+        obj.BevelEndCut1 = bevel
+    return obj
+
+
+def make_trimmed_profile(doc, part, body, boundaries, trim_type, cut_type="Perfect fit"):
+    obj = doc.addObject("Part::FeaturePython", f"{body.Name}_{'Mt' if trim_type == 'End Miter' else 'Tr'}")
+    part.addObject(obj)
+    TrimmedProfile(obj)
+    obj.TrimmedBody = body
+    obj.TrimmingBoundary = boundaries
+    obj.TrimmedProfileType = trim_type
+    obj.CutType = cut_type
+    # as the view provider does in the GUI, so the BOM lists the trimmed profile only
+    body.Visibility = False
+    return obj
+
+
+def make_cutout(doc, part, body, index):
+    sketch = doc.addObject("Sketcher::SketchObject", f"Cutout{index:05d}")
+    sketch.MapMode = "FlatFace"
+    try:
+        sketch.AttachmentSupport = (body, "Face1")
+    except AttributeError:  # for Freecad <= 0.21 support
+        sketch.Support = (body, "Face1")
+    sketch.addGeometry(Part.Circle(App.Vector(0, 0, 0), App.Vector(0, 0, 1), 6.0))
+    sketch.Visibility = False
+    part.addObject(sketch)
+
+    obj = doc.addObject("Part::FeaturePython", f"{body.Name}_Cut")
+    part.addObject(obj)
+    ExtrudedCutout(obj, sketch, (body, ["Face1"]))
+    body.Visibility = False
+    return obj
+
+
+def build_frame(doc, members):
+    """Returns the Parts of a frame of (at least) `members` profiles"""
+    parts = []
+    panels = -(-members // PANEL_MEMBERS)
+    for index in range(panels):
+        if index % PANELS_PER_PART == 0:
+            parts.append(doc.addObject("App::Part", f"Bay{len(parts):04d}"))
+        part = parts[-1]
+
+        section = SECTIONS[index % len(SECTIONS)]
+        sketch = make_panel_sketch(doc, part, index)
+        bottom, right, top, left = (make_profile(doc, part, sketch, f"Edge{i}", section) for i in range(1, 5))
+        make_profile(doc, part, sketch, "Edge5", section, BRACE_BEVELS[index % len(BRACE_BEVELS)])
+
+        make_trimmed_profile(doc, part, top, [(right, ["Face1"])], "End Miter")
+        make_trimmed_profile(doc, part, right, [(top, ["Face1"])], "End Miter")
+        make_trimmed_profile(doc, part, bottom, [(left, ["Face1"]), (right, ["Face1"])], "End Trim")
+        if index % 2 == 0:
+            make_cutout(doc, part, left, index)
+
+    return parts
+
+
+def peak_memory_mb():
+    # kB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(members, workdir, stock_length, kerf):
+    """Returns {phase: {"runtime", "peak_mb"}} and the number of features of a frame"""
+    results = {}
+
+    def timed(phase, func, *args):
+        start = time.perf_counter()
+        value = func(*args)
+        results[phase] = {"runtime": round(time.perf_counter() - start, 4), "peak_mb": peak_memory_mb()}
+        return value
+
+    doc = App.newDocument(f"Frame{members}")
+    parts = timed("create", build_frame, doc, members)
+    features = len([o for o in doc.Objects if o.TypeId == "Part::FeaturePython"])
+    timed("recompute", doc.recompute)
+
+    def bom():
+        profiles_data = []
+        links_data = []
+        cache = TraversalCache()
+        for part in parts:
+            traverse_assembly(profiles_data, links_data, part, cache=cache)
+        make_bom(profiles_data, links_data, bom_name="BOM")
+        return profiles_data
+
+    profiles_data = timed("bom", bom)
+    timed("cut_list", lambda: make_cut_list(solve_cut_list(profiles_data, stock_length, kerf), "BOM_CutList"))
+
+    path = os.path.join(workdir, f"Frame{members}.FCStd")
+    timed("save", doc.saveAs, path)
+    App.closeDocument(doc.Name)
+
+    doc = timed("load", App.openDocument, path)
+    App.closeDocument(doc.Name)
+    os.remove(path)
+
+    return results, features
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def history_key(record):
+    """Runs are only compared with runs of the same case, phase and settings"""
+    return tuple(record.get(k) for k in ("case", "phase", "stock_length", "kerf"))
+
+
+def last_run(history_path):
+    """Returns {history_key: record} of the last run of each case / phase / settings in the history"""
+    if not os.path.exists(history_path):
+        return {}
+
+    last = {}
+    with open(history_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                key = history_key(record)
+                if key not in last or record["run"] >= last[key]["run"]:
+                    last[key] = record
+
+    return last
+
+
+def regressions(record, previous, threshold):
+    found = []
+    if previous is None:
+        return found
+    limit = 1 + threshold / 100
+    # very short phases are mostly noise
+    if record["runtime"] > 0.1 and record["runtime"] > limit * previous["runtime"]:
+        found.append(f"{previous['runtime']:.3f} -> {record['runtime']:.3f} s")
+    if record["peak_mb"] > limit * previous["peak_mb"]:
+        found.append(f"{previous['peak_mb']} -> {record['peak_mb']} MB")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FrameForge headless frame benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="members per frame")
+    parser.add_argument("--stock-length", type=float, default=6000.0)
+    parser.add_argument("--kerf", type=float, default=3.0)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--no-history", action="store_true", help="don't append this run to the history")
+    parser.add_argument("--threshold", type=float, default=25.0, help="regression threshold, in percent")
+    args = parser.parse_args(argv)
+
+    previous = last_run(args.history)
+    run = {
+        "run": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "freecad": ".".join(App.Version()[:3]),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "stock_length": args.stock_length,
+        "kerf": args.kerf,
+    }
+
+    records = []
+    found = []
+    print(f"{'case':<14} {'features':>8} {'phase':<10} {'time (s)':>10} {'peak (MB)':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for members in sorted(args.sizes):
+            case = f"frame-{members}"
+            results, features = run_case(members, workdir, args.stock_length, args.kerf)
+
+            for phase in PHASES:
+                record = dict(run, case=case, phase=phase, members=members, features=features, **results[phase])
+                records.append(record)
+
+                problems = regressions(record, previous.get(history_key(record)), args.threshold)
+                found += [f"{case} {phase}: {p}" for p in problems]
+
+                print(
+                    f"{case:<14} {features:>8} {phase:<10} {record['runtime']:>10.3f} {record['peak_mb']:>10.1f}"
+                    f"{'  !' if problems else ''}"
+                )
+
+    if not args.no_history:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    if len(found) > 0:
+        print()
+        print("Regressions since the previous run:")
+        for problem in found:
+            print(f"    {problem}")
+        return 1
+    return 0
+
+
+raise SystemExit(main(os.environ.get("FRAMEFORGE_BENCH_ARGS", "").split()))
@@ -0,0 +1,54 @@
+"""
+Measures the FrameForge workbench activation time, run inside the FreeCAD GUI from a fresh start:
+
+    freecad benchmarks/bench_workbench_startup.py
+    FRAMEFORGE_BENCH_EAGER=1 freecad benchmarks/bench_workbench_startup.py
+
+The second run imports every tool module first, as the workbench did before commands were registered
+lazily, so the two runs compare the activation time before and after. The modules imported by the
+activation are listed, then FreeCAD exits.
+"""
+
+import importlib
+import os
+import sys
+import time
+
+import FreeCADGui as Gui
+
+EAGER_MODULES = (
+    "create_bom_tool",
+    "create_custom_profiles_tool",
+    "create_end_miter_tool",
+    "create_extruded_cutout_tool",
+    "create_link",
+    "create_profiles_tool",
+    "create_trimmed_profiles_tool",
+    "edit_profile_tool",
+    "parametric_line",
+)
+
+HEAVY_MODULES = ("Part", "ArchCommands", "BOPTools.SplitAPI", "AttachmentEditor", "Assembly", "PySide", "numpy")
+
+
+def main():
+    eager = os.environ.get("FRAMEFORGE_BENCH_EAGER", "") not in ("", "0")
+    before = set(sys.modules)
+
+    start = time.perf_counter()
+    if eager:
+        for name in EAGER_MODULES:
+            importlib.import_module(f"freecad.frameforge.{name}")
+    Gui.activateWorkbench("FrameForge")
+    elapsed = time.perf_counter() - start
+
+    loaded = sorted(set(sys.modules) - before)
+    print(f"FrameForge activation ({'eager' if eager else 'lazy'} imports): {elapsed * 1000:.1f} ms")
+    print(f"    {len(loaded)} modules imported")
+    print(f"    frameforge: {', '.join(m.rsplit('.', 1)[-1] for m in loaded if m.startswith('freecad.frameforge.'))}")
+    print(f"    heavy: {', '.join(m for m in HEAVY_MODULES if m in loaded) or '-'}")
+
+    Gui.getMainWindow().close()
+
+
+main()
@@ -194,27 +194,25 @@ class FrameForge(Gui.Workbench):
 
     toolbox_output = ["FrameForge_CreateBOM"]
 
+    toolbox_diagnostics = ["FrameForge_RecomputeReport", "FrameForge_ShapeReport"]
+
     def GetClassName(self):
         return "Gui::PythonWorkbench"
 
     def Initialize(self):
         """
         This function is called at the first activation of the workbench.
-        here is the place to import all the commands
+        here is the place to register all the commands
         """
-        from freecad.frameforge import (
-            create_bom_tool,
-            create_custom_profiles_tool,
-            create_end_miter_tool,
-            create_extruded_cutout_tool,
-            create_link,
-            create_profiles_tool,
-            create_trimmed_profiles_tool,
-            edit_profile_tool,
-            parametric_line,
-        )
+        import time
+
+        # the tool modules are imported when their command is first activated
+        from freecad.frameforge.commands import register_commands
         from freecad.frameforge.ff_tools import translate
 
+        start = time.perf_counter()
+        register_commands()
+
         App.Console.PrintMessage(translate("frameforge", "Switching to frameforge") + "\n")
 
         self.appendToolbar(translate("frameforge", "Drawing Primitives"), self.toolbox_drawing)
@@ -232,6 +230,10 @@ class FrameForge(Gui.Workbench):
         self.appendToolbar(translate("frameforge", "Frameforge output"), self.toolbox_output)
         self.appendMenu(translate("frameforge", "Frameforge output"), self.toolbox_output)
 
+        self.appendMenu(translate("frameforge", "Diagnostics"), self.toolbox_diagnostics)
+
+        App.Console.PrintLog(f"Frameforge : workbench initialized in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
     def Activated(self):
         """
         code which should be computed when a user switch to this workbench
@@ -1,4 +1,12 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from freecad.frameforge.bom_table import get_quantity
+
+
 class CutPart:
+    __slots__ = ("name", "length", "kerf", "obj")
+
     def __init__(self, name, length, kerf, obj=None):
         self.name = name
         self.length = length
@@ -17,9 +25,14 @@ class CutPart:
 
 
 class Stock:
-    def __init__(self, length):
+    __slots__ = ("length", "_parts", "_used", "origin")
+
+    def __init__(self, length, origin=None):
         self.length = length
         self._parts = []
+        self._used = 0
+        # None for a purchased stock, the inventory id of an offcut
+        self.origin = origin
 
     def __str__(self):
         return f"Stock<{self.length}, used={self.used}, left={self.left}> = {self._parts}"
@@ -29,15 +42,18 @@ class Stock:
 
     @property
     def used(self):
-        return sum([p.cut_size for p in self._parts])
+        # accumulated in placement order, same value as summing the parts
+        return self._used
 
     @property
     def left(self):
-        return self.length - self.used
+        return self.length - self._used
 
     def add_part(self, part):
-        if part.cut_size <= self.left:
+        cut_size = part.cut_size
+        if cut_size <= self.length - self._used:
             self._parts.append(part)
+            self._used += cut_size
         else:
             raise ValueError(f"Can't fit {part.name} ({part.length}) in {self.length}")
 
@@ -45,19 +61,285 @@ class Stock:
     def parts(self):
         return self._parts
 
+    def part_runs(self):
+        """
+        Yields (part, count) of the runs of identical pieces in cutting order. The pieces of a BOM row
+        standing for several parts share the row, its quantity is the row total, not the run's.
+        """
+        run = None
+        for part in self._parts:
+            if run is not None and part.obj is run[0].obj and part.length == run[0].length:
+                run[1] += 1
+                continue
+            if run is not None:
+                yield tuple(run)
+            run = [part, 1]
+        if run is not None:
+            yield tuple(run)
+
 
 def best_fit_decreasing(l_stock, parts):
     sorted_parts = sorted(parts, key=lambda x: x.cut_size, reverse=True)
 
     stocks = []
+    # (left, creation index) of every stock, sorted: ties go to the oldest stock, as the stable sort used to do
+    free = []
     for p in sorted_parts:
         # on choisit celle qui laisse le moins d’espace libre après placement
-        sorted_stocks = list(filter(lambda x: (x.left - p.cut_size) >= 0.0, sorted(stocks, key=lambda s: s.left)))
-        if len(sorted_stocks) == 0:
+        cut_size = p.cut_size
+        i = bisect_left(free, (cut_size,))
+        if i == len(free):
+            idx = len(stocks)
             stock = Stock(l_stock)
             stocks.append(stock)
         else:
-            stock = sorted_stocks[0]
+            idx = free.pop(i)[1]
+            stock = stocks[idx]
         stock.add_part(p)
+        insort(free, (stock.left, idx))
 
     return stocks
+
+
+class CutItem(CutPart):
+    """`count` identical pieces of a cut list"""
+
+    __slots__ = ("count",)
+
+    def __init__(self, name, length, count, kerf, obj=None):
+        super().__init__(name, length, kerf, obj)
+        self.count = count
+
+    def __str__(self):
+        return f"CutItem<{self.name}>={self.length} x {self.count}"
+
+
+class StockPattern:
+    """`count` stocks cut the same way, `cuts` is a list of [item, pieces per stock]"""
+
+    __slots__ = ("length", "count", "cuts", "used", "origin")
+
+    def __init__(self, length, count, cuts=(), used=0, origin=None):
+        self.length = length
+        self.count = count
+        self.cuts = [list(c) for c in cuts]
+        self.used = used
+        self.origin = origin
+
+    def __str__(self):
+        return f"StockPattern<{self.length} x {self.count}, used={self.used}, left={self.left}> = {self.cuts}"
+
+    def __repr__(self):
+        return self.__str__()
+
+    @property
+    def left(self):
+        return self.length - self.used
+
+    def capacity(self, cut_size, limit=None):
+        """Returns how many pieces (at most `limit`) fit in each stock, and the used length after placing them"""
+        # same float accumulation as Stock.add_part, piece after piece
+        n = 0
+        used = self.used
+        while cut_size <= self.length - used and (limit is None or n < limit):
+            used += cut_size
+            n += 1
+        return n, used
+
+    def add(self, item, n, used):
+        if len(self.cuts) > 0 and self.cuts[-1][0] is item:
+            self.cuts[-1][1] += n
+        else:
+            self.cuts.append([item, n])
+        self.used = used
+
+    def split(self, count):
+        """Moves `count` stocks to a new pattern cut the same way"""
+        self.count -= count
+        return StockPattern(self.length, count, self.cuts, self.used, self.origin)
+
+    def stocks(self):
+        """Expands the pattern into `count` Stock objects"""
+        for _ in range(self.count):
+            stock = Stock(self.length, self.origin)
+            for item, n in self.cuts:
+                for _ in range(n):
+                    stock.add_part(CutPart(item.name, item.length, item.kerf, item.obj))
+            yield stock
+
+
+class CutListPacking:
+    """
+    Result of best_fit_decreasing_counts or of cutting_stock.optimize_cut_list.
+
+    Iterating yields the Stock objects one by one, for best_fit_decreasing_counts in the order
+    best_fit_decreasing would have created them. lower_bound is the least possible number of stocks
+    when it has been computed.
+    """
+
+    def __init__(self, patterns, lower_bound=None, method="best fit decreasing"):
+        self.patterns = patterns
+        self.lower_bound = lower_bound
+        self.method = method
+        # (material, family, size name), set by solve_cut_list
+        self.section = None
+        # saw_sequence.SawEstimate, set by saw_sequence.sequence_packing
+        self.saw_estimate = None
+
+    def __iter__(self):
+        for pattern in self.patterns:
+            yield from pattern.stocks()
+
+    def __len__(self):
+        # a repaired cut list keeps the bars that lost all their pieces as empty ones, they aren't cut
+        return sum(p.count for p in self.patterns if len(p.cuts) > 0)
+
+    @property
+    def gap(self):
+        """Relative gap between the number of stocks and the lower bound, None if there's no bound"""
+        if not self.lower_bound:
+            return None
+        return (len(self) - self.lower_bound) / self.lower_bound
+
+
+def best_fit_decreasing_counts(l_stock, items):
+    """
+    Same packing as best_fit_decreasing on the expanded pieces, computed on CutItems.
+
+    Identical stocks are handled as a single StockPattern, and each item is placed in as many pieces as
+    fit in a stock at once, so the work depends on the number of distinct items and patterns, not on the
+    number of pieces.
+    """
+    sorted_items = sorted(items, key=lambda x: x.cut_size, reverse=True)
+
+    # (left, order, pattern) of the patterns, sorted. `order` keeps the creation order of the stocks: the
+    # patterns split from a pattern get its order extended by their rank, so they sort right where it was
+    free = []
+    order = 0
+
+    for item in sorted_items:
+        cut_size = item.cut_size
+        count = item.count
+
+        while count > 0:
+            i = bisect_left(free, (cut_size,))
+            if i < len(free):
+                left, key, pattern = free.pop(i)
+            else:
+                # no stock left with room for the item: open as many as it needs
+                n = StockPattern(l_stock, 0).capacity(cut_size, count)[0]
+                if n == 0:
+                    raise ValueError(f"Can't fit {item.name} ({item.length}) in {l_stock}")
+                pattern = StockPattern(l_stock, -(-count // n))
+                key = (order,)
+                order += 1
+
+            # no need to count further than the pieces left to place
+            n, used = pattern.capacity(cut_size, count)
+
+            if count >= n * pattern.count:
+                # every stock of the pattern is filled with this item
+                count -= n * pattern.count
+                pattern.add(item, n, used)
+                insort(free, (pattern.left, key, pattern))
+                continue
+
+            # the first stocks are filled, the next one takes what's left, the last ones are untouched
+            full, rest = divmod(count, n)
+            split = []
+            if full:
+                filled = pattern.split(full)
+                filled.add(item, n, used)
+                split.append(filled)
+            if rest:
+                partial = pattern.split(1)
+                partial.add(item, rest, partial.capacity(cut_size, rest)[1])
+                split.append(partial)
+            if pattern.count:
+                split.append(pattern)
+
+            for rank, p in enumerate(split):
+                insort(free, (p.left, key + (rank,), p))
+            count = 0
+
+    return CutListPacking([p for left, key, p in sorted(free, key=lambda x: x[1])])
+
+
+def best_fit_into(patterns, items):
+    """
+    Places items, largest first, in the room left by single stock patterns (offcuts, partly cut stocks):
+    each piece goes where it leaves the least. Returns the CutItems that didn't fit.
+    """
+    # (left, rank, pattern), sorted
+    free = sorted([(p.left, rank, p) for rank, p in enumerate(patterns)], key=lambda f: f[:2])
+
+    remaining = []
+    for item in sorted(items, key=lambda x: x.cut_size, reverse=True):
+        count = item.count
+        while count > 0:
+            i = bisect_left(free, (item.cut_size,))
+            if i == len(free):
+                break
+
+            left, rank, pattern = free.pop(i)
+            n, used = pattern.capacity(item.cut_size, count)
+            pattern.add(item, n, used)
+            count -= n
+            insort(free, (pattern.left, rank, pattern))
+
+        if count > 0:
+            remaining.append(CutItem(item.name, item.length, count, item.kerf, item.obj))
+
+    return remaining
+
+
+def group_rows_by_section(profiles_data):
+    """Returns {cut list key: ((material, family, size name), [rows])}"""
+    grouped_profiles = defaultdict(list)
+    for p in profiles_data:
+        key = (p["family"], p["material"], p["size_name"])
+        grouped_profiles[key].append(p)
+
+    return {f"{k[1]}_{k[0]}_{k[2]}": ((k[1], k[0], k[2]), rows) for k, rows in grouped_profiles.items()}
+
+
+def solve_cut_list(
+    profiles_data, stock_length, kerf, time_budget=0.0, inventory=None, processes=False, inventory_source=None
+):
+    """
+    Packs BOM profile rows into stocks, one CutListPacking per material / family / size.
+
+    With a time budget (in seconds, for the whole cut list), the packings are optimized by
+    cutting_stock.optimize_cut_lists (in forked processes with processes=True, headless only). With a
+    stock_inventory.StockInventory, offcuts are used first and the catalog lengths of each section replace
+    stock_length; the offcuts booked by inventory_source (an earlier record of the same cut list) are
+    available again.
+    """
+    groups = {}
+    sections = {}
+    for k, (section, rows) in group_rows_by_section(profiles_data).items():
+        # grouped rows and rows reached through link arrays stand for several pieces
+        groups[k] = [CutItem(p["label"], float(p["length"]), get_quantity(p), kerf, p) for p in rows]
+        sections[k] = section
+
+    if inventory is not None:
+        from freecad.frameforge.stock_inventory import plan_section
+
+        sorted_stocks = {}
+        for k, items in groups.items():
+            stock_lengths = inventory.stock_lengths(sections[k]) or [(stock_length, 0.0)]
+            shortest = min([item.cut_size for item in items], default=0.0)
+            offcuts = inventory.offcuts(sections[k], shortest, inventory_source)
+            sorted_stocks[k] = plan_section(items, offcuts, stock_lengths, time_budget / len(groups))
+
+    elif time_budget > 0:
+        from freecad.frameforge.cutting_stock import optimize_cut_lists
+
+        sorted_stocks = optimize_cut_lists(groups, stock_length, time_budget, processes)
+
+    else:
+        sorted_stocks = {k: best_fit_decreasing_counts(stock_length, items) for k, items in groups.items()}
+
+    for k, packing in sorted_stocks.items():
+        packing.section = sections[k]
+    return sorted_stocks
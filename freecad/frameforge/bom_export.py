@@ -0,0 +1,236 @@
+import csv
+import json
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+# (row key, header) in the same order as the BOM / CutList spreadsheets
+PROFILES_COLUMNS = (
+    ("parent", "Parent"),
+    ("label", "Name"),
+    ("family", "Family"),
+    ("size_name", "SizeName"),
+    ("material", "Material"),
+    ("length", "Length"),
+    ("cut_angle_1", "CutAngle1"),
+    ("cut_angle_2", "CutAngle2"),
+    ("cutout", "Drill/Cutout"),
+    ("approx_weight", "ApproxWeight"),
+    ("price", "Price/U"),
+    ("quantity", "Quantity"),
+    # rows read without FreeCAD whose length or angles must be checked on the geometry
+    ("geometry_required", "GeometryRequired"),
+)
+
+LINKS_COLUMNS = (
+    ("parent", "Parent"),
+    ("label", "Name"),
+    ("part", "Part/Type"),
+    ("price", "Price/U"),
+    ("quantity", "Quantity"),
+)
+
+CUT_LIST_COLUMNS = (
+    ("stock_group", "Material"),
+    ("stock", "Stock"),
+    ("label", "CutPart"),
+    ("length", "Length"),
+    ("cut_angle_1", "CutAngle1"),
+    ("cut_angle_2", "CutAngle2"),
+    ("quantity", "Quantity"),
+    ("stock_length", "StockLength"),
+    ("stock_used", "StockUsed"),
+    ("stock_left", "StockLeft"),
+)
+
+NUMERIC_KEYS = ("length", "approx_weight", "price", "quantity", "stock", "stock_length", "stock_used", "stock_left")
+
+EXPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl", ".xlsx": "xlsx"}
+
+
+def iter_cut_list_rows(sorted_stocks):
+    """Yields one row per run of identical cut parts of a stock, in the same order as make_cut_list"""
+    for stock_group, stocks in sorted_stocks.items():
+        for stock_idx, stock in enumerate(stocks):
+            for cut_part, count in stock.part_runs():
+                prof = cut_part.obj
+                yield {
+                    "stock_group": stock_group,
+                    "stock": stock_idx,
+                    "label": prof["label"],
+                    "length": prof["length"],
+                    "cut_angle_1": prof["cut_angle_1"],
+                    "cut_angle_2": prof["cut_angle_2"],
+                    "quantity": count,
+                    "stock_length": stock.length,
+                    "stock_used": round(stock.used, 1),
+                    "stock_left": round(stock.left, 1),
+                }
+
+
+def typed_value(key, value):
+    """Numeric columns are exported as numbers when they hold one, everything else as text"""
+    if key in NUMERIC_KEYS and isinstance(value, str):
+        try:
+            return float(value) if any(c in value for c in ".eE") else int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def get_export_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{ext}', use one of {', '.join(EXPORT_FORMATS)}")
+    return EXPORT_FORMATS[ext]
+
+
+def write_csv(path, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([header for key, header in columns])
+        for row in rows:
+            writer.writerow([row.get(key, "") for key, header in columns])
+
+
+def write_jsonl(path, tables):
+    """tables: list of (type, columns, rows), every row becomes a JSON object tagged with its type"""
+    with open(path, "w", encoding="utf-8") as f:
+        for row_type, columns, rows in tables:
+            for row in rows:
+                record = {"type": row_type}
+                record.update((key, typed_value(key, row.get(key, ""))) for key, header in columns)
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def xlsx_column_name(idx):
+    letters = ""
+    idx += 1
+    while idx > 0:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def xlsx_cell(ref, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+    return f'<c r="{ref}"><v>{value}</v></c>'
+
+
+def write_xlsx(path, tables):
+    """
+    tables: list of (sheet name, columns, rows).
+
+    Writes a minimal Office Open XML workbook with inline strings, the rows are streamed
+    into the archive so nothing else than the current row is held in memory.
+    """
+    sheet_names = [name for name, columns, rows in tables]
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i + 1}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in range(len(tables))
+            )
+            + "</Types>",
+        )
+        zf.writestr(
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/>'
+            "</Relationships>",
+        )
+        zf.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(
+                f'<sheet name="{escape(name[:31])}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+                for i, name in enumerate(sheet_names)
+            )
+            + "</sheets></workbook>",
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i + 1}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{i + 1}.xml"/>'
+                for i in range(len(tables))
+            )
+            + "</Relationships>",
+        )
+
+        for i, (name, columns, rows) in enumerate(tables):
+            with zf.open(f"xl/worksheets/sheet{i + 1}.xml", "w") as f:
+                f.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+
+                letters = [xlsx_column_name(c) for c in range(len(columns))]
+
+                cells = "".join(xlsx_cell(f"{letters[c]}1", header) for c, (key, header) in enumerate(columns))
+                f.write(f'<row r="1">{cells}</row>'.encode("utf-8"))
+
+                for r, row in enumerate(rows, start=2):
+                    cells = "".join(
+                        xlsx_cell(f"{letters[c]}{r}", typed_value(key, row.get(key, "")))
+                        for c, (key, header) in enumerate(columns)
+                    )
+                    f.write(f'<row r="{r}">{cells}</row>'.encode("utf-8"))
+
+                f.write(b"</sheetData></worksheet>")
+
+
+def export_bom(path, profiles_data, links_data=()):
+    """
+    Exports BOM rows (as built by traverse_assembly / group_profiles / group_links) to a .csv, .jsonl or .xlsx file.
+
+    No document object is created. With CSV, parts are written to a "<name>_parts.csv" file next to the profiles.
+    """
+    fmt = get_export_format(path)
+
+    if fmt == "csv":
+        write_csv(path, PROFILES_COLUMNS, profiles_data)
+        if len(links_data) > 0:
+            stem, ext = os.path.splitext(path)
+            write_csv(f"{stem}_parts{ext}", LINKS_COLUMNS, links_data)
+
+    elif fmt == "jsonl":
+        write_jsonl(path, [("profile", PROFILES_COLUMNS, profiles_data), ("part", LINKS_COLUMNS, links_data)])
+
+    elif fmt == "xlsx":
+        tables = [("Profiles", PROFILES_COLUMNS, profiles_data)]
+        if len(links_data) > 0:
+            tables.append(("Parts", LINKS_COLUMNS, links_data))
+        write_xlsx(path, tables)
+
+
+def export_cut_list(path, sorted_stocks):
+    """Exports a cut list (as built by best_fit.solve_cut_list) to a .csv, .jsonl or .xlsx file"""
+    fmt = get_export_format(path)
+
+    if fmt == "csv":
+        write_csv(path, CUT_LIST_COLUMNS, iter_cut_list_rows(sorted_stocks))
+
+    elif fmt == "jsonl":
+        write_jsonl(path, [("cut", CUT_LIST_COLUMNS, iter_cut_list_rows(sorted_stocks))])
+
+    elif fmt == "xlsx":
+        write_xlsx(path, [("CutList", CUT_LIST_COLUMNS, iter_cut_list_rows(sorted_stocks))])
@@ -0,0 +1,450 @@
+import math
+from array import array
+from itertools import groupby
+
+try:
+    import numpy as np
+except ImportError:  # numpy ships with FreeCAD, but the table works without it
+    np = None
+
+
+def parse_quantity(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+def get_quantity(row):
+    """Number of pieces a BOM row stands for"""
+    return parse_quantity(row["quantity"])
+
+
+def profile_group_key(x):
+    return (
+        x["parent"],
+        x["family"],
+        round(float(x["length"]), 1),
+        x["material"],
+        x["size_name"],
+        # round(float(x["price"]), 1), # TODO: Workaround for Lenght problem
+        x["cut_angle_1"],
+        x["cut_angle_2"],
+        x["cutout"],
+    )
+
+
+def merge_profile_group(group, quantity=None):
+    g = group[0]
+    return {
+        "parent": g["parent"],
+        "label": ", ".join([p["label"] for p in group]),
+        "family": g["family"],
+        "size_name": g["size_name"],
+        "material": g["material"],
+        "length": g["length"],
+        "cut_angle_1": g["cut_angle_1"],
+        "cut_angle_2": g["cut_angle_2"],
+        "cutout": g["cutout"],
+        "approx_weight": g["approx_weight"],
+        "price": g["price"],
+        "quantity": sum([get_quantity(p) for p in group]) if quantity is None else quantity,
+    }
+
+
+def group_profiles(profiles_data):
+    """
+    Merges the rows sharing a profile_group_key, sorted by key.
+
+    When lengths repeat, rows are gathered in a dict and only the group keys are sorted. When most lengths
+    are distinct, few rows group together and sorting the rows is cheaper. Both beat building a BOMTable for
+    a single grouping (see benchmarks/bench_bom_table.py).
+    """
+    # BOMs repeat the same few quantities: parse each distinct value once
+    pieces = {q: parse_quantity(q) for q in {p["quantity"] for p in profiles_data}}
+
+    if len({p["length"] for p in profiles_data}) * 4 > len(profiles_data):
+        single_pieces = all(n == 1 for n in pieces.values())
+        out = []
+        for _, group in groupby(sorted(profiles_data, key=profile_group_key), key=profile_group_key):
+            group = list(group)
+            quantity = len(group) if single_pieces else sum([pieces[p["quantity"]] for p in group])
+            out.append(merge_profile_group(group, quantity))
+        return out
+
+    rounded_lengths = {}
+    groups = {}  # key -> [rows, quantity]
+    for p in profiles_data:
+        length = p["length"]
+        rounded = rounded_lengths.get(length)
+        if rounded is None:
+            rounded = rounded_lengths[length] = round(float(length), 1)
+
+        n = pieces[p["quantity"]]
+
+        key = (
+            p["parent"],
+            p["family"],
+            rounded,
+            p["material"],
+            p["size_name"],
+            p["cut_angle_1"],
+            p["cut_angle_2"],
+            p["cutout"],
+        )
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [[p], n]
+        else:
+            group[0].append(p)
+            group[1] += n
+
+    return [merge_profile_group(*groups[k]) for k in sorted(groups)]
+
+
+class CategoricalColumn:
+    """Interns repeated values (parent, family, material...) and stores one integer code per row"""
+
+    def __init__(self):
+        self.categories = []
+        self.index = {}
+        self.codes = array("I")
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.index[value] = code
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def extend(self, values):
+        index = self.index
+        categories = self.categories
+
+        codes = []
+        for value in values:
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(categories)
+                categories.append(value)
+            codes.append(code)
+
+        self.codes.extend(array("I", codes))
+
+    def __getitem__(self, i):
+        return self.categories[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class NumericColumn:
+    """
+    Stores values as doubles.
+
+    BOM rows hold their numbers as strings ("1234.5", "N/A"...), values that don't survive the
+    str -> float -> str round trip are kept aside so rows can be rebuilt exactly.
+    """
+
+    def __init__(self):
+        self.values = array("d")
+        self.raw = {}
+
+    def append(self, value):
+        try:
+            v = float(value)
+        except (TypeError, ValueError):
+            v = math.nan
+
+        if not isinstance(value, str) or repr(v) != value:
+            self.raw[len(self.values)] = value
+
+        self.values.append(v)
+
+    def extend(self, values):
+        raw = self.raw
+        start = len(self.values)
+
+        # BOMs repeat the same few lengths, weights and prices: parse each distinct value once
+        parsed = {}
+        floats = []
+        for i, value in enumerate(values, start):
+            entry = parsed.get(value)
+            if entry is None:
+                try:
+                    v = float(value)
+                    exact = value.__class__ is str and repr(v) == value
+                except (TypeError, ValueError):
+                    v = math.nan
+                    exact = False
+                entry = parsed[value] = (v, exact)
+
+            if not entry[1]:
+                raw[i] = value
+            floats.append(entry[0])
+
+        self.values.extend(array("d", floats))
+
+    def __getitem__(self, i):
+        if i in self.raw:
+            return self.raw[i]
+        return repr(self.values[i])
+
+    def __len__(self):
+        return len(self.values)
+
+
+class BOMTable:
+    """
+    Column oriented storage of the profile rows built by traverse_assembly.
+
+    Categorical keys are interned, lengths, weights and prices are stored as doubles, so grouping, filters
+    and totals work on integer codes and arrays instead of lists of string dicts.
+    """
+
+    CATEGORICAL = ("parent", "family", "size_name", "material", "cut_angle_1", "cut_angle_2", "cutout", "quantity")
+    NUMERIC = ("length", "approx_weight", "price")
+    TEXT = ("name", "label")
+
+    # same order as the historical group_profiles sort key
+    GROUP_KEYS = ("parent", "family", "length", "material", "size_name", "cut_angle_1", "cut_angle_2", "cutout")
+
+    def __init__(self):
+        self.columns = {}
+        for c in self.CATEGORICAL:
+            self.columns[c] = CategoricalColumn()
+        for c in self.NUMERIC:
+            self.columns[c] = NumericColumn()
+        for c in self.TEXT:
+            self.columns[c] = []
+
+    @classmethod
+    def from_rows(cls, rows):
+        table = cls()
+        table.extend(rows)
+        return table
+
+    def extend(self, rows):
+        rows = list(rows)
+        for c in self.CATEGORICAL + self.NUMERIC:
+            self.columns[c].extend([r[c] for r in rows])
+        self.columns["name"].extend([r.get("name") for r in rows])
+        self.columns["label"].extend([r["label"] for r in rows])
+
+    def append(self, row):
+        for c in self.CATEGORICAL + self.NUMERIC:
+            self.columns[c].append(row[c])
+        self.columns["name"].append(row.get("name"))
+        self.columns["label"].append(row["label"])
+
+    def __len__(self):
+        return len(self.columns["label"])
+
+    def row(self, i):
+        d = {}
+        if self.columns["name"][i] is not None:
+            d["name"] = self.columns["name"][i]
+        d["parent"] = self.columns["parent"][i]
+        d["label"] = self.columns["label"][i]
+        d["family"] = self.columns["family"][i]
+        d["size_name"] = self.columns["size_name"][i]
+        d["material"] = self.columns["material"][i]
+        d["length"] = self.columns["length"][i]
+        d["cut_angle_1"] = self.columns["cut_angle_1"][i]
+        d["cut_angle_2"] = self.columns["cut_angle_2"][i]
+        d["cutout"] = self.columns["cutout"][i]
+        d["approx_weight"] = self.columns["approx_weight"][i]
+        d["price"] = self.columns["price"][i]
+        d["quantity"] = self.columns["quantity"][i]
+        return d
+
+    def rows(self, indices=None):
+        return [self.row(i) for i in (range(len(self)) if indices is None else indices)]
+
+    def key_columns(self, keys):
+        """Integer codes of categorical columns, rounded values of numeric ones"""
+        cols = []
+        for k in keys:
+            col = self.columns[k]
+            if isinstance(col, CategoricalColumn):
+                cols.append(col.codes)
+            else:
+                cols.append([round(v, 1) for v in col.values])
+        return cols
+
+    def category_ranks(self, key):
+        """rank[code] = position of the category in sorted order"""
+        col = self.columns[key]
+        order = sorted(range(len(col.categories)), key=col.categories.__getitem__)
+        rank = [0] * len(order)
+        for r, c in enumerate(order):
+            rank[c] = r
+        return rank
+
+    def group_indices(self, keys=GROUP_KEYS):
+        """Returns [[row indices]] sorted by key values, rows keep their order inside a group"""
+        if len(self) == 0:
+            return []
+
+        if np is not None:
+            return self._np_group_indices(keys)
+
+        groups = {}
+        for i, codes in enumerate(zip(*self.key_columns(keys))):
+            groups.setdefault(codes, []).append(i)
+
+        group_keys = list(groups)
+
+        # sort on the ranks of the categories instead of decoding every key
+        sort_columns = []
+        for k, codes in zip(keys, zip(*group_keys)):
+            if isinstance(self.columns[k], CategoricalColumn):
+                rank = self.category_ranks(k)
+                sort_columns.append([rank[c] for c in codes])
+            else:
+                sort_columns.append(codes)
+
+        sort_keys = list(zip(*sort_columns))
+        return [groups[group_keys[i]] for i in sorted(range(len(group_keys)), key=sort_keys.__getitem__)]
+
+    def _np_group_indices(self, keys):
+        sort_columns = []
+        for k in keys:
+            col = self.columns[k]
+            if isinstance(col, CategoricalColumn):
+                rank = np.asarray(self.category_ranks(k), dtype=np.int64)
+                sort_columns.append(rank[np.frombuffer(col.codes, dtype=col.codes.typecode)])
+            else:
+                sort_columns.append(np.round(np.frombuffer(col.values, dtype=np.float64), 1))
+
+        # lexsort is stable and uses the last key as the primary one
+        order = np.lexsort(sort_columns[::-1])
+
+        changes = np.zeros(len(order), dtype=bool)
+        for c in sort_columns:
+            sorted_c = c[order]
+            changes[1:] |= sorted_c[1:] != sorted_c[:-1]
+
+        # slicing a list is much cheaper than splitting the array when most groups hold a single row
+        order = order.tolist()
+        bounds = [0] + np.flatnonzero(changes).tolist() + [len(order)]
+        return [order[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    def decode(self, key, indices):
+        """Values of a column at the given rows"""
+        col = self.columns[key]
+        if isinstance(col, CategoricalColumn):
+            categories = col.categories
+            codes = col.codes
+            return [categories[codes[i]] for i in indices]
+        return [col[i] for i in indices]
+
+    def grouped_rows(self):
+        """Same output as the historical group_profiles"""
+        c = self.columns
+        labels = c["label"]
+
+        quantity_codes = c["quantity"].codes
+        quantities = [parse_quantity(q) for q in c["quantity"].categories]
+
+        groups = self.group_indices()
+        # the first row of each group gives the values, decoded a column at a time
+        firsts = [idx[0] for idx in groups]
+        parent = self.decode("parent", firsts)
+        family = self.decode("family", firsts)
+        size_name = self.decode("size_name", firsts)
+        material = self.decode("material", firsts)
+        length = self.decode("length", firsts)
+        cut_angle_1 = self.decode("cut_angle_1", firsts)
+        cut_angle_2 = self.decode("cut_angle_2", firsts)
+        cutout = self.decode("cutout", firsts)
+        approx_weight = self.decode("approx_weight", firsts)
+        price = self.decode("price", firsts)
+
+        out = []
+        for n, idx in enumerate(groups):
+            out.append(
+                {
+                    "parent": parent[n],
+                    "label": ", ".join([labels[i] for i in idx]),
+                    "family": family[n],
+                    "size_name": size_name[n],
+                    "material": material[n],
+                    "length": length[n],
+                    "cut_angle_1": cut_angle_1[n],
+                    "cut_angle_2": cut_angle_2[n],
+                    "cutout": cutout[n],
+                    "approx_weight": approx_weight[n],
+                    "price": price[n],
+                    "quantity": sum([quantities[quantity_codes[i]] for i in idx]),
+                }
+            )
+        return out
+
+    def where(self, **criteria):
+        """Returns the indices of the rows whose categorical columns equal the given values"""
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            for k, v in criteria.items():
+                col = self.columns[k]
+                if v not in col.index:
+                    return []
+                mask &= np.frombuffer(col.codes, dtype=col.codes.typecode) == col.index[v]
+            return np.flatnonzero(mask).tolist()
+
+        codes = []
+        for k, v in criteria.items():
+            col = self.columns[k]
+            if v not in col.index:
+                return []
+            codes.append((col.codes, col.index[v]))
+        return [i for i in range(len(self)) if all(c[i] == v for c, v in codes)]
+
+    def quantities(self):
+        """Number of pieces of each row"""
+        col = self.columns["quantity"]
+        per_code = [parse_quantity(q) for q in col.categories]
+        if np is not None:
+            return np.asarray(per_code, dtype=np.float64)[np.frombuffer(col.codes, dtype=col.codes.typecode)]
+        return [per_code[c] for c in col.codes]
+
+    def sum_by(self, column, by, indices=None):
+        """Sums a numeric column times the quantity per value of a categorical column, N/A counts as 0"""
+        by_col = self.columns[by]
+        values = self.columns[column].values
+
+        if np is not None:
+            amounts = np.frombuffer(values, dtype=np.float64) * self.quantities()
+            codes = np.frombuffer(by_col.codes, dtype=by_col.codes.typecode)
+            if indices is not None:
+                indices = np.asarray(indices, dtype=np.int64)
+                amounts = amounts[indices]
+                codes = codes[indices]
+            amounts = np.nan_to_num(amounts, nan=0.0)
+            totals = np.bincount(codes, weights=amounts, minlength=len(by_col.categories)).tolist()
+        else:
+            quantities = self.quantities()
+            totals = [0.0] * len(by_col.categories)
+            for i in range(len(self)) if indices is None else indices:
+                v = values[i]
+                if v == v:  # not NaN
+                    totals[by_col.codes[i]] += v * quantities[i]
+
+        return {by_col.categories[c]: t for c, t in enumerate(totals)}
+
+    def total(self, column, indices=None):
+        """Sums a numeric column times the quantity, N/A counts as 0"""
+        values = self.columns[column].values
+        if np is not None:
+            amounts = np.frombuffer(values, dtype=np.float64) * self.quantities()
+            if indices is not None:
+                amounts = amounts[np.asarray(indices, dtype=np.int64)]
+            return float(np.nansum(amounts))
+
+        quantities = self.quantities()
+        return math.fsum(
+            values[i] * quantities[i]
+            for i in (range(len(self)) if indices is None else indices)
+            if values[i] == values[i]
+        )
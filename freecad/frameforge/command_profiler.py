@@ -0,0 +1,86 @@
+"""
+Optional cProfile of the FrameForge commands Activated and task panels accept.
+
+Enabled by the "Profile Commands" preference or the FRAMEFORGE_PROFILE_COMMANDS environment variable. Each
+profiled call writes its stats (pstats format, for snakeviz or `python -m pstats`) to the stats directory,
+where only the last STATS_FILES files are kept, and logs a one line timing summary. Disabled, calls are only
+timed, at the "log" level.
+"""
+
+import cProfile
+import functools
+import itertools
+import os
+import time
+
+import FreeCAD as App
+
+from freecad.frameforge.ff_tools import log
+
+STATS_FILES = 50
+
+# a profiled call can run another one (accept recomputing the document), only the outer one is profiled
+_active = False
+# tells apart the stats written in the same millisecond
+_sequence = itertools.count()
+
+
+def is_enabled():
+    if os.environ.get("FRAMEFORGE_PROFILE_COMMANDS", "") not in ("", "0"):
+        return True
+    return App.ParamGet("User parameter:BaseApp/Preferences/Frameforge").GetBool("Profile Commands", False)
+
+
+def stats_dir():
+    path = os.environ.get("FRAMEFORGE_PROFILE_DIR") or os.path.join(App.getUserAppDataDir(), "FrameForge", "profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def rotate(path, keep):
+    """Removes the oldest .prof files of a directory, keeping `keep` of them"""
+    files = sorted((f for f in os.listdir(path) if f.endswith(".prof")), reverse=True)
+    for name in files[keep:]:
+        os.remove(os.path.join(path, name))
+
+
+def run_profiled(name, func, *args, **kwargs):
+    """Calls func, profiled when enabled"""
+    global _active
+
+    if _active or not is_enabled():
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            log("log", "timing", call=name, ms=f"{(time.perf_counter() - start) * 1000:.1f}")
+
+    _active = True
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _active = False
+
+        directory = stats_dir()
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}"
+        path = os.path.join(directory, f"{stamp}-{next(_sequence) % 1000:03d}-{name}.prof")
+        profiler.dump_stats(path)
+        rotate(directory, STATS_FILES)
+        log("message", "timing", call=name, ms=f"{elapsed * 1000:.1f}", stats=path)
+
+
+def profiled_call(name):
+    """Decorator of the methods to profile (task panels accept)"""
+
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            return run_profiled(name, method, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
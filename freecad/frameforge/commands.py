@@ -0,0 +1,318 @@
+"""
+FrameForge commands, registered without importing the tool modules.
+
+Each command is a LazyCommand: its resources and IsActive only need FreeCAD, FreeCADGui and the selection,
+its tool module (and with it Part, PySide, the task panels, ...) is imported the first time it's activated.
+
+IsActive is called on every GUI refresh: it reads the selection from SELECTION, refreshed on selection
+changes only, classifies objects with object_types.REGISTRY, and its result is kept until the selection,
+the active document or an object type changes.
+"""
+
+import importlib
+import os
+
+import FreeCAD as App
+import FreeCADGui as Gui
+
+from freecad.frameforge.command_profiler import run_profiled
+from freecad.frameforge.ff_tools import ICONPATH, translate
+from freecad.frameforge.object_types import (
+    EXTRUDED_CUTOUT,
+    FUSION,
+    GROUP,
+    LINK,
+    PART,
+    PROFILE,
+    REGISTRY,
+    TRIMMED_PROFILE,
+)
+
+
+class SelectionCache:
+    """Selection observer keeping the selected objects of the active document between selection changes"""
+
+    def __init__(self):
+        self.generation = 0
+        self._document = None
+        self._objects = None
+        self._vertex_count = None
+
+    def invalidate(self, *args):
+        self.generation += 1
+        self._objects = None
+        self._vertex_count = None
+
+    addSelection = removeSelection = setSelection = clearSelection = invalidate
+
+    def _check_document(self):
+        doc = App.ActiveDocument
+        name = doc.Name if doc is not None else None
+        if name != self._document:
+            self._document = name
+            self.invalidate()
+
+    def state(self):
+        """Changes whenever the selection, the active document or an object type changes"""
+        self._check_document()
+        return (self.generation, self._document, REGISTRY.generation)
+
+    def objects(self):
+        self._check_document()
+        if self._objects is None:
+            self._objects = Gui.Selection.getSelection()
+        return self._objects
+
+    def vertex_count(self):
+        """Number of selected vertexes"""
+        self._check_document()
+        if self._vertex_count is None:
+            self._vertex_count = sum(
+                1 for sel in Gui.Selection.getSelectionEx() for n in sel.SubElementNames if n.startswith("Vertex")
+            )
+        return self._vertex_count
+
+
+SELECTION = SelectionCache()
+
+
+class LazyCommand:
+    def __init__(self, module, class_name, resources, is_active):
+        self.module = module
+        self.class_name = class_name
+        self.resources = resources
+        self.is_active = is_active
+        self._command = None
+        # (SELECTION.state(), IsActive result)
+        self._active = None
+
+    def command(self):
+        """The command object of the tool module, imported on first use"""
+        if self._command is None:
+            module = importlib.import_module(f"freecad.frameforge.{self.module}")
+            self._command = getattr(module, self.class_name)()
+        return self._command
+
+    def GetResources(self):
+        return self.resources()
+
+    def IsActive(self):
+        state = SELECTION.state()
+        if self._active is None or self._active[0] != state:
+            self._active = (state, bool(self.is_active()))
+        return self._active[1]
+
+    def Activated(self):
+        # profiled with the import of the tool module on first use
+        run_profiled(f"{self.class_name}.Activated", lambda: self.command().Activated())
+
+
+def selection_is(*types, count=None, accept=None):
+    """
+    Every selected object has one of the FrameForge types (or passes accept), and there are `count` of them if
+    given
+    """
+    selection = SELECTION.objects()
+    if len(selection) == 0 or (count is not None and len(selection) != count):
+        return False
+    return all(REGISTRY.type_of(sel) in types or (accept is not None and accept(sel)) for sel in selection)
+
+
+def is_trimmable(obj):
+    obj_type = REGISTRY.type_of(obj)
+    return obj_type == TRIMMED_PROFILE or (obj_type == PROFILE and hasattr(obj, "Target"))
+
+
+def trimmable_selection(count=None):
+    return selection_is(count=count, accept=is_trimmable)
+
+
+def create_bom_active():
+    return App.ActiveDocument is not None and selection_is(
+        FUSION, PART, GROUP, LINK, PROFILE, TRIMMED_PROFILE, EXTRUDED_CUTOUT
+    )
+
+
+def trim_profiles_active():
+    if App.ActiveDocument is None:
+        return False
+    # without selection, the task panel lets the user pick the profiles
+    return len(SELECTION.objects()) == 0 or trimmable_selection()
+
+
+def parametric_line_active():
+    return App.ActiveDocument is not None and SELECTION.vertex_count() == 2
+
+
+COMMANDS = {
+    "FrameForge_ParametricLine": LazyCommand(
+        "parametric_line",
+        "CreateParametricLineCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "line.svg"),
+            "MenuText": "Create a Parametric Line",
+            "ToolTip": "Create a Parametric Line from two Vertex<br><br>Select two vertex then run this command",
+        },
+        parametric_line_active,
+    ),
+    "FrameForge_CreateProfiles": LazyCommand(
+        "create_profiles_tool",
+        "CreateProfilesCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "warehouse_profiles.svg"),
+            "Accel": "Shift+S",
+            "MenuText": "Create Profile",
+            "ToolTip": "Create new profiles from Edges",
+        },
+        lambda: App.ActiveDocument is not None,
+    ),
+    "FrameForge_CreateCustomProfiles": LazyCommand(
+        "create_custom_profiles_tool",
+        "CreateCustomProfilesCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "warehouse_custom_profiles.svg"),
+            "Accel": "Shift+C",
+            "MenuText": "Create Custom Profile",
+            "ToolTip": "Create new custom profiles from Edges",
+        },
+        lambda: App.ActiveDocument is not None,
+    ),
+    "FrameForge_TrimProfiles": LazyCommand(
+        "create_trimmed_profiles_tool",
+        "TrimProfileCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "corner-end-trim.svg"),
+            "MenuText": translate("MetalWB", "Trim Profile"),
+            "Accel": "M, C",
+            "ToolTip": translate(
+                "MetalWB",
+                "<html><head/><body><p><b>Trim a profile</b> \
+                    <br><br> \
+                    Select a profile then another profile's faces. \
+                    </p></body></html>",
+            ),
+        },
+        trim_profiles_active,
+    ),
+    "FrameForge_EndMiter": LazyCommand(
+        "create_end_miter_tool",
+        "CreateEndMiterCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "corner-end-miter.svg"),
+            "MenuText": translate("MetalWB", "Create Miter Ends"),
+            "Accel": "M, C",
+            "ToolTip": translate(
+                "MetalWB",
+                "<html><head/><body><p><b>Create Miter Ends</b> \
+                    <br><br> \
+                    Select two profiles. \
+                    </p></body></html>",
+            ),
+        },
+        lambda: App.ActiveDocument is not None and trimmable_selection(count=2),
+    ),
+    "FrameForge_AddExtrudeCutout": LazyCommand(
+        "create_extruded_cutout_tool",
+        "AddExtrudedCutoutCommandClass",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "extruded-cutout.svg"),
+            "MenuText": translate("FrameForge", "Extruded Cutout"),
+            "Accel": "E, C",
+            "ToolTip": translate(
+                "FrameForge",
+                "Extruded cutout from sketch extrusion\n"
+                "1. Select a face of the sheet metal part (must not be the thickness face) and\n"
+                "2. Select a sketch for the extruded cut (the sketch must be closed).\n"
+                "3. Use Property editor to modify other parameters",
+            ),
+        },
+        lambda: len(SELECTION.objects()) == 2,
+    ),
+    "FrameForge_Link": LazyCommand(
+        "create_link",
+        "LinkCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "link.svg"),
+            "MenuText": "Attached Link",
+            "ToolTip": "Create a link with Attachment",
+        },
+        lambda: bool(App.ActiveDocument) and bool(SELECTION.objects()),
+    ),
+    "FrameForge_CreateBOM": LazyCommand(
+        "create_bom_tool",
+        "CreateBOMCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "bom.svg"),
+            "MenuText": translate("MetalWB", "Create BOM"),
+            "Accel": "M, B",
+            "ToolTip": translate(
+                "MetalWB",
+                "<html><head/><body><p><b>Create Spreadsheet with profiles</b> \
+                    <br><br> \
+                    select fusions or profiles \
+                    </p></body></html>",
+            ),
+        },
+        create_bom_active,
+    ),
+    "FrameForge_RecomputeReport": LazyCommand(
+        "recompute_report_tool",
+        "RecomputeReportCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "parts_list.svg"),
+            "MenuText": translate("FrameForge", "Recompute Report"),
+            "ToolTip": translate(
+                "FrameForge",
+                "Recompute every profile, trim and cutout of the document and list the slowest ones in the report view",
+            ),
+        },
+        lambda: App.ActiveDocument is not None,
+    ),
+    "FrameForge_ShapeReport": LazyCommand(
+        "shape_report_tool",
+        "ShapeReportCommand",
+        lambda: {
+            "Pixmap": os.path.join(ICONPATH, "parts_list.svg"),
+            "MenuText": translate("FrameForge", "Shape Complexity Report"),
+            "ToolTip": translate(
+                "FrameForge",
+                "List the faces, BREP size and booleans of every profile, trim and cutout, with totals per Part",
+            ),
+        },
+        lambda: App.ActiveDocument is not None,
+    ),
+}
+
+
+class LiveBOMRestorer:
+    """
+    Document observer restarting the live BOMs saved in spreadsheets (see live_bom) when a document is opened,
+    and starting or stopping them when their LiveBOM property is toggled.
+
+    live_bom is only imported when a document holds a live BOM.
+    """
+
+    def restore(self, doc):
+        sheets = [o for o in doc.findObjects("Spreadsheet::Sheet") if getattr(o, "LiveBOM", False) is True]
+        if len(sheets) > 0:
+            importlib.import_module("freecad.frameforge.live_bom").restore(sheets)
+
+    def slotFinishRestoreDocument(self, doc):
+        self.restore(doc)
+
+    def slotChangedObject(self, obj, prop):
+        if prop == "LiveBOM" and obj.TypeId == "Spreadsheet::Sheet" and not getattr(obj.Document, "Restoring", False):
+            importlib.import_module("freecad.frameforge.live_bom").live_bom_changed(obj)
+
+
+LIVE_BOM_RESTORER = LiveBOMRestorer()
+
+
+def register_commands():
+    REGISTRY.start()
+    Gui.Selection.addObserver(SELECTION)
+    App.addDocumentObserver(LIVE_BOM_RESTORER)
+    for doc in App.listDocuments().values():
+        LIVE_BOM_RESTORER.restore(doc)
+    for name, command in COMMANDS.items():
+        Gui.addCommand(name, command)
@@ -1,11 +1,18 @@
 import math
 from collections import defaultdict
-from itertools import groupby
 
-import Assembly
 import FreeCAD
-import FreeCADGui as Gui
-import Part
+
+from freecad.frameforge.bom_table import (
+    BOMTable,
+    get_quantity,
+    group_profiles,
+    merge_profile_group,
+    profile_group_key,
+)
+from freecad.frameforge.object_types import REGISTRY
+from freecad.frameforge.profile_data import bevelled_length, get_profile_cutting_angles
+from freecad.frameforge.sheet_writer import SheetWriter
 
 
 def is_fusion(obj):
@@ -89,120 +96,209 @@ def get_trimmedprofile_from_extrudedcutout(obj):
         raise Exception("Not an extruded cutout")
 
 
-def get_all_cutting_angles(trimmed_profile):
-    """Retourne récursivement la liste des angles de coupe (en degrés)
-    d'un TrimmedProfile, y compris ceux de ses parents/enfants imbriqués."""
-    doc = FreeCAD.ActiveDocument
+# (document name, object name) -> (signature, angles), shared by every BOM / cut list / export
+_cutting_angles_cache = {}
 
-    angles = []
 
-    def resolve_edge(link):
-        target = trimmed_profile.Proxy.getTarget(link)
-        return doc.getObject(target[0].Name).getSubObject(target[1][0])
+def clear_cutting_angles_cache():
+    _cutting_angles_cache.clear()
+
+
+def forget_cutting_angles(doc_name, obj_name=None):
+    """Drops the angles of a deleted TrimmedProfile, or of every TrimmedProfile of a closed document"""
+    if obj_name is not None:
+        _cutting_angles_cache.pop((doc_name, obj_name), None)
+    else:
+        for key in [k for k in _cutting_angles_cache if k[0] == doc_name]:
+            del _cutting_angles_cache[key]
+
+
+REGISTRY.deletion_listeners.append(forget_cutting_angles)
 
-    edge = resolve_edge(trimmed_profile.TrimmedBody)
-    dir_vec = (edge.Vertexes[-1].Point.sub(edge.Vertexes[0].Point)).normalize()
 
-    angle_div = 2.0 if trimmed_profile.TrimmedProfileType == "End Miter" else 1.0
+def get_cutting_angles_signature(trimmed_profile):
+    """Changes whenever the TrimmedProfile or one of its boundaries is recomputed or retyped"""
+    return (
+        trimmed_profile.TrimmedProfileType,
+        trimmed_profile.CutType,
+        trimmed_profile.Shape.hashCode(),
+        tuple(
+            (bound[0].Name, tuple(bound[1]), bound[0].Shape.hashCode()) for bound in trimmed_profile.TrimmingBoundary
+        ),
+    )
+
+
+def get_all_cutting_angles(trimmed_profile, cache=None):
+    """Retourne récursivement la liste des angles de coupe (en degrés)
+    d'un TrimmedProfile, y compris ceux de ses parents/enfants imbriqués.
 
-    if trimmed_profile.TrimmedProfileType == "End Miter" or trimmed_profile.CutType == "Simple fit":
-        for bound in trimmed_profile.TrimmingBoundary:
-            for sub in bound[1]:  # sous-objets (souvent "FaceX")
-                face = bound[0].getSubObject(sub)
-                if isinstance(face.Surface, Part.Plane):
-                    normal = face.normalAt(0.5, 0.5).normalize()
-                    angle = math.degrees(dir_vec.getAngle(normal))
+    Le résultat est mémorisé par TrimmedProfile et invalidé dès que l'objet
+    ou ses limites sont recalculés."""
+    import Part
 
-                    if angle > 90:
-                        angle = 180 - angle
+    key = (trimmed_profile.Document.Name, trimmed_profile.Name)
+    signature = get_cutting_angles_signature(trimmed_profile)
+
+    cached = _cutting_angles_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        angles = list(cached[1])
 
-                    angles.append(angle / angle_div)
     else:
-        angles = ["?", "?"]
+        angles = []
+
+        edge = get_target_edge(trimmed_profile, cache)
+        dir_vec = (edge.Vertexes[-1].Point.sub(edge.Vertexes[0].Point)).normalize()
+
+        angle_div = 2.0 if trimmed_profile.TrimmedProfileType == "End Miter" else 1.0
+
+        if trimmed_profile.TrimmedProfileType == "End Miter" or trimmed_profile.CutType == "Simple fit":
+            for bound in trimmed_profile.TrimmingBoundary:
+                for sub in bound[1]:  # sous-objets (souvent "FaceX")
+                    face = bound[0].getSubObject(sub)
+                    if isinstance(face.Surface, Part.Plane):
+                        normal = face.normalAt(0.5, 0.5).normalize()
+                        angle = math.degrees(dir_vec.getAngle(normal))
 
+                        if angle > 90:
+                            angle = 180 - angle
+
+                        angles.append(angle / angle_div)
+        else:
+            angles = ["?", "?"]
+
+        _cutting_angles_cache[key] = (signature, tuple(angles))
+
+    # the parent has its own entry, so it's checked against its own signature
     if hasattr(trimmed_profile.TrimmedBody, "TrimmedProfileType"):
         parent_profile = trimmed_profile.TrimmedBody
-        angles.extend(get_all_cutting_angles(parent_profile))
+        angles.extend(get_all_cutting_angles(parent_profile, cache))
 
     return angles
 
 
-def length_along_normal(obj):
-    """
-    Calcule la longueur de l'objet le long d'un vecteur normal.
+# stands for the parent of a memoized linked subtree, replaced by the path of each link using it
+LINK_PARENT = "\x00"
 
-    obj    : objet FreeCAD
-    normal : FreeCAD.Vector (doit être normalisé)
-    """
-    doc = FreeCAD.ActiveDocument
 
-    if is_profile(obj):
-        target = obj.Target
-        edge = doc.getObject(target[0].Name).getSubObject(target[1][0])
+def get_link_multiplier(link):
+    """An App::Link array stands for ElementCount copies of its target"""
+    count = getattr(link, "ElementCount", 0)
+    return count if count > 0 else 1
 
-    elif is_trimmedbody(obj):
 
-        def resolve_edge(link):
-            target = obj.Proxy.getTarget(link)
-            return doc.getObject(target[0].Name).getSubObject(target[1][0])
+class TraversalCache:
+    """Memoizes values that are resolved many times while walking an assembly."""
+
+    def __init__(self):
+        self.edges = {}
+        self.subtrees = {}
+        self.visiting = set()
+
+    def edge(self, target):
+        """Returns the edge designated by a (object, [sub]) link, resolving it only once."""
+        key = (target[0].Document.Name, target[0].Name, target[1][0])
+        edge = self.edges.get(key)
+        if edge is None:
+            edge = target[0].getSubObject(target[1][0])
+            self.edges[key] = edge
+        return edge
+
+    def linked_subtree(self, target, full_parent_path):
+        """
+        Traverses the object a link points to only once, whatever the number of links to it.
+
+        Rows are built with LINK_PARENT as parent and must be relocated by the caller (see expand_link).
+        Returns None if the target is already being traversed (recursive links).
+        """
+        key = (target.Document.Name, target.Name, full_parent_path)
+        if key in self.subtrees:
+            return self.subtrees[key]
+        if key in self.visiting:
+            return None
+
+        self.visiting.add(key)
+        profiles_data = []
+        links_data = []
+        try:
+            traverse_assembly(
+                profiles_data, links_data, target, parent=LINK_PARENT, full_parent_path=full_parent_path, cache=self
+            )
+        finally:
+            self.visiting.discard(key)
+
+        self.subtrees[key] = (profiles_data, links_data)
+        return self.subtrees[key]
 
-        edge = resolve_edge(obj.TrimmedBody)
 
+def get_target_edge(obj, cache=None):
+    """Returns the sketch edge a Profile or a TrimmedProfile is built along, or None"""
+    if is_profile(obj):
+        target = getattr(obj, "Target", None)
+    elif is_trimmedbody(obj):
+        target = obj.Proxy.getTarget(obj.TrimmedBody)
     else:
-        return 0.0
+        return None
 
-    dir_vec = (edge.Vertexes[-1].Point.sub(edge.Vertexes[0].Point)).normalize()
-    n = dir_vec.normalize()
+    if not target:
+        return None
 
-    vertices = obj.Shape.Vertexes
+    if cache is None:
+        return target[0].getSubObject(target[1][0])
+    return cache.edge(target)
 
-    projections = [v.Point.dot(n) for v in vertices]
 
-    length = max(projections) - min(projections)
-    return length
+def analytic_profile_length(obj, cache=None):
+    """
+    Computes the cut length of a Profile from its properties (edge length, offsets, bevels).
+
+    Returns None when the section or the bevels can't be described analytically.
+    """
+    edge = get_target_edge(obj, cache)
+    if edge is not None:
+        L = edge.Length + obj.OffsetA + obj.OffsetB
+    else:
+        L = obj.ProfileLength + obj.OffsetA + obj.OffsetB
 
+    return bevelled_length(obj, L)
 
-def get_readable_cutting_angles(bsc1, bsc2, bec1, bec2, *trim_cuts):
-    all_bevels = [bsc1, bsc2, bec1, bec2]
-    start_bevels = [bsc1, bsc2]
-    end_bevels = [bec1, bec2]
 
-    if len(trim_cuts) == 0:
-        # a real profile
-        if all([b == 0 for b in all_bevels]):
-            return ("0.0", "0.0")
+def shape_extent_along(shape, direction):
+    """Returns the extent of a shape along a (normalized) direction"""
+    # axis aligned members are the common case: the bounding box is exact there
+    bb = shape.BoundBox
+    for axis, (vmin, vmax) in enumerate(((bb.XMin, bb.XMax), (bb.YMin, bb.YMax), (bb.ZMin, bb.ZMax))):
+        if abs(abs(direction[axis]) - 1.0) < 1e-9:
+            return vmax - vmin
 
-        elif bsc1 == bec1 == 0.0:
-            angles = (bsc2, bec2)
-            angles = angles if (angles[0] * angles[1] <= 0) else (abs(angles[0]), abs(angles[1]))
-            return (f"{angles[0]:.1f}", f"{angles[1]:.1f}")
+    projections = [v.Point.dot(direction) for v in shape.Vertexes]
+    return max(projections) - min(projections)
 
-        elif bsc2 == bec2 == 0.0:
-            angles = (bsc1, bec1)
-            angles = angles if (angles[0] * angles[1] <= 0) else (abs(angles[0]), abs(angles[1]))
-            return (f"{angles[0]:.1f}", f"{angles[1]:.1f}")
 
-        elif (bsc1 == 0.0 and bec2 == 0.0) ^ (bsc2 == 0.0 and bec1 == 0.0):
-            return (f"{(bsc1 + bsc2):.1f}", f"* {(bec1+bec2):.1f}")
+def length_along_normal(obj, cache=None):
+    """
+    Calcule la longueur de l'objet le long de son arête cible.
 
-        else:
-            return (f"{bsc1:.1f} / {bsc2:.1f}", f"{bec1:.1f} / {bec2:.1f}")
+    obj   : objet FreeCAD (Profile ou TrimmedProfile)
+    cache : TraversalCache optionnel, partagé pendant un parcours
+    """
+    if is_profile(obj):
+        length = analytic_profile_length(obj, cache)
+        if length is not None:
+            return length
 
-    elif len(trim_cuts) == 2:
-        return (f"@ {trim_cuts[0]:.1f}", f"@ {trim_cuts[1]:.1f}")
+    edge = get_target_edge(obj, cache)
+    if edge is None:
+        return 0.0
 
-    elif len(trim_cuts) == 1:
-        bevels_not_zero = [b for b in all_bevels if b != 0]
-        if len(bevels_not_zero) == 0:
-            return ("0.0", f"@ {trim_cuts[0]:.1f}")
+    dir_vec = (edge.Vertexes[-1].Point.sub(edge.Vertexes[0].Point)).normalize()
 
-        elif len(bevels_not_zero) == 1:
-            return (f"{abs(bevels_not_zero[0]):.1f}", f"@ {trim_cuts[0]:.1f}")
+    return shape_extent_along(obj.Shape, dir_vec)
 
-    return ("?", "?")
 
+def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_path=False, cache=None):
+    if cache is None:
+        cache = TraversalCache()
 
-def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_path=False):
     p = {}
     if is_fusion(obj):
         for child in obj.Shapes:
@@ -212,6 +308,7 @@ def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_pat
                 child,
                 parent=(f"{parent} / " if full_parent_path else "") + obj.Label,
                 full_parent_path=full_parent_path,
+                cache=cache,
             )
 
     elif is_group(obj):
@@ -222,6 +319,7 @@ def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_pat
                 child,
                 parent=(f"{parent} / " if full_parent_path else "") + obj.Label,
                 full_parent_path=full_parent_path,
+                cache=cache,
             )
 
     elif is_part(obj):
@@ -236,16 +334,13 @@ def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_pat
                     child,
                     parent=(f"{parent} / " if full_parent_path else "") + obj.Label,
                     full_parent_path=full_parent_path,
+                    cache=cache,
                 )
 
     elif is_profile(obj):
-        cut_angles = get_readable_cutting_angles(
-            getattr(obj, "BevelStartCut1", "N/A"),
-            getattr(obj, "BevelStartCut2", "N/A"),
-            getattr(obj, "BevelEndCut1", "N/A"),
-            getattr(obj, "BevelEndCut2", "N/A"),
-        )
+        cut_angles = get_profile_cutting_angles(obj)
 
+        p["name"] = obj.Name
         p["parent"] = parent
         p["label"] = obj.Label
         p["family"] = (
@@ -255,7 +350,7 @@ def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_pat
         )
         p["size_name"] = getattr(obj, "SizeName", "N/A")
         p["material"] = getattr(obj, "Material", "N/A")
-        p["length"] = f"{length_along_normal(obj):.1f}"
+        p["length"] = f"{length_along_normal(obj, cache):.1f}"
         p["cut_angle_1"] = cut_angles[0]
         p["cut_angle_2"] = cut_angles[1]
         p["cutout"] = ""
@@ -270,27 +365,22 @@ def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_pat
             prof = get_profile_from_trimmedbody(obj)
             trim_prof = obj
 
-            angles = get_all_cutting_angles(obj)
+            angles = get_all_cutting_angles(obj, cache)
             has_cutout = False
 
         elif is_extrudedcutout(obj):
             prof = get_profile_from_extrudedcutout(obj)
             trim_prof = get_trimmedprofile_from_extrudedcutout(obj)
             if trim_prof:
-                angles = get_all_cutting_angles(trim_prof)
+                angles = get_all_cutting_angles(trim_prof, cache)
             else:
                 angles = ()
 
             has_cutout = True
 
-        cut_angles = get_readable_cutting_angles(
-            getattr(prof, "BevelStartCut1", "N/A"),
-            getattr(prof, "BevelStartCut2", "N/A"),
-            getattr(prof, "BevelEndCut1", "N/A"),
-            getattr(prof, "BevelEndCut2", "N/A"),
-            *angles,
-        )
+        cut_angles = get_profile_cutting_angles(prof, *angles)
 
+        p["name"] = obj.Name
         p["parent"] = parent
         p["label"] = obj.Label
         p["family"] = (
@@ -300,7 +390,7 @@ def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_pat
         )
         p["size_name"] = getattr(prof, "SizeName", "N/A")
         p["material"] = getattr(prof, "Material", "N/A")
-        p["length"] = f"{length_along_normal(trim_prof if trim_prof else prof):.1f}"
+        p["length"] = f"{length_along_normal(trim_prof if trim_prof else prof, cache):.1f}"
         p["cut_angle_1"] = cut_angles[0]
         p["cut_angle_2"] = cut_angles[1]
         p["cutout"] = "Yes" if has_cutout else ""
@@ -311,50 +401,48 @@ def traverse_assembly(profiles_data, links_data, obj, parent="", full_parent_pat
         profiles_data.append(p)
 
     elif is_link(obj):
-        links_data.append({"parent": parent, "label": obj.Label, "part": obj.LinkedObject.Label, "quantity": "1", "price":getattr(obj.LinkedObject, "Price", "N/A")})
+        multiplier = get_link_multiplier(obj)
+        subtree = cache.linked_subtree(obj.LinkedObject, full_parent_path) if obj.LinkedObject else None
+
+        if subtree is not None and len(subtree[0]) > 0:
+            # the link brings profiles: expand it like a container holding `multiplier` copies
+            link_parent = (f"{parent} / " if full_parent_path else "") + obj.Label
+            expand_link(profiles_data, subtree[0], obj, link_parent, multiplier)
+            expand_link(links_data, subtree[1], obj, link_parent, multiplier)
+        else:
+            links_data.append(
+                {
+                    "name": obj.Name,
+                    "parent": parent,
+                    "label": obj.Label,
+                    "part": obj.LinkedObject.Label,
+                    "quantity": str(multiplier),
+                    "price": getattr(obj.LinkedObject, "Price", "N/A"),
+                }
+            )
 
     elif is_part_or_part_design(obj):
-        links_data.append({"parent": parent, "label": obj.Label, "part": obj.Label, "quantity": "1", "price":getattr(obj, "Price", "N/A")})
-
-
-def group_profiles(profiles_data):
-    key_func = lambda x: (
-        x["parent"],
-        x["family"],
-        round(float(x["length"]), 1),
-        x["material"],
-        x["size_name"],
-        # round(float(x["price"]), 1), # TODO: Workaround for Lenght problem
-        x["cut_angle_1"],
-        x["cut_angle_2"],
-        x["cutout"],
-    )
-
-    profiles_data_sorted = sorted(profiles_data, key=key_func)
-
-    profiles_data_grouped = []
-
-    for k, group in groupby(profiles_data_sorted, key=key_func):
-        group = list(group)
-        g = group[0]
-        d = {}
-
-        d["parent"] = g["parent"]
-        d["label"] = ", ".join([g["label"] for g in group])
-        d["family"] = g["family"]
-        d["size_name"] = g["size_name"]
-        d["material"] = g["material"]
-        d["length"] = g["length"]
-        d["cut_angle_1"] = g["cut_angle_1"]
-        d["cut_angle_2"] = g["cut_angle_2"]
-        d["cutout"] = g["cutout"]
-        d["approx_weight"] = g["approx_weight"]
-        d["price"] = g["price"]
-        d["quantity"] = len(group)
+        links_data.append(
+            {
+                "name": obj.Name,
+                "parent": parent,
+                "label": obj.Label,
+                "part": obj.Label,
+                "quantity": "1",
+                "price": getattr(obj, "Price", "N/A"),
+            }
+        )
 
-        profiles_data_grouped.append(d)
 
-    return profiles_data_grouped
+def expand_link(out_data, subtree_data, link, link_parent, multiplier):
+    """Appends rows of a memoized linked subtree, relocated under the link and multiplied by its element count"""
+    for row in subtree_data:
+        r = dict(row)
+        if r["parent"].startswith(LINK_PARENT):
+            r["parent"] = link_parent + r["parent"][len(LINK_PARENT) :]
+        r["name"] = link.Name
+        r["quantity"] = str(get_quantity(row) * multiplier)
+        out_data.append(r)
 
 
 def group_links(links_data):
@@ -371,16 +459,24 @@ def group_links(links_data):
         ol["label"] = ", ".join([g["label"] for g in group])
         ol["part"] = k[1]
         ol["price"] = k[2]
-        ol["quantity"] = len(group)
+        ol["quantity"] = sum([get_quantity(g) for g in group])
 
         out_list.append(ol)
 
     return out_list
 
 
-def make_bom(profiles_data, links_data, bom_name="BOM"):
-    doc = FreeCAD.ActiveDocument
-    spreadsheet = doc.addObject("Spreadsheet::Sheet", bom_name)
+def make_bom(profiles_data, links_data, bom_name="BOM", sheet=None):
+    """Writes the BOM into a new Spreadsheet, or rewrites the given one"""
+    if sheet is None:
+        sheet = FreeCAD.ActiveDocument.addObject("Spreadsheet::Sheet", bom_name)
+
+    return bom_cells(profiles_data, links_data).write_to(sheet)
+
+
+def bom_cells(profiles_data, links_data):
+    """Lays out the BOM cells, returns a SheetWriter"""
+    spreadsheet = SheetWriter()
 
     spreadsheet.set("A1", "Profiles")
 
@@ -435,7 +531,15 @@ def make_bom(profiles_data, links_data, bom_name="BOM"):
 
             row += 1
 
+    table = BOMTable.from_rows(profiles_data)
     row += 2
+    spreadsheet.set("A" + str(row), "Totals")
+    spreadsheet.set("A" + str(row + 1), "ApproxWeight")
+    spreadsheet.set("B" + str(row + 1), f"{table.total('approx_weight'):.3f}")
+    spreadsheet.set("A" + str(row + 2), "Price")
+    spreadsheet.set("B" + str(row + 2), f"{table.total('price'):.2f}")
+
+    row += 5
     spreadsheet.set("A" + str(row), "Legend")
     spreadsheet.set("A" + str(row + 1), "*")
     spreadsheet.set("B" + str(row + 1), "Angles 1 and 2 are rotated 90° along the edge")
@@ -451,3 +555,5 @@ def make_bom(profiles_data, links_data, bom_name="BOM"):
     )
     spreadsheet.set("A" + str(row + 4), "?")
     spreadsheet.set("B" + str(row + 4), "Can't compute the angle, do it yourself !")
+
+    return spreadsheet
@@ -1,29 +1,38 @@
 import os
-from collections import defaultdict
 
 import FreeCAD as App
 import FreeCADGui as Gui
+from PySide import QtGui
 
-from freecad.frameforge.best_fit import CutPart, Stock, best_fit_decreasing
+from freecad.frameforge import cut_plan
+from freecad.frameforge.best_fit import CutPart, Stock, best_fit_decreasing, group_rows_by_section, solve_cut_list
+from freecad.frameforge.bom_export import export_bom, export_cut_list
+from freecad.frameforge.command_profiler import profiled_call
 from freecad.frameforge.create_bom import (
+    TraversalCache,
     group_links,
     group_profiles,
     is_extrudedcutout,
     is_fusion,
     is_group,
+    is_link,
     is_part,
     is_profile,
     is_trimmedbody,
     make_bom,
     traverse_assembly,
 )
-from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, translate
+from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, load_ui, translate
+from freecad.frameforge.live_bom import LiveBOM
+from freecad.frameforge.saw_sequence import SawTimes, estimate_packing, sequence_cut_list
+from freecad.frameforge.sheet_writer import SheetWriter
+from freecad.frameforge.stock_inventory import StockInventory
 from freecad.frameforge.trimmed_profile import TrimmedProfile, ViewProviderTrimmedProfile
 
 
-def make_cut_list(sorted_stocks, cutlist_name="CutList"):
+def make_cut_list(sorted_stocks, cutlist_name="CutList", sheet=None):
     doc = App.ActiveDocument
-    spreadsheet = doc.addObject("Spreadsheet::Sheet", cutlist_name)
+    spreadsheet = SheetWriter()
 
     spreadsheet.set("A1", "Material")
     spreadsheet.set("B1", "Stock")
@@ -38,18 +47,30 @@ def make_cut_list(sorted_stocks, cutlist_name="CutList"):
     for stocks in sorted_stocks:
         stock_idx = 0
         for stock in sorted_stocks[stocks]:
+            if len(stock.parts) == 0:
+                # a bar of a repaired cut list that lost all its pieces keeps its number
+                spreadsheet.set("A" + str(row), stocks + " / no cuts left on this bar")
+                spreadsheet.set("B" + str(row), str(stock_idx))
+                row += 1
+                stock_idx += 1
+                continue
+
             cut_part_idx = 0
-            for cut_part in stock.parts:
+            for cut_part, count in stock.part_runs():
                 prof = cut_part.obj
                 if cut_part_idx == 0:
-                    spreadsheet.set("A" + str(row), stocks + f" / used = {stock.used:.1f}, left = {stock.left:.1f}")
+                    origin = f"offcut #{stock.origin}" if stock.origin is not None else "stock"
+                    spreadsheet.set(
+                        "A" + str(row),
+                        stocks + f" / {origin} {stock.length:.1f}, used = {stock.used:.1f}, left = {stock.left:.1f}",
+                    )
 
                 spreadsheet.set("B" + str(row), str(stock_idx))
                 spreadsheet.set("C" + str(row), prof["label"])
                 spreadsheet.set("D" + str(row), str(prof["length"]))
                 spreadsheet.set("E" + str(row), "'" + str(prof["cut_angle_1"]))
                 spreadsheet.set("F" + str(row), "'" + str(prof["cut_angle_2"]))
-                spreadsheet.set("G" + str(row), str(prof["quantity"]))
+                spreadsheet.set("G" + str(row), str(count))
 
                 row += 1
                 cut_part_idx += 1
@@ -63,12 +84,25 @@ def make_cut_list(sorted_stocks, cutlist_name="CutList"):
     spreadsheet.set("B" + str(row), "Length Used")
     spreadsheet.set("C" + str(row), "Stock Used")
     spreadsheet.set("D" + str(row), "Stock Count")
+    spreadsheet.set("E" + str(row), "Lower Bound")
+    spreadsheet.set("F" + str(row), "Gap")
+    spreadsheet.set("G" + str(row), "Angle Changes")
+    spreadsheet.set("H" + str(row), "Stock Flips")
+    spreadsheet.set("I" + str(row), "Setup Time (min)")
     row += 1
     for stocks in sorted_stocks:
         spreadsheet.set("A" + str(row), stocks)
         spreadsheet.set("B" + str(row), f"{sum([s.used for s in sorted_stocks[stocks]])}")
-        spreadsheet.set("C" + str(row), f"{sum([s.length for s in sorted_stocks[stocks]])}")
+        spreadsheet.set("C" + str(row), f"{sum([s.length for s in sorted_stocks[stocks] if len(s.parts) > 0])}")
         spreadsheet.set("D" + str(row), f"{len(sorted_stocks[stocks])}")
+        if getattr(sorted_stocks[stocks], "gap", None) is not None:
+            spreadsheet.set("E" + str(row), f"{sorted_stocks[stocks].lower_bound}")
+            spreadsheet.set("F" + str(row), f"'{sorted_stocks[stocks].gap:.1%}")
+        saw_estimate = getattr(sorted_stocks[stocks], "saw_estimate", None)
+        if saw_estimate is not None:
+            spreadsheet.set("G" + str(row), f"{saw_estimate.angle_changes}")
+            spreadsheet.set("H" + str(row), f"{saw_estimate.flips}")
+            spreadsheet.set("I" + str(row), f"{saw_estimate.seconds / 60.0:.1f}")
 
         row += 1
 
@@ -89,10 +123,33 @@ def make_cut_list(sorted_stocks, cutlist_name="CutList"):
     spreadsheet.set("A" + str(row + 4), "?")
     spreadsheet.set("B" + str(row + 4), "Can't compute the angle, do it yourself !")
 
+    if sheet is None:
+        sheet = doc.addObject("Spreadsheet::Sheet", cutlist_name)
+    return spreadsheet.write_to(sheet)
+
+
+def find_cut_list_sheet(doc, cutlist_name):
+    """Returns the cut list spreadsheet of that name holding a cut plan, or None"""
+    for obj in doc.getObjectsByLabel(cutlist_name):
+        if obj.TypeId == "Spreadsheet::Sheet" and hasattr(obj, "CutPlan"):
+            return obj
+    return None
+
+
+def store_cut_plan(sheet, plan):
+    if not hasattr(sheet, "CutPlan"):
+        sheet.addProperty("App::PropertyString", "CutPlan", "CutList", "Cut plan, used to repair the cut list")
+        sheet.setEditorMode("CutPlan", 2)  # hidden
+    sheet.CutPlan = cut_plan.dumps(plan)
+
+
+def default_inventory_path():
+    return os.path.join(App.getUserAppDataDir(), "Frameforge", "stock_inventory.sqlite")
+
 
 class CreateBOMTaskPanel:
     def __init__(self):
-        self.form = Gui.PySideUic.loadUi(os.path.join(UIPATH, "create_bom.ui"))
+        self.form = load_ui(os.path.join(UIPATH, "create_bom.ui"))
 
         param = App.ParamGet("User parameter:BaseApp/Preferences/Frameforge")
         if not param.IsEmpty():
@@ -100,8 +157,46 @@ class CreateBOMTaskPanel:
             self.form.include_links_cb.setChecked(param.GetBool("Include Links in BOM", False))
             self.form.group_profiles_cb.setChecked(param.GetBool("Group BOM Items by Material/Size/Family", False))
             self.form.cut_list_cb.setChecked(param.GetBool("Generate Cut List", False))
+            self.form.live_bom_cb.setChecked(param.GetBool("Live BOM", False))
             self.form.stock_length_sb.setValue(param.GetFloat("Stock Length", 6000.0))
             self.form.kerf_sb.setValue(param.GetFloat("Kerf", 1.0))
+            self.form.optimize_cut_list_cb.setChecked(param.GetBool("Optimize Cut List", False))
+            self.form.time_budget_sb.setValue(param.GetFloat("Cut List Time Budget", 2.0))
+            self.form.use_inventory_cb.setChecked(param.GetBool("Use Stock Inventory", False))
+            self.form.update_inventory_cb.setChecked(param.GetBool("Update Stock Inventory", False))
+            self.form.min_offcut_sb.setValue(param.GetFloat("Minimum Offcut Length", 300.0))
+            self.form.incremental_cut_list_cb.setChecked(param.GetBool("Incremental Cut List", False))
+            self.form.sequence_cuts_cb.setChecked(param.GetBool("Sequence Saw Cuts", False))
+            self.form.angle_change_time_sb.setValue(param.GetFloat("Saw Angle Change Time", 60.0))
+            self.form.flip_time_sb.setValue(param.GetFloat("Stock Flip Time", 20.0))
+            self.form.export_path_le.setText(param.GetString("BOM Export Path", ""))
+            self.form.export_only_cb.setChecked(param.GetBool("BOM Export Only", False))
+
+        self.form.inventory_path_le.setText(param.GetString("Stock Inventory Path", default_inventory_path()))
+
+        self.form.export_browse_pb.clicked.connect(self.browse_export_path)
+        self.form.inventory_browse_pb.clicked.connect(self.browse_inventory_path)
+
+    def browse_export_path(self):
+        path, _ = QtGui.QFileDialog.getSaveFileName(
+            self.form,
+            translate("frameforge", "Export BOM"),
+            self.form.export_path_le.text(),
+            "CSV (*.csv);;JSON Lines (*.jsonl);;Excel (*.xlsx)",
+        )
+        if path:
+            self.form.export_path_le.setText(path)
+
+    def browse_inventory_path(self):
+        path, _ = QtGui.QFileDialog.getSaveFileName(
+            self.form,
+            translate("frameforge", "Stock Inventory"),
+            self.form.inventory_path_le.text(),
+            "SQLite (*.sqlite *.db)",
+            options=QtGui.QFileDialog.DontConfirmOverwrite,
+        )
+        if path:
+            self.form.inventory_path_le.setText(path)
 
     def open(self):
         App.Console.PrintMessage(translate("frameforge", "Opening CreateBOM\n"))
@@ -117,6 +212,7 @@ class CreateBOMTaskPanel:
 
         return True
 
+    @profiled_call("CreateBOMTaskPanel.accept")
     def accept(self):
         sel = Gui.Selection.getSelection()
 
@@ -126,6 +222,7 @@ class CreateBOMTaskPanel:
                     is_fusion(s)
                     or is_part(s)
                     or is_group(s)
+                    or is_link(s)
                     or is_profile(s)
                     or is_trimmedbody(s)
                     or is_extrudedcutout(s)
@@ -138,8 +235,24 @@ class CreateBOMTaskPanel:
             param.SetBool("Include Links in BOM", self.form.include_links_cb.isChecked())
             param.SetBool("Group BOM Items by Material/Size/Family", self.form.group_profiles_cb.isChecked())
             param.SetBool("Generate Cut List", self.form.cut_list_cb.isChecked())
+            param.SetBool("Live BOM", self.form.live_bom_cb.isChecked())
             param.SetFloat("Stock Length", self.form.stock_length_sb.value())
             param.SetFloat("Kerf", self.form.kerf_sb.value())
+            param.SetBool("Optimize Cut List", self.form.optimize_cut_list_cb.isChecked())
+            param.SetFloat("Cut List Time Budget", self.form.time_budget_sb.value())
+            param.SetBool("Use Stock Inventory", self.form.use_inventory_cb.isChecked())
+            param.SetBool("Update Stock Inventory", self.form.update_inventory_cb.isChecked())
+            param.SetFloat("Minimum Offcut Length", self.form.min_offcut_sb.value())
+            param.SetBool("Incremental Cut List", self.form.incremental_cut_list_cb.isChecked())
+            param.SetBool("Sequence Saw Cuts", self.form.sequence_cuts_cb.isChecked())
+            param.SetFloat("Saw Angle Change Time", self.form.angle_change_time_sb.value())
+            param.SetFloat("Stock Flip Time", self.form.flip_time_sb.value())
+            param.SetString("Stock Inventory Path", self.form.inventory_path_le.text())
+            param.SetString("BOM Export Path", self.form.export_path_le.text())
+            param.SetBool("BOM Export Only", self.form.export_only_cb.isChecked())
+
+            export_path = self.form.export_path_le.text()
+            export_only = export_path != "" and self.form.export_only_cb.isChecked()
 
             if self.form.bom_name_te.text() != "":
                 bom_name = self.form.bom_name_te.text()
@@ -150,9 +263,14 @@ class CreateBOMTaskPanel:
 
             profiles_data = []
             links_data = []
+            cache = TraversalCache()
             for obj in sel:
                 traverse_assembly(
-                    profiles_data, links_data, obj, full_parent_path=self.form.full_parent_path.isChecked()
+                    profiles_data,
+                    links_data,
+                    obj,
+                    full_parent_path=self.form.full_parent_path.isChecked(),
+                    cache=cache,
                 )
 
             if self.form.group_profiles_cb.isChecked():
@@ -165,24 +283,72 @@ class CreateBOMTaskPanel:
                 links_data = []
 
             # BOM
-            make_bom(bom_data, links_data, bom_name=bom_name)
+            if not export_only:
+                sheet = make_bom(bom_data, links_data, bom_name=bom_name)
+
+                if self.form.live_bom_cb.isChecked():
+                    LiveBOM(
+                        sel,
+                        sheet,
+                        full_parent_path=self.form.full_parent_path.isChecked(),
+                        group=self.form.group_profiles_cb.isChecked(),
+                        include_links=self.form.include_links_cb.isChecked(),
+                    ).start()
+
+            if export_path != "":
+                export_bom(export_path, bom_data, links_data)
 
             # Cut List
             if self.form.cut_list_cb.isChecked():
-                grouped_profiles = defaultdict(list)
-                for p in profiles_data:
-                    key = (p["family"], p["material"], p["size_name"])
-                    grouped_profiles[key].append(p)
+                cut_list_name = bom_name + "_CutList"
+                stock_length = self.form.stock_length_sb.value()
+                kerf = self.form.kerf_sb.value()
+                plan_path = f"{os.path.splitext(export_path)[0]}_CutPlan.json" if export_path != "" else ""
+
+                previous_sheet = None
+                previous_plan = None
+                if self.form.incremental_cut_list_cb.isChecked():
+                    previous_sheet = find_cut_list_sheet(App.ActiveDocument, cut_list_name)
+                    if previous_sheet is not None:
+                        previous_plan = cut_plan.loads(previous_sheet.CutPlan)
+                    elif plan_path != "" and os.path.exists(plan_path):
+                        with open(plan_path, encoding="utf-8") as f:
+                            previous_plan = cut_plan.loads(f.read())
+
+                repaired_plan = cut_plan.is_compatible(previous_plan, stock_length, kerf)
+                if repaired_plan:
+                    sorted_stocks, kept, repaired = cut_plan.repair_cut_list(
+                        previous_plan, group_rows_by_section(profiles_data), stock_length, kerf
+                    )
+                    App.Console.PrintMessage(
+                        f"Frameforge : {cut_list_name} repaired, {kept} bars kept, {repaired} bars modified\n"
+                    )
+                else:
+                    sorted_stocks = self.solve_cut_list(profiles_data, bom_name)
+
+                if self.form.sequence_cuts_cb.isChecked():
+                    times = SawTimes(self.form.angle_change_time_sb.value(), self.form.flip_time_sb.value())
+                    packed = sum([estimate_packing(p, times)[0].seconds for p in sorted_stocks.values()])
+                    # a repaired cut list keeps its bar numbers, only the cuts within each bar are sequenced
+                    sorted_stocks = sequence_cut_list(sorted_stocks, times, keep_order=repaired_plan)
+                    sequenced = sum([p.saw_estimate.seconds for p in sorted_stocks.values()])
+                    App.Console.PrintMessage(
+                        f"Frameforge : {cut_list_name} saw setup time {sequenced / 60.0:.1f} min "
+                        f"({packed / 60.0:.1f} min in packing order)\n"
+                    )
 
-                sorted_stocks = {}
-                for k, group in grouped_profiles.items():
-                    parts = [CutPart(p["label"], float(p["length"]), self.form.kerf_sb.value(), p) for p in list(group)]
+                # the plan is stored in cutting order, so the next repair keeps the bars where the sheet has them
+                plan = cut_plan.cut_plan(sorted_stocks, stock_length, kerf)
 
-                    sorted_stocks[f"{k[1]}_{k[0]}_{k[2]}"] = best_fit_decreasing(
-                        self.form.stock_length_sb.value(), parts
-                    )
+                if not export_only:
+                    sheet = make_cut_list(sorted_stocks, cut_list_name, sheet=previous_sheet)
+                    store_cut_plan(sheet, plan)
 
-                make_cut_list(sorted_stocks, bom_name + "_CutList")
+                if export_path != "":
+                    stem, ext = os.path.splitext(export_path)
+                    export_cut_list(f"{stem}_CutList{ext}", sorted_stocks)
+                    with open(plan_path, "w", encoding="utf-8") as f:
+                        f.write(cut_plan.dumps(plan))
 
             App.ActiveDocument.commitTransaction()
             App.ActiveDocument.recompute()
@@ -193,45 +359,47 @@ class CreateBOMTaskPanel:
             App.ActiveDocument.abortTransaction()
             return False
 
+    def solve_cut_list(self, profiles_data, bom_name):
+        inventory = None
+        if self.form.use_inventory_cb.isChecked() and self.form.inventory_path_le.text() != "":
+            inventory_path = self.form.inventory_path_le.text()
+            os.makedirs(os.path.dirname(inventory_path) or ".", exist_ok=True)
+            inventory = StockInventory(inventory_path)
+
+        # the inventory record of this cut list, replaced each time the cut list is generated
+        source = f"{App.ActiveDocument.Label} / {bom_name}"
+        update_inventory = inventory is not None and self.form.update_inventory_cb.isChecked()
+
+        try:
+            sorted_stocks = solve_cut_list(
+                profiles_data,
+                self.form.stock_length_sb.value(),
+                self.form.kerf_sb.value(),
+                self.form.time_budget_sb.value() if self.form.optimize_cut_list_cb.isChecked() else 0.0,
+                inventory,
+                inventory_source=source if update_inventory else None,
+            )
+
+            if update_inventory:
+                inventory.record_cut_list(sorted_stocks, self.form.min_offcut_sb.value(), source)
+        finally:
+            if inventory is not None:
+                inventory.close()
+
+        for k, packing in sorted_stocks.items():
+            if packing.gap is not None:
+                App.Console.PrintMessage(
+                    f"Frameforge : {k}, {len(packing)} stocks ({packing.method}), "
+                    f"lower bound = {packing.lower_bound}, gap = {packing.gap:.1%}\n"
+                )
+
+        return sorted_stocks
+
     def clean(self):
         pass
 
 
 class CreateBOMCommand:
-    def GetResources(self):
-        return {
-            "Pixmap": os.path.join(ICONPATH, "bom.svg"),
-            "MenuText": translate("MetalWB", "Create BOM"),
-            "Accel": "M, B",
-            "ToolTip": translate(
-                "MetalWB",
-                "<html><head/><body><p><b>Create Spreadsheet with profiles</b> \
-                    <br><br> \
-                    select fusions or profiles \
-                    </p></body></html>",
-            ),
-        }
-
-    def IsActive(self):
-        if App.ActiveDocument:
-            if len(Gui.Selection.getSelection()) >= 1:
-                return all(
-                    [
-                        is_fusion(sel)
-                        or is_part(sel)
-                        or is_group(sel)
-                        or is_profile(sel)
-                        or is_trimmedbody(sel)
-                        or is_extrudedcutout(sel)
-                        for sel in Gui.Selection.getSelection()
-                    ]
-                )
-
-        return False
-
     def Activated(self):
         panel = CreateBOMTaskPanel()
         Gui.Control.showDialog(panel)
-
-
-Gui.addCommand("FrameForge_CreateBOM", CreateBOMCommand())
@@ -6,13 +6,22 @@ import FreeCAD as App
 import FreeCADGui as Gui
 from PySide import QtCore, QtGui
 
-from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, FormProxy, translate
+from freecad.frameforge.command_profiler import profiled_call
+from freecad.frameforge.ff_tools import (
+    ICONPATH,
+    PROFILEIMAGES_PATH,
+    PROFILESPATH,
+    UIPATH,
+    FormProxy,
+    load_ui,
+    translate,
+)
 from freecad.frameforge.profile import Profile, ViewProviderCustomProfile
 
 
 class CreateCustomProfileTaskPanel:
     def __init__(self):
-        self.form = Gui.PySideUic.loadUi(os.path.join(UIPATH, "create_custom_profiles.ui"))
+        self.form = load_ui(os.path.join(UIPATH, "create_custom_profiles.ui"))
 
         self.select_profile_flag = False
         self.custom_profile = None
@@ -35,6 +44,7 @@ class CreateCustomProfileTaskPanel:
 
         return True
 
+    @profiled_call("CreateCustomProfileTaskPanel.accept")
     def accept(self):
         if len(Gui.Selection.getSelectionEx()) or self.form.sb_length.value() > 0:
             self.proceed()
@@ -208,14 +218,6 @@ class CreateCustomProfileTaskPanel:
 class CreateCustomProfilesCommand:
     """Create Profiles with standards dimensions"""
 
-    def GetResources(self):
-        return {
-            "Pixmap": os.path.join(ICONPATH, "warehouse_custom_profiles.svg"),
-            "Accel": "Shift+C",  # a default shortcut (optional)
-            "MenuText": "Create Custom Profile",
-            "ToolTip": "Create new custom profiles from Edges",
-        }
-
     def Activated(self):
         """Do something here"""
         panel = CreateCustomProfileTaskPanel()
@@ -223,11 +225,3 @@ class CreateCustomProfilesCommand:
         Gui.Selection.addObserver(panel)
 
         Gui.Control.showDialog(panel)
-
-    def IsActive(self):
-        """Here you can define if the command must be active or not (greyed) if certain conditions
-        are met or not. This function is optional."""
-        return App.ActiveDocument is not None
-
-
-Gui.addCommand("FrameForge_CreateCustomProfiles", CreateCustomProfilesCommand())
@@ -12,34 +12,6 @@ from freecad.frameforge.trimmed_profile import TrimmedProfile, ViewProviderTrimm
 
 
 class CreateEndMiterCommand:
-    def GetResources(self):
-        return {
-            "Pixmap": os.path.join(ICONPATH, "corner-end-miter.svg"),
-            "MenuText": translate("MetalWB", "Create Miter Ends"),
-            "Accel": "M, C",
-            "ToolTip": translate(
-                "MetalWB",
-                "<html><head/><body><p><b>Create Miter Ends</b> \
-                    <br><br> \
-                    Select two profiles. \
-                    </p></body></html>",
-            ),
-        }
-
-    def IsActive(self):
-        if App.ActiveDocument:
-            if len(Gui.Selection.getSelection()) == 2:
-                active = False
-                for sel in Gui.Selection.getSelection():
-                    if hasattr(sel, "Target"):
-                        active = True
-                    elif hasattr(sel, "TrimmedBody"):
-                        active = True
-                    else:
-                        return False
-                return active
-        return False
-
     def Activated(self):
         # create a TrimmedProfile object
         sel = Gui.Selection.getSelectionEx()
@@ -71,6 +43,3 @@ class CreateEndMiterCommand:
 
         # doc.recompute()
         return trimmed_profile
-
-
-Gui.addCommand("FrameForge_EndMiter", CreateEndMiterCommand())
@@ -6,6 +6,7 @@ import FreeCAD as App
 import FreeCADGui as Gui
 from PySide import QtCore, QtGui
 
+from freecad.frameforge.command_profiler import profiled_call
 from freecad.frameforge.extruded_cutout import ExtrudedCutout, ViewProviderExtrudedCutout
 from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, FormProxy, translate
 from freecad.frameforge.frameforge_exceptions import FrameForgeException
@@ -78,6 +79,7 @@ class CreateExtrudedCutoutTaskPanel:
 
         App.ActiveDocument.openTransaction("Create Cutout")
 
+    @profiled_call("CreateExtrudedCutoutTaskPanel.accept")
     def accept(self):
         App.Console.PrintMessage(translate("frameforge", "Accepting Create Extrude Cutout\n"))
         try:
@@ -104,21 +106,6 @@ class CreateExtrudedCutoutTaskPanel:
 class AddExtrudedCutoutCommandClass:
     """Add Extruded Cutout command."""
 
-    def GetResources(self):
-        return {
-            # The name of a svg file available in the resources.
-            "Pixmap": os.path.join(ICONPATH, "extruded-cutout.svg"),
-            "MenuText": translate("FrameForge", "Extruded Cutout"),
-            "Accel": "E, C",
-            "ToolTip": translate(
-                "FrameForge",
-                "Extruded cutout from sketch extrusion\n"
-                "1. Select a face of the sheet metal part (must not be the thickness face) and\n"
-                "2. Select a sketch for the extruded cut (the sketch must be closed).\n"
-                "3. Use Property editor to modify other parameters",
-            ),
-        }
-
     def Activated(self):
         """Create an Extruded Cutout object from user selections."""
         # Get the selected object and face.
@@ -172,9 +159,3 @@ class AddExtrudedCutoutCommandClass:
 
         panel = CreateExtrudedCutoutTaskPanel(obj)
         Gui.Control.showDialog(panel)
-
-    def IsActive(self):
-        return len(Gui.Selection.getSelection()) == 2
-
-
-Gui.addCommand("FrameForge_AddExtrudeCutout", AddExtrudedCutoutCommandClass())
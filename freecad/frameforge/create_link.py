@@ -1,6 +1,5 @@
 import os
 
-import AttachmentEditor.TaskAttachmentEditor as TaskAttachmentEditor
 import FreeCAD as App
 import FreeCADGui as Gui
 
@@ -22,17 +21,9 @@ def makeLink(source):
 
 
 class LinkCommand:
-    def GetResources(self):
-        return {
-            "Pixmap": os.path.join(ICONPATH, "link.svg"),
-            "MenuText": "Attached Link",
-            "ToolTip": "Create a link with Attachment",
-        }
-
-    def IsActive(self):
-        return bool(App.ActiveDocument) and bool(Gui.Selection.getSelection())
-
     def Activated(self):
+        import AttachmentEditor.TaskAttachmentEditor as TaskAttachmentEditor
+
         sel = Gui.Selection.getSelection()
         if not sel:
             return
@@ -46,6 +37,3 @@ class LinkCommand:
             link = makeLink(root)
             Gui.Control.showDialog(TaskAttachmentEditor.AttachmentEditorTaskPanel(link))
         App.ActiveDocument.commitTransaction()
-
-
-Gui.addCommand("FrameForge_Link", LinkCommand())
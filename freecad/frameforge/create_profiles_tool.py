@@ -1,20 +1,25 @@
 import glob
-import json
 import os
 
 import FreeCAD as App
 import FreeCADGui as Gui
 from PySide import QtCore, QtGui
 
-from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, FormProxy, translate
+from freecad.frameforge.command_profiler import profiled_call
+from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, UIPATH, FormProxy, get_pixmap, load_ui, translate
 from freecad.frameforge.profile import Profile, ViewProviderProfile
+from freecad.frameforge.profile_catalog import CATALOG
+from freecad.frameforge.profile_index import get_index
+
+# results shown under the search box
+SEARCH_LIMIT = 200
 
 
 class CreateProfileTaskPanel:
     def __init__(self):
         self.form = [
-            Gui.PySideUic.loadUi(os.path.join(UIPATH, "create_profiles1.ui")),
-            Gui.PySideUic.loadUi(os.path.join(UIPATH, "create_profiles2.ui")),
+            load_ui(os.path.join(UIPATH, "create_profiles1.ui")),
+            load_ui(os.path.join(UIPATH, "create_profiles2.ui")),
         ]
 
         self.form_proxy = FormProxy(self.form)
@@ -23,22 +28,15 @@ class CreateProfileTaskPanel:
         self.initialize_ui()
 
     def load_data(self):
-        self.profiles = {}
-
-        files = [f for f in os.listdir(PROFILESPATH) if f.endswith(".json")]
-
-        for f in files:
-            material_name = os.path.splitext(f)[0].capitalize()
-
-            with open(os.path.join(PROFILESPATH, f)) as fd:
-                self.profiles[material_name] = json.load(fd)
+        # shared with the other panels, each material is parsed once, when first shown
+        self.profiles = CATALOG
 
     def initialize_ui(self):
         def execute_if_has_bool(key, func):
             if key in [k for t, k, v in param.GetContents()]:
                 func(param.GetBool(key))
 
-        self.form_proxy.label_image.setPixmap(QtGui.QPixmap(os.path.join(PROFILEIMAGES_PATH, "Warehouse.png")))
+        self.form_proxy.label_image.setPixmap(get_pixmap(os.path.join(PROFILEIMAGES_PATH, "Warehouse.png")))
 
         self.form_proxy.combo_material.currentIndexChanged.connect(self.on_material_changed)
         self.form_proxy.combo_family.currentIndexChanged.connect(self.on_family_changed)
@@ -46,6 +44,11 @@ class CreateProfileTaskPanel:
 
         self.form_proxy.cb_make_fillet.stateChanged.connect(self.on_cb_make_fillet_changed)
 
+        self.search_results = []
+        self.form_proxy.list_search.setVisible(False)
+        self.form_proxy.le_search.textChanged.connect(self.on_search_changed)
+        self.form_proxy.list_search.itemClicked.connect(self.on_search_result_clicked)
+
         self.form_proxy.combo_material.addItems([k for k in self.profiles])
 
         param = App.ParamGet("User parameter:BaseApp/Preferences/Frameforge")
@@ -74,6 +77,20 @@ class CreateProfileTaskPanel:
             execute_if_has_bool("Default Width Centered", self.form_proxy.cb_width_centered.setChecked)
             execute_if_has_bool("Default Centered Bevel", self.form_proxy.cb_combined_bevel.setChecked)
 
+    def on_search_changed(self, text):
+        self.form_proxy.list_search.clear()
+        self.search_results = get_index().search(text, limit=SEARCH_LIMIT) if text.strip() != "" else []
+
+        self.form_proxy.list_search.setVisible(len(self.search_results) > 0)
+        self.form_proxy.list_search.addItems([str(r) for r in self.search_results])
+
+    def on_search_result_clicked(self, item):
+        result = self.search_results[self.form_proxy.list_search.row(item)]
+
+        self.form_proxy.combo_material.setCurrentText(result.material)
+        self.form_proxy.combo_family.setCurrentText(result.family)
+        self.form_proxy.combo_size.setCurrentText(result.size_name)
+
     def on_material_changed(self, index):
         material = str(self.form_proxy.combo_material.currentText())
 
@@ -141,7 +158,7 @@ class CreateProfileTaskPanel:
                 sb = SETTING_MAP[s]
                 sb.setEnabled(True)
 
-                sb.setValue(float(profile[s]))
+                sb.setValue(profile[s])
 
     def on_cb_make_fillet_changed(self, state):
         self.update_image()
@@ -155,7 +172,7 @@ class CreateProfileTaskPanel:
             img_name += "_Fillet"
         img_name += ".png"
 
-        self.form_proxy.label_image.setPixmap(QtGui.QPixmap(os.path.join(PROFILEIMAGES_PATH, material, img_name)))
+        self.form_proxy.label_image.setPixmap(get_pixmap(os.path.join(PROFILEIMAGES_PATH, material, img_name)))
 
     def open(self):
         App.Console.PrintMessage(translate("frameforge", "Opening CreateProfile\n"))
@@ -171,6 +188,7 @@ class CreateProfileTaskPanel:
 
         return True
 
+    @profiled_call("CreateProfileTaskPanel.accept")
     def accept(self):
         if len(Gui.Selection.getSelectionEx()) or self.form_proxy.sb_length.value() > 0:
             App.Console.PrintMessage(translate("frameforge", "Accepting CreateProfile\n"))
@@ -347,14 +365,6 @@ class CreateProfileTaskPanel:
 class CreateProfilesCommand:
     """Create Profiles with standards dimensions"""
 
-    def GetResources(self):
-        return {
-            "Pixmap": os.path.join(ICONPATH, "warehouse_profiles.svg"),
-            "Accel": "Shift+S",  # a default shortcut (optional)
-            "MenuText": "Create Profile",
-            "ToolTip": "Create new profiles from Edges",
-        }
-
     def Activated(self):
         """Do something here"""
         panel = CreateProfileTaskPanel()
@@ -362,11 +372,3 @@ class CreateProfilesCommand:
         Gui.Selection.addObserver(panel)
 
         Gui.Control.showDialog(panel)
-
-    def IsActive(self):
-        """Here you can define if the command must be active or not (greyed) if certain conditions
-        are met or not. This function is optional."""
-        return App.ActiveDocument is not None
-
-
-Gui.addCommand("FrameForge_CreateProfiles", CreateProfilesCommand())
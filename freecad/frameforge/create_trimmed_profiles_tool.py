@@ -2,21 +2,20 @@ import glob
 import json
 import os
 
-import ArchCommands
-import BOPTools.SplitAPI
 import FreeCAD as App
 import FreeCADGui as Gui
 import Part
 from PySide import QtCore, QtGui
 
-from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, translate
+from freecad.frameforge.command_profiler import profiled_call
+from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, get_icon, load_ui, translate
 from freecad.frameforge.trimmed_profile import TrimmedProfile, ViewProviderTrimmedProfile
 
 
 class CreateTrimmedProfileTaskPanel:
     def __init__(self, fp, mode):
         ui_file = os.path.join(UIPATH, "create_trimmed_profiles.ui")
-        self.form = Gui.PySideUic.loadUi(ui_file)
+        self.form = load_ui(ui_file)
 
         self.fp = fp
         self.dump = fp.dumpContent()
@@ -26,10 +25,10 @@ class CreateTrimmedProfileTaskPanel:
         self.update_view_and_model()
 
     def initialize_ui(self):
-        add_icon = QtGui.QIcon(os.path.join(ICONPATH, "list-add.svg"))
-        remove_icon = QtGui.QIcon(os.path.join(ICONPATH, "list-remove.svg"))
-        coped_type_icon = QtGui.QIcon(os.path.join(ICONPATH, "corner-coped-type.svg"))
-        simple_type_icon = QtGui.QIcon(os.path.join(ICONPATH, "corner-simple-type.svg"))
+        add_icon = get_icon(os.path.join(ICONPATH, "list-add.svg"))
+        remove_icon = get_icon(os.path.join(ICONPATH, "list-remove.svg"))
+        coped_type_icon = get_icon(os.path.join(ICONPATH, "corner-coped-type.svg"))
+        simple_type_icon = get_icon(os.path.join(ICONPATH, "corner-simple-type.svg"))
 
         QSize = QtCore.QSize(32, 32)
 
@@ -148,6 +147,7 @@ class CreateTrimmedProfileTaskPanel:
 
         return True
 
+    @profiled_call("CreateTrimmedProfileTaskPanel.accept")
     def accept(self):
         App.Console.PrintMessage(translate("frameforge", "Accepting Create Trimmed Profile\n"))
 
@@ -163,36 +163,6 @@ class CreateTrimmedProfileTaskPanel:
 
 
 class TrimProfileCommand:
-    def GetResources(self):
-        return {
-            "Pixmap": os.path.join(ICONPATH, "corner-end-trim.svg"),
-            "MenuText": translate("MetalWB", "Trim Profile"),
-            "Accel": "M, C",
-            "ToolTip": translate(
-                "MetalWB",
-                "<html><head/><body><p><b>Trim a profile</b> \
-                    <br><br> \
-                    Select a profile then another profile's faces. \
-                    </p></body></html>",
-            ),
-        }
-
-    def IsActive(self):
-        if App.ActiveDocument:
-            if len(Gui.Selection.getSelection()) > 0:
-                active = False
-                for sel in Gui.Selection.getSelection():
-                    if hasattr(sel, "Target"):
-                        active = True
-                    elif hasattr(sel, "TrimmedBody"):
-                        active = True
-                    else:
-                        return False
-                return active
-            else:
-                return True
-        return False
-
     def Activated(self):
         # create a TrimmedProfile object
         sel = Gui.Selection.getSelectionEx()
@@ -231,6 +201,3 @@ class TrimProfileCommand:
 
         # doc.recompute()
         return trimmed_profile
-
-
-Gui.addCommand("FrameForge_TrimProfiles", TrimProfileCommand())
@@ -0,0 +1,142 @@
+"""
+Cut plans saved along with the cut list, so a cut list can be repaired instead of being planned again.
+
+A plan lists, for each material / family / size, the bars with their length, origin and pieces. When
+the design changes, the pieces that are still wanted stay on their bar, the bars that lost pieces are
+filled again with the new or changed ones, what's left goes to new bars. Bars that didn't lose any
+piece are left as they were and every bar keeps its position, so a printed saw plan stays valid for them.
+A bar that loses all its pieces stays in the plan as an empty bar (it's refilled first by the next repair),
+only the empty bars at the end of a section are dropped.
+"""
+
+import json
+from collections import Counter
+
+from freecad.frameforge.best_fit import (
+    CutItem,
+    CutListPacking,
+    StockPattern,
+    best_fit_decreasing_counts,
+    best_fit_into,
+)
+from freecad.frameforge.bom_table import get_quantity
+
+PLAN_VERSION = 1
+
+
+def piece_key(row):
+    """
+    Pieces are the same when they come from the same object with the same length and angles, a piece the
+    saw sequence cuts the other way round keeps its key
+    """
+    if row.get("reversed", False):
+        return (row.get("name", ""), row["label"], row["length"], row["cut_angle_2"], row["cut_angle_1"])
+    return (row.get("name", ""), row["label"], row["length"], row["cut_angle_1"], row["cut_angle_2"])
+
+
+def cut_plan(sorted_stocks, stock_length, kerf):
+    """Returns the JSON serializable plan of a cut list"""
+    sections = {}
+    for k, packing in sorted_stocks.items():
+        bars = []
+        for pattern in packing.patterns:
+            pieces = [[list(piece_key(item.obj)), n] for item, n in pattern.cuts]
+            bars += [{"length": pattern.length, "origin": pattern.origin, "pieces": pieces}] * pattern.count
+        sections[k] = {"section": list(packing.section or ()), "bars": bars}
+
+    return {"version": PLAN_VERSION, "stock_length": stock_length, "kerf": kerf, "sections": sections}
+
+
+def dumps(plan):
+    return json.dumps(plan, separators=(",", ":"))
+
+
+def loads(text):
+    """Returns the plan, or None if text isn't a plan this version can repair"""
+    try:
+        plan = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(plan, dict) or plan.get("version") != PLAN_VERSION:
+        return None
+    return plan
+
+
+def is_compatible(plan, stock_length, kerf):
+    return plan is not None and plan["kerf"] == kerf and plan["stock_length"] == stock_length
+
+
+def repair_section(bars, rows, stock_length, kerf):
+    """
+    Returns (CutListPacking, number of bars kept as they were, number of bars repaired).
+
+    bars: the bars of the previous plan, rows: the BOM rows of the section now.
+    """
+    demand = Counter()
+    items = {}
+    for row in rows:
+        key = piece_key(row)
+        demand[key] += get_quantity(row)
+        if key not in items:
+            items[key] = CutItem(row["label"], float(row["length"]), 0, kerf, row)
+
+    # the bars in the order of the previous plan, so their numbers on the printed plan don't change
+    ordered = []
+    affected = []
+    for bar in bars:
+        pattern = StockPattern(bar["length"], 1, origin=bar["origin"])
+        intact = True
+        for key, n in bar["pieces"]:
+            key = tuple(key)
+            take = min(n, demand[key])
+            if take < n:
+                intact = False
+            if take == 0:
+                continue
+
+            item = items[key]
+            placed, used = pattern.capacity(item.cut_size, take)
+            pattern.add(item, placed, used)
+            demand[key] -= placed
+            intact &= placed == take
+
+        ordered.append(pattern)
+        if not intact or len(pattern.cuts) == 0:
+            affected.append(pattern)
+
+    # what's still to cut, with the counts the repaired bars didn't take
+    todo = []
+    for key, count in demand.items():
+        if count > 0:
+            item = items[key]
+            todo.append(CutItem(item.name, item.length, count, kerf, item.obj))
+
+    leftovers = best_fit_into(affected, todo)
+    n_kept = len(ordered) - len(affected)
+    n_repaired = sum(1 for p in affected if len(p.cuts) > 0)
+    new_bars = best_fit_decreasing_counts(stock_length, leftovers).patterns
+
+    # bars left empty keep their number, only the last ones can go without renumbering any other bar
+    while len(ordered) > 0 and len(ordered[-1].cuts) == 0:
+        ordered.pop()
+    packing = CutListPacking(ordered + new_bars, None, "incremental")
+    return packing, n_kept, n_repaired
+
+
+def repair_cut_list(plan, sorted_rows, stock_length, kerf):
+    """
+    Repairs a previous plan for the rows of each material / family / size.
+
+    sorted_rows: {cut list key: (section, rows)}. Returns ({cut list key: CutListPacking}, bars kept, bars repaired)
+    """
+    sorted_stocks = {}
+    kept = repaired = 0
+    for k, (section, rows) in sorted_rows.items():
+        bars = plan["sections"].get(k, {}).get("bars", [])
+        packing, n_kept, n_repaired = repair_section(bars, rows, stock_length, kerf)
+        packing.section = section
+        sorted_stocks[k] = packing
+        kept += n_kept
+        repaired += n_repaired
+
+    return sorted_stocks, kept, repaired
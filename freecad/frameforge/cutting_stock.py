@@ -0,0 +1,412 @@
+"""
+Near optimal one dimensional cutting stock.
+
+The LP relaxation is solved by column generation: the master LP is solved through its dual with a
+dense simplex (NumPy), new cutting patterns are priced with a bounded knapsack solved by branch and
+bound. An integer plan is then obtained by diving (fixing the integer part of the LP solution and
+solving again the residual demand). The best of this plan and best_fit_decreasing is kept, along
+with a lower bound on the number of stocks so the gap can be reported.
+"""
+
+import math
+import multiprocessing
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # numpy ships with FreeCAD, without it only best_fit_decreasing is available
+    np = None
+
+from freecad.frameforge.best_fit import CutItem, CutListPacking, StockPattern, best_fit_decreasing_counts
+
+EPS = 1e-9
+
+# the master LP is a dense tableau of (patterns) x (item types + patterns) doubles: beyond that size (64 MB)
+# the optimizer gives up and best_fit_decreasing is kept
+MAX_TABLEAU_CELLS = 8_000_000
+
+
+class Deadline:
+    def __init__(self, time_budget):
+        self.end = time.monotonic() + time_budget
+
+    def expired(self):
+        return time.monotonic() >= self.end
+
+
+def item_types(items):
+    """Merges the items of same cut size, returns [(cut size, demand, [items])] by decreasing size"""
+    types = {}
+    for item in items:
+        if item.count > 0:
+            types.setdefault(item.cut_size, []).append(item)
+
+    return [(size, sum(i.count for i in group), group) for size, group in sorted(types.items(), reverse=True)]
+
+
+def l2_lower_bound(sizes, demands, l_stock):
+    """Martello & Toth L2 bound on the number of stocks, sizes must be sorted by decreasing size"""
+    total = sum(s * d for s, d in zip(sizes, demands))
+    best = math.ceil(total / l_stock - EPS)
+
+    # prefix sums by increasing size: each class of pieces below is a range of indices found by bisection
+    ascending = sizes[::-1]
+    pieces = [0]
+    lengths = [0.0]
+    for s, d in zip(ascending, demands[::-1]):
+        pieces.append(pieces[-1] + d)
+        lengths.append(lengths[-1] + s * d)
+
+    half = l_stock / 2
+    above_half = bisect_right(ascending, half)
+    for k in [0.0] + [s for s in sizes if s <= half]:
+        # J1: too large to share a stock with a k piece, J2: larger than half, J3: at least k
+        fits_k = bisect_right(ascending, l_stock - k)
+        n1 = pieces[-1] - pieces[fits_k]
+        n2 = pieces[fits_k] - pieces[above_half] if fits_k > above_half else 0
+        used2 = lengths[fits_k] - lengths[above_half] if fits_k > above_half else 0.0
+        start3 = bisect_left(ascending, k)
+        size3 = lengths[above_half] - lengths[start3] if above_half > start3 else 0.0
+
+        room = n2 * l_stock - used2
+        best = max(best, n1 + n2 + max(0, math.ceil((size3 - room) / l_stock - EPS)))
+
+    return best
+
+
+def pattern_capacity(l_stock):
+    """Knapsack capacity, kept a hair below the stock length so patterns still fit once summed piece by piece"""
+    return l_stock * (1.0 - EPS)
+
+
+def solve_knapsack(values, sizes, bounds, capacity, deadline, max_nodes=200000):
+    """
+    Bounded knapsack by depth first branch and bound, with an explicit stack (sections can have thousands
+    of item types, deeper than the recursion limit).
+
+    Returns (value, counts, exact), exact is False when the search was cut short.
+    """
+    order = sorted(
+        [i for i in range(len(values)) if values[i] > EPS and bounds[i] > 0],
+        key=lambda i: values[i] / sizes[i],
+        reverse=True,
+    )
+
+    best_value = 0.0
+    best_counts = [0] * len(values)
+    # pieces of order[k] taken on the current branch
+    taken = [0] * len(order)
+    nodes = 0
+    exact = True
+
+    def upper_bound(k, room):
+        # Dantzig bound: fill the room greedily with the remaining items, the last one fractionally
+        bound = 0.0
+        for i in order[k:]:
+            take = min(bounds[i], room / sizes[i])
+            bound += take * values[i]
+            room -= take * sizes[i]
+            if room <= 0:
+                break
+        return bound
+
+    # (depth, room, value, pieces taken of the item at depth - 1), the most pieces are tried first
+    stack = [(0, capacity, 0.0, 0)]
+    while len(stack) > 0:
+        k, room, value, n = stack.pop()
+        if k > 0:
+            taken[k - 1] = n
+
+        nodes += 1
+        if nodes % 1000 == 0 and (nodes > max_nodes or deadline.expired()):
+            exact = False
+            break
+
+        if value > best_value + EPS:
+            best_value = value
+            best_counts = [0] * len(values)
+            for d in range(k):
+                best_counts[order[d]] = taken[d]
+
+        if k == len(order) or value + upper_bound(k, room) <= best_value + EPS:
+            continue
+
+        i = order[k]
+        for n in range(min(bounds[i], int(room / sizes[i])) + 1):
+            stack.append((k + 1, room - n * sizes[i], value + n * values[i], n))
+
+    return best_value, best_counts, exact
+
+
+def solve_master(patterns, demands, deadline, max_iterations=None):
+    """
+    Solves min sum(x) st. sum(x_p * pattern_p) >= demands through its dual:
+    max demands.y st. pattern_p.y <= 1, y >= 0, which starts from a feasible slack basis.
+
+    Returns (x, y, z) or None if the simplex didn't converge, the time is out or the tableau is too large.
+    """
+    n_rows = len(patterns)
+    n_items = len(demands)
+    if (n_rows + 1) * (n_items + n_rows + 1) > MAX_TABLEAU_CELLS or deadline.expired():
+        return None
+
+    tableau = np.zeros((n_rows + 1, n_items + n_rows + 1))
+    tableau[:n_rows, :n_items] = np.asarray(patterns, dtype=float)
+    tableau[:n_rows, n_items : n_items + n_rows] = np.eye(n_rows)
+    tableau[:n_rows, -1] = 1.0
+    tableau[-1, :n_items] = -np.asarray(demands, dtype=float)
+
+    basis = list(range(n_items, n_items + n_rows))
+    max_iterations = max_iterations or 50 * (n_items + n_rows)
+    degenerate = 0
+
+    for iteration in range(max_iterations):
+        if iteration % 16 == 15 and deadline.expired():
+            return None
+
+        costs = tableau[-1, :-1]
+        if costs.min() >= -EPS:
+            break
+
+        # Dantzig's rule, Bland's rule once the simplex stalls on degenerate pivots
+        if degenerate > 20:
+            col = int(np.flatnonzero(costs < -EPS)[0])
+        else:
+            col = int(costs.argmin())
+
+        column = tableau[:n_rows, col]
+        rows = np.flatnonzero(column > EPS)
+        if len(rows) == 0:
+            return None
+
+        ratios = tableau[rows, -1] / column[rows]
+        best = ratios.min()
+        ties = rows[ratios <= best + EPS]
+        row = int(min(ties, key=lambda r: basis[r]))
+
+        degenerate = degenerate + 1 if best <= EPS else 0
+
+        tableau[row] /= tableau[row, col]
+        # only the rows with a non zero in the pivot column change, and only in the columns where the pivot
+        # row isn't zero: patterns hold a few item types, the tableau stays mostly zeros
+        rows = np.flatnonzero(tableau[:, col])
+        rows = rows[rows != row]
+        cols = np.flatnonzero(tableau[row])
+        tableau[np.ix_(rows, cols)] -= np.outer(tableau[rows, col], tableau[row, cols])
+        basis[row] = col
+    else:
+        return None
+
+    y = [0.0] * n_items
+    for r, b in enumerate(basis):
+        if b < n_items:
+            y[b] = float(tableau[r, -1])
+
+    x = [max(0.0, float(v)) for v in tableau[-1, n_items : n_items + n_rows]]
+    return x, y, float(tableau[-1, -1])
+
+
+def homogeneous_patterns(sizes, demands, l_stock):
+    patterns = []
+    for i, (s, d) in enumerate(zip(sizes, demands)):
+        pattern = [0] * len(sizes)
+        pattern[i] = StockPattern(l_stock, 1).capacity(s, d)[0]
+        patterns.append(pattern)
+    return patterns
+
+
+def column_generation(sizes, demands, l_stock, patterns, deadline):
+    """
+    Adds patterns until the LP is optimal or the time is out.
+
+    Returns (x, z, lower bound) or None if the master LP failed.
+    """
+    capacity = pattern_capacity(l_stock)
+    known = {tuple(p) for p in patterns}
+    lower_bound = 0
+
+    while True:
+        solution = solve_master(patterns, demands, deadline)
+        if solution is None:
+            return None
+        x, y, z = solution
+
+        value, counts, exact = solve_knapsack(y, sizes, demands, capacity, deadline)
+        if exact:
+            # Farley's bound holds whatever the state of the column generation
+            lower_bound = max(lower_bound, math.ceil(z / max(value, 1.0) - EPS))
+
+        if value <= 1.0 + EPS or tuple(counts) in known or deadline.expired():
+            if exact and value <= 1.0 + EPS:
+                lower_bound = max(lower_bound, math.ceil(z - EPS))
+            return x, z, lower_bound
+
+        known.add(tuple(counts))
+        patterns.append(counts)
+
+
+def dive(sizes, demands, l_stock, deadline):
+    """
+    Fixes the integer part of the LP solution, then solves the residual demand again, until the
+    demand is covered or the time is out. Returns ([(pattern, count)], residual demand, lower bound)
+    """
+    residual = list(demands)
+    plan = []
+    lower_bound = 0
+    # patterns of the plan so far, the first pass starts from the homogeneous patterns only
+    patterns = []
+    first = True
+
+    while any(residual) and not deadline.expired():
+        active = [i for i, d in enumerate(residual) if d > 0]
+        sub_sizes = [sizes[i] for i in active]
+        sub_demands = [residual[i] for i in active]
+        sub_patterns = [[min(p[i], residual[i]) for i in active] for p in patterns]
+        sub_patterns = [p for p in sub_patterns if any(p)]
+        sub_patterns += homogeneous_patterns(sub_sizes, sub_demands, l_stock)
+
+        result = column_generation(sub_sizes, sub_demands, l_stock, sub_patterns, deadline)
+        if result is None:
+            break
+        x, z, bound = result
+        if first:
+            lower_bound = bound
+            first = False
+
+        fixed = False
+        for p, xp in sorted(zip(sub_patterns, x), key=lambda t: -t[1]):
+            k = math.floor(xp + EPS)
+            # never cut more pieces than needed
+            k = min([k] + [residual[active[j]] // n for j, n in enumerate(p) if n > 0])
+            if k > 0:
+                fixed = True
+                full = [0] * len(sizes)
+                for j, n in enumerate(p):
+                    full[active[j]] = n
+                    residual[active[j]] -= n * k
+                plan.append((full, k))
+
+        if not fixed:
+            # the LP only uses fractions of patterns: take the largest one once, trimmed to the residual demand
+            p, xp = max(zip(sub_patterns, x), key=lambda t: t[1])
+            full = [0] * len(sizes)
+            for j, n in enumerate(p):
+                full[active[j]] = min(n, residual[active[j]])
+                residual[active[j]] -= full[active[j]]
+            plan.append((full, 1))
+
+        patterns = [p for p, k in plan]
+
+    return plan, residual, lower_bound
+
+
+def build_packing(types, plan, l_stock):
+    """Turns [(pattern over types, count)] into StockPatterns, handing out the pieces of each item in order"""
+    queues = [[[item, item.count] for item in group] for size, demand, group in types]
+    stock_patterns = []
+
+    for pattern, count in plan:
+        while count > 0:
+            # as many stocks as possible cut from the current item of every type
+            uniform = min(queues[t][0][1] // n for t, n in enumerate(pattern) if n > 0)
+            k = min(count, uniform) if uniform > 0 else 1
+
+            stock = StockPattern(l_stock, k)
+            for t, n in enumerate(pattern):
+                while n > 0:
+                    entry = queues[t][0]
+                    take = min(n, entry[1] // k)
+                    placed, used = stock.capacity(entry[0].cut_size, take)
+                    if placed < take:
+                        return None
+                    stock.add(entry[0], take, used)
+                    entry[1] -= take * k
+                    n -= take
+                    if entry[1] == 0:
+                        queues[t].pop(0)
+
+            stock_patterns.append(stock)
+            count -= k
+
+    return stock_patterns
+
+
+def optimize_cut_list(l_stock, items, time_budget=1.0):
+    """
+    Packs CutItems with the column generation solver, within time_budget seconds.
+
+    Returns a CutListPacking, with the number of stocks of the best_fit_decreasing packing when it's as
+    good as the optimized one, and always with its lower bound.
+    """
+    items = list(items)
+    bfd = best_fit_decreasing_counts(l_stock, items)
+
+    types = item_types(items)
+    sizes = [t[0] for t in types]
+    demands = [t[1] for t in types]
+    lower_bound = l2_lower_bound(sizes, demands, l_stock) if len(types) > 0 else 0
+
+    bfd.lower_bound = lower_bound
+    if np is None or len(bfd) <= lower_bound or time_budget <= 0:
+        return bfd
+    # the first master LP holds a pattern per item type, don't build patterns it would refuse
+    if len(types) * (2 * len(types) + 1) > MAX_TABLEAU_CELLS:
+        return bfd
+
+    deadline = Deadline(time_budget)
+    try:
+        plan, residual, lp_bound = dive(sizes, demands, l_stock, deadline)
+        patterns = build_packing(types, plan, l_stock)
+    except (ArithmeticError, MemoryError, RecursionError, ValueError, np.linalg.LinAlgError):
+        # the optimizer is best effort, the best_fit_decreasing packing is always valid
+        return bfd
+
+    lower_bound = max(lower_bound, lp_bound)
+    bfd.lower_bound = lower_bound
+    if patterns is None:
+        return bfd
+
+    if any(residual):
+        # time is out: the residual demand goes to best_fit_decreasing
+        leftovers = []
+        for t, (size, demand, group) in enumerate(types):
+            remaining = residual[t]
+            for item in reversed(group):
+                take = min(remaining, item.count)
+                if take > 0:
+                    leftovers.append(CutItem(item.name, item.length, take, item.kerf, item.obj))
+                remaining -= take
+        patterns += best_fit_decreasing_counts(l_stock, leftovers).patterns
+
+    optimized = CutListPacking(sorted(patterns, key=lambda p: p.left), lower_bound, "column generation")
+    if len(optimized) < len(bfd):
+        return optimized
+    return bfd
+
+
+def _optimize_job(args):
+    key, l_stock, items, time_budget = args
+    return key, optimize_cut_list(l_stock, items, time_budget)
+
+
+def optimize_cut_lists(groups, l_stock, time_budget=1.0, processes=False):
+    """
+    Optimizes {key: [CutItem]} within time_budget seconds for all the groups.
+
+    Groups are solved one after the other, each with an equal share of the budget. Headless callers can pass
+    processes=True to solve them in forked processes (Linux only), the groups then share the budget of
+    every worker: forking the GUI duplicates its Qt and OpenGL state, and a spawned process would start a
+    new FreeCAD.
+    """
+    workers = min(len(groups), multiprocessing.cpu_count())
+    if processes and workers > 1 and sys.platform.startswith("linux"):
+        share = time_budget * workers / len(groups)
+        jobs = [(key, l_stock, items, share) for key, items in groups.items()]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            return dict(executor.map(_optimize_job, jobs))
+
+    share = time_budget / max(len(groups), 1)
+    return {key: optimize_cut_list(l_stock, items, share) for key, items in groups.items()}
@@ -6,6 +6,7 @@ import FreeCAD as App
 import FreeCADGui as Gui
 from PySide import QtCore, QtGui
 
+from freecad.frameforge.command_profiler import profiled_call
 from freecad.frameforge.create_profiles_tool import CreateProfileTaskPanel
 from freecad.frameforge.profile import Profile, ViewProviderProfile
 
@@ -59,6 +60,7 @@ class EditProfileTaskPanel(CreateProfileTaskPanel):
 
         return True
 
+    @profiled_call("EditProfileTaskPanel.accept")
     def accept(self):
         self.profile.Proxy.set_properties(
             self.profile,
@@ -9,6 +9,8 @@ from PySide import QtCore, QtGui
 
 from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, translate
 from freecad.frameforge.frameforge_exceptions import FrameForgeException
+from freecad.frameforge.recompute_profiler import PROFILER, profiled
+from freecad.frameforge.shape_metrics import record_booleans
 
 
 class ExtrudedCutout:
@@ -55,6 +57,7 @@ class ExtrudedCutout:
             else:
                 fp.setEditorMode("ExtrusionLength", 2)  # Hide
 
+    @profiled("ExtrudedCutout")
     def execute(self, fp):
         """Perform the cut when the object is recomputed."""
         try:
@@ -87,12 +90,16 @@ class ExtrudedCutout:
                 myFacesList.append(myFace)
 
             compFaces = Part.Compound(myFacesList)
+            PROFILER.mark("section")
 
             # Extrusion
             extruded_shape = compFaces.extrude(-normal_vector * ExtLength)
+            PROFILER.mark("extrude")
 
             # Soustraction (Cut)
             cut_shape = selected_object.Shape.cut(extruded_shape)
+            PROFILER.mark("cut")
+            record_booleans(fp, 1)
 
             # Assigne la forme au FeaturePython
             fp.Shape = cut_shape
@@ -0,0 +1,411 @@
+"""
+Reads FrameForge BOM rows straight from FCStd files, without FreeCAD and without loading any BREP.
+
+Document.xml is parsed incrementally, only the properties needed by the BOM are kept. Lengths and
+angles come from the stored properties, rows whose values actually depend on the geometry (trimmed
+profiles, compound bevels on custom sections...) are flagged with "geometry_required".
+
+    python -m freecad.frameforge.fcstd_reader job1.FCStd job2.FCStd -o audit.csv
+"""
+
+import argparse
+import os
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from freecad.frameforge.bom_export import EXPORT_FORMATS, export_bom
+from freecad.frameforge.bom_table import get_quantity
+from freecad.frameforge.profile_data import bevelled_length, get_profile_cutting_angles
+
+# properties read from Document.xml, everything else (shapes, placements, proxies...) is skipped
+BOM_PROPERTIES = {
+    "Label",
+    "Visibility",
+    "Group",
+    "Shapes",
+    "LinkedObject",
+    "ElementCount",
+    "Family",
+    "SizeName",
+    "Material",
+    "ProfileLength",
+    "ProfileWidth",
+    "ProfileHeight",
+    "CenteredOnWidth",
+    "CenteredOnHeight",
+    "OffsetA",
+    "OffsetB",
+    "Target",
+    "CustomProfile",
+    "BevelStartCut1",
+    "BevelStartCut2",
+    "BevelEndCut1",
+    "BevelEndCut2",
+    "BevelStartCut",
+    "BevelStartRotate",
+    "BevelEndCut",
+    "BevelEndRotate",
+    "ApproxWeight",
+    "Price",
+    "Quantity",
+    "TrimmedBody",
+    "TrimmingBoundary",
+    "TrimmedProfileType",
+    "CutType",
+    "baseObject",
+}
+
+# same placeholder as create_bom.LINK_PARENT, replaced by the path of the link
+LINK_PARENT = "\x00"
+
+
+class StoredObject:
+    """A document object rebuilt from Document.xml, properties are reachable as attributes"""
+
+    def __init__(self, name, type_id):
+        self.Name = name
+        self.TypeId = type_id
+        self.properties = {}
+
+    def __getattr__(self, prop):
+        try:
+            return self.__dict__["properties"][prop]
+        except KeyError:
+            raise AttributeError(prop) from None
+
+    def __repr__(self):
+        return f"StoredObject<{self.Name}, {self.TypeId}>"
+
+
+def parse_property(elem):
+    """Returns the value of a <Property> element, links are kept as object names"""
+    for child in elem:
+        tag = child.tag
+        if tag == "String":
+            return child.get("value")
+        elif tag == "Float":
+            return float(child.get("value"))
+        elif tag == "Bool":
+            return child.get("value") == "true"
+        elif tag == "Integer":
+            # enumerations created from Python store their items next to the index
+            enums = [e.get("value") for e in elem.iter("Enum")]
+            index = int(child.get("value"))
+            return enums[index] if 0 <= index < len(enums) else index
+        elif tag == "Link":
+            return child.get("value") or None
+        elif tag == "XLink":
+            # links to other files can't be resolved, they are kept as "file#name"
+            name = child.get("name") or None
+            return f"{child.get('file')}#{name}" if child.get("file") else name
+        elif tag == "LinkSub":
+            return (child.get("value") or None, [s.get("value") for s in child.iter("Sub")])
+        elif tag == "LinkList":
+            return [lnk.get("value") for lnk in child.iter("Link")]
+        elif tag == "LinkSubList":
+            subs = {}
+            for lnk in child.iter("Link"):
+                subs.setdefault(lnk.get("obj"), []).append(lnk.get("sub"))
+            return list(subs.items())
+    return None
+
+
+def iter_document_objects(source):
+    """Yields the StoredObject of a Document.xml file object, parsing it incrementally"""
+    types = {}
+    current = None
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "Object" and current is None and elem.get("type") is None and elem.get("name") in types:
+                current = StoredObject(elem.get("name"), types[elem.get("name")])
+            continue
+
+        if elem.tag == "Object" and elem.get("type") is not None:
+            # <Objects> lists the types, <ObjectData> the properties
+            types[elem.get("name")] = elem.get("type")
+            elem.clear()
+        elif elem.tag == "Property" and current is not None:
+            if elem.get("name") in BOM_PROPERTIES:
+                current.properties[elem.get("name")] = parse_property(elem)
+            elem.clear()
+        elif elem.tag == "Object" and current is not None:
+            yield current
+            current = None
+            elem.clear()
+
+
+class StoredDocument:
+    def __init__(self, objects):
+        self.objects = {o.Name: o for o in objects}
+
+        # mimics DocumentObject.getParentGroup(): plain groups hold their children before Parts do
+        self.parent_groups = {}
+        for obj in self.objects.values():
+            if obj.TypeId == "App::Part":
+                for name in getattr(obj, "Group", None) or []:
+                    self.parent_groups.setdefault(name, obj)
+        for obj in self.objects.values():
+            if obj.TypeId == "App::DocumentObjectGroup":
+                for name in getattr(obj, "Group", None) or []:
+                    self.parent_groups[name] = obj
+
+    @classmethod
+    def from_file(cls, path):
+        with zipfile.ZipFile(path) as zf:
+            with zf.open("Document.xml") as f:
+                return cls(iter_document_objects(f))
+
+    def get(self, name):
+        return self.objects.get(name) if name else None
+
+    def get_all(self, names):
+        return [o for o in (self.get(n) for n in names or []) if o is not None]
+
+    def roots(self):
+        """Objects that are not held by any container or link"""
+        held = set()
+        for obj in self.objects.values():
+            for prop in ("Group", "Shapes"):
+                held.update(getattr(obj, prop, None) or [])
+            if obj.TypeId == "App::Link":
+                held.add(getattr(obj, "LinkedObject", None))
+            for prop in ("TrimmedBody", "baseObject", "Target", "CustomProfile"):
+                value = getattr(obj, prop, None)
+                held.add(value[0] if isinstance(value, tuple) else value)
+        return [o for o in self.objects.values() if o.Name not in held]
+
+    # Same tests as create_bom, on stored objects
+
+    def is_profile(self, obj):
+        return obj.TypeId == "Part::FeaturePython" and (hasattr(obj, "Family") or hasattr(obj, "ProfileLength"))
+
+    def is_trimmedbody(self, obj):
+        return obj.TypeId == "Part::FeaturePython" and hasattr(obj, "TrimmedBody")
+
+    def is_extrudedcutout(self, obj):
+        return obj.TypeId == "Part::FeaturePython" and hasattr(obj, "baseObject")
+
+    def get_profile_from(self, obj):
+        """Returns (profile, trimmed profile or None) of a TrimmedProfile or an ExtrudedCutout"""
+        trimmed = None
+        while obj is not None and not self.is_profile(obj):
+            if self.is_trimmedbody(obj):
+                trimmed = trimmed or obj
+                obj = self.get(obj.TrimmedBody)
+            elif self.is_extrudedcutout(obj):
+                obj = self.get((obj.baseObject or (None,))[0])
+            else:
+                return None, trimmed
+        return obj, trimmed
+
+
+def stored_profile_length(prof):
+    """Returns (length, exact), the length Profile.execute computed the last time the document was saved"""
+    L = prof.ProfileLength or 0.0
+    target = getattr(prof, "Target", None)
+    if not (target and target[0]):
+        # ProfileLength already holds the offsets when the profile follows an edge
+        L += (getattr(prof, "OffsetA", 0.0) or 0.0) + (getattr(prof, "OffsetB", 0.0) or 0.0)
+
+    try:
+        length = bevelled_length(prof, L)
+    except AttributeError:
+        length = None
+
+    if length is None:
+        return L, False
+    return length, True
+
+
+def profile_row(doc, obj, prof, parent, cutout=False, trimmed=False):
+    geometry_required = trimmed
+
+    if hasattr(prof, "CustomProfile"):
+        custom = doc.get(prof.CustomProfile)
+        family = getattr(custom, "Label", "Custom Profile") if custom else "Custom Profile"
+    else:
+        family = getattr(prof, "Family", "N/A")
+
+    length, exact = stored_profile_length(prof)
+    geometry_required |= not exact
+
+    if trimmed:
+        # trim angles are measured on the boundary faces
+        cut_angles = ("?", "?")
+    else:
+        cut_angles = get_profile_cutting_angles(prof)
+
+    return {
+        "name": obj.Name,
+        "parent": parent,
+        "label": obj.Label,
+        "family": family,
+        "size_name": getattr(prof, "SizeName", "N/A"),
+        "material": getattr(prof, "Material", "N/A"),
+        "length": f"{length:.1f}",
+        "cut_angle_1": cut_angles[0],
+        "cut_angle_2": cut_angles[1],
+        "cutout": "Yes" if cutout else "",
+        "approx_weight": str(getattr(prof, "ApproxWeight", "N/A")),
+        "price": str(getattr(prof, "Price", "N/A")),
+        "quantity": str(getattr(obj, "Quantity", "1")) if obj is prof else "1",
+        "geometry_required": geometry_required,
+    }
+
+
+def traverse_stored(doc, profiles_data, links_data, obj, parent="", full_parent_path=False, visiting=None):
+    """Same walk as create_bom.traverse_assembly, on a StoredDocument"""
+    visiting = set() if visiting is None else visiting
+    child_parent = (f"{parent} / " if full_parent_path else "") + obj.Label
+
+    def walk(children):
+        for child in children:
+            traverse_stored(doc, profiles_data, links_data, child, child_parent, full_parent_path, visiting)
+
+    if obj.TypeId == "Part::MultiFuse":
+        walk(doc.get_all(obj.Shapes))
+
+    elif obj.TypeId == "App::DocumentObjectGroup":
+        walk(doc.get_all(obj.Group))
+
+    elif obj.TypeId == "App::Part":
+        walk(
+            [
+                c
+                for c in doc.get_all(obj.Group)
+                if doc.parent_groups.get(c.Name) in (obj, None) and getattr(c, "Visibility", True)
+            ]
+        )
+
+    elif doc.is_profile(obj):
+        profiles_data.append(profile_row(doc, obj, obj, parent))
+
+    elif doc.is_trimmedbody(obj) or doc.is_extrudedcutout(obj):
+        prof, trimmed = doc.get_profile_from(obj)
+        if prof is not None:
+            profiles_data.append(
+                profile_row(doc, obj, prof, parent, cutout=doc.is_extrudedcutout(obj), trimmed=trimmed is not None)
+            )
+
+    elif obj.TypeId == "App::Link":
+        count = getattr(obj, "ElementCount", 0) or 0
+        multiplier = count if count > 0 else 1
+        target = doc.get(getattr(obj, "LinkedObject", None))
+
+        sub_profiles = []
+        sub_links = []
+        if target is not None and target.Name not in visiting:
+            visiting.add(target.Name)
+            traverse_stored(doc, sub_profiles, sub_links, target, LINK_PARENT, full_parent_path, visiting)
+            visiting.discard(target.Name)
+
+        if len(sub_profiles) > 0:
+            link_parent = (f"{parent} / " if full_parent_path else "") + obj.Label
+            for out_data, sub_data in ((profiles_data, sub_profiles), (links_data, sub_links)):
+                for row in sub_data:
+                    r = dict(row)
+                    if r["parent"].startswith(LINK_PARENT):
+                        r["parent"] = link_parent + r["parent"][len(LINK_PARENT) :]
+                    r["name"] = obj.Name
+                    r["quantity"] = str(get_quantity(row) * multiplier)
+                    out_data.append(r)
+        else:
+            links_data.append(
+                {
+                    "name": obj.Name,
+                    "parent": parent,
+                    "label": obj.Label,
+                    "part": target.Label if target is not None else str(getattr(obj, "LinkedObject", "")),
+                    "quantity": str(multiplier),
+                    "price": getattr(target, "Price", "N/A"),
+                }
+            )
+
+    elif obj.TypeId.startswith(("Part::", "PartDesign::")) and obj.TypeId != "Part::FeaturePython":
+        links_data.append(
+            {
+                "name": obj.Name,
+                "parent": parent,
+                "label": obj.Label,
+                "part": obj.Label,
+                "quantity": "1",
+                "price": getattr(obj, "Price", "N/A"),
+            }
+        )
+
+
+def read_bom(path, full_parent_path=False, root_names=None):
+    """Returns (profiles_data, links_data) of a FCStd file, walking every root object unless root_names is given"""
+    doc = StoredDocument.from_file(path)
+
+    roots = doc.get_all(root_names) if root_names else doc.roots()
+
+    profiles_data = []
+    links_data = []
+    for obj in roots:
+        traverse_stored(doc, profiles_data, links_data, obj, full_parent_path=full_parent_path)
+
+    return profiles_data, links_data
+
+
+def _read_bom_job(args):
+    path, full_parent_path = args
+    try:
+        return path, read_bom(path, full_parent_path), None
+    # one unexpected file (missing or malformed properties) is reported, it doesn't stop the batch
+    except (OSError, KeyError, ValueError, TypeError, zipfile.BadZipFile, ET.ParseError) as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def read_boms(paths, full_parent_path=False, max_workers=None):
+    """
+    Reads many FCStd files with a process pool.
+
+    Yields (path, (profiles_data, links_data), error) in the order of paths, error is None
+    unless the file couldn't be read.
+    """
+    jobs = [(p, full_parent_path) for p in paths]
+    if len(jobs) <= 1 or max_workers == 1:
+        yield from (_read_bom_job(j) for j in jobs)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for path, data, error in executor.map(_read_bom_job, jobs, chunksize=4):
+            yield path, data, error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract FrameForge BOMs from FCStd files without FreeCAD")
+    parser.add_argument("files", nargs="+", help="FCStd files")
+    parser.add_argument("-o", "--output", required=True, help=f"output file ({', '.join(EXPORT_FORMATS)})")
+    parser.add_argument("--full-parent-path", action="store_true", help="list the whole path of containers")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    all_profiles = []
+    all_links = []
+    errors = 0
+    for path, data, error in read_boms(args.files, args.full_parent_path, args.jobs):
+        if error is not None:
+            print(f"{path}: {error}")
+            errors += 1
+            continue
+
+        # rows of every file end up in one table, the file name leads the parent path
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for rows, out in ((data[0], all_profiles), (data[1], all_links)):
+            for row in rows:
+                row["parent"] = f"{stem} / {row['parent']}" if row["parent"] else stem
+                out.append(row)
+
+    export_bom(args.output, all_profiles, all_links)
+
+    flagged = sum(1 for p in all_profiles if p["geometry_required"])
+    print(f"{len(all_profiles)} profiles, {len(all_links)} parts, {flagged} need the geometry to be checked")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
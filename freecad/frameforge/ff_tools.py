@@ -24,3 +24,81 @@ class FormProxy(object):
             raise ValueError(f"{name} not a member of one of the forms")
 
         return getattr(self.members[name], name)
+
+
+# .ui path -> (content digest, form class, base class), classes are None when loadUiType failed
+_ui_types = {}
+# image path -> QPixmap / QIcon
+_pixmaps = {}
+_icons = {}
+
+
+def load_ui(path):
+    """
+    Same as Gui.PySideUic.loadUi, but each .ui file is compiled to its form classes once (per content) and
+    the classes are reused: opening a panel again doesn't parse the XML.
+    """
+    import hashlib
+
+    import FreeCADGui as Gui
+
+    with open(path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+
+    cached = _ui_types.get(path)
+    if cached is None or cached[0] != digest:
+        if not hasattr(Gui.PySideUic, "loadUiType"):
+            return Gui.PySideUic.loadUi(path)
+        try:
+            form_class, base_class = Gui.PySideUic.loadUiType(path)
+        except Exception as e:
+            # some PySide builds can't compile .ui files (no uic), loadUi still works
+            FreeCAD.Console.PrintWarning(f"Frameforge : can't compile {os.path.basename(path)} ({e}), using loadUi\n")
+            _ui_types[path] = (digest, None, None)
+            return Gui.PySideUic.loadUi(path)
+        cached = _ui_types[path] = (digest, form_class, base_class)
+    elif cached[1] is None:
+        # compiling this content already failed
+        return Gui.PySideUic.loadUi(path)
+
+    form = cached[2]()
+    ui = cached[1]()
+    ui.setupUi(form)
+    # widgets are members of the form, as with loadUi
+    for name, member in vars(ui).items():
+        setattr(form, name, member)
+    return form
+
+
+def get_pixmap(path):
+    """QPixmap of an image file, loaded once (pixmaps are implicitly shared, copies are cheap)"""
+    if path not in _pixmaps:
+        from PySide import QtGui
+
+        _pixmaps[path] = QtGui.QPixmap(path)
+    return _pixmaps[path]
+
+
+def get_icon(path):
+    if path not in _icons:
+        from PySide import QtGui
+
+        _icons[path] = QtGui.QIcon(path)
+    return _icons[path]
+
+
+LOG_LEVELS = ("error", "warning", "message", "log")
+
+
+def log(level, event, **fields):
+    """
+    Writes "Frameforge : event key=value ..." to the report view, at one of LOG_LEVELS ("log" is only shown
+    when the report view logs are enabled)
+    """
+    printer = {
+        "error": FreeCAD.Console.PrintError,
+        "warning": FreeCAD.Console.PrintWarning,
+        "message": FreeCAD.Console.PrintMessage,
+        "log": FreeCAD.Console.PrintLog,
+    }[level]
+    printer(" ".join([f"Frameforge : {event}", *(f"{k}={v}" for k, v in fields.items())]) + "\n")
@@ -0,0 +1,369 @@
+import FreeCAD as App
+
+from freecad.frameforge.create_bom import (
+    TraversalCache,
+    bom_cells,
+    group_links,
+    is_fusion,
+    is_group,
+    is_link,
+    is_part,
+    merge_profile_group,
+    profile_group_key,
+    traverse_assembly,
+)
+
+# (document name, sheet name) -> LiveBOM, keeps the observers alive for the session
+LIVE_BOMS = {}
+
+# properties of the BOM spreadsheet a live BOM is saved in: name -> (type, documentation)
+SHEET_PROPERTIES = {
+    "LiveBOM": ("App::PropertyBool", "Keep this BOM up to date with the assembly"),
+    "LiveBOMRoots": ("App::PropertyStringList", "Names of the objects the BOM is built from"),
+    "LiveBOMFullParentPath": ("App::PropertyBool", "Parents are listed with their full path"),
+    "LiveBOMGroup": ("App::PropertyBool", "Profiles are grouped by Material/Size/Family"),
+    "LiveBOMIncludeLinks": ("App::PropertyBool", "Parts reached through links are listed"),
+}
+
+
+class LiveBOM:
+    """
+    Keeps a BOM spreadsheet up to date with a document observer.
+
+    The assembly is indexed once: each occurrence of an object below the roots is a node, identified by the
+    path of names from its root, holding its parent label, its children and the rows it produced. An event
+    marks the nodes of the object it concerns, only their subtrees are traversed again, only the groups their
+    rows leave or join are merged again, and only the cells that changed are written to the sheet.
+    """
+
+    def __init__(self, roots, sheet, full_parent_path=False, group=False, include_links=False):
+        self.doc = sheet.Document
+        self.sheet_name = sheet.Name
+        self.root_names = [r.Name for r in roots]
+        self.full_parent_path = full_parent_path
+        self.group = group
+        self.include_links = include_links
+
+        self.parents = {}  # path -> parent label its rows are built with
+        self.children = {}  # path -> child paths, in traversal order
+        self.paths = {}  # object name -> paths
+        self.profiles = {}  # path -> rows (a link expands to several rows)
+        self.links = {}  # path -> rows
+        self.linked = {}  # name of an object reached through links -> paths of those links
+        self.link_targets = {}  # path of a link -> names of the objects it reaches
+
+        self.order = []  # paths in traversal order
+        self.groups = {}  # group key -> paths
+        self.merged = {}  # group key -> grouped row
+        self.changed_keys = set()
+
+        self.stale = set()  # paths to traverse again
+        self.needs_rebuild = True
+        self.cells = None  # SheetWriter of the sheet content, None if unknown
+
+    @classmethod
+    def from_sheet(cls, sheet):
+        """Live BOM saved in the properties of a spreadsheet"""
+        roots = [o for o in (sheet.Document.getObject(n) for n in sheet.LiveBOMRoots) if o is not None]
+        return cls(
+            roots,
+            sheet,
+            full_parent_path=sheet.LiveBOMFullParentPath,
+            group=sheet.LiveBOMGroup,
+            include_links=sheet.LiveBOMIncludeLinks,
+        )
+
+    @property
+    def roots(self):
+        return [o for o in (self.doc.getObject(n) for n in self.root_names) if o is not None]
+
+    @property
+    def sheet(self):
+        return self.doc.getObject(self.sheet_name)
+
+    def start(self, up_to_date=True):
+        """
+        Starts observing the document and saves the live BOM in the sheet.
+
+        If the sheet is up to date (it was just written from the same roots), the assembly is indexed now,
+        otherwise it's indexed and the whole sheet rewritten on the next recompute.
+        """
+        previous = LIVE_BOMS.get((self.doc.Name, self.sheet_name))
+        if previous is not None:
+            previous.stop()
+
+        if up_to_date:
+            self.rebuild()
+            self.cells = bom_cells(self.bom_data(), self.links_data())
+
+        LIVE_BOMS[(self.doc.Name, self.sheet_name)] = self
+        App.addDocumentObserver(self)
+        self.save()
+
+    def stop(self):
+        App.removeDocumentObserver(self)
+        LIVE_BOMS.pop((self.doc.Name, self.sheet_name), None)
+
+    def save(self):
+        sheet = self.sheet
+        values = {
+            "LiveBOM": True,
+            "LiveBOMRoots": self.root_names,
+            "LiveBOMFullParentPath": self.full_parent_path,
+            "LiveBOMGroup": self.group,
+            "LiveBOMIncludeLinks": self.include_links,
+        }
+        for name, (type_id, doc) in SHEET_PROPERTIES.items():
+            if not hasattr(sheet, name):
+                sheet.addProperty(type_id, name, "LiveBOM", doc)
+                if name != "LiveBOM":
+                    sheet.setEditorMode(name, 2)  # hidden
+            if getattr(sheet, name) != values[name]:
+                setattr(sheet, name, values[name])
+
+    # Indexing
+
+    def rebuild(self):
+        for index in (self.parents, self.children, self.paths, self.profiles, self.links):
+            index.clear()
+        self.linked.clear()
+        self.link_targets.clear()
+        self.groups.clear()
+        self.merged.clear()
+
+        cache = TraversalCache()
+        for obj in self.roots:
+            self.index(obj, (obj.Name,), "", None, cache)
+
+        self.changed_keys = set(self.groups)
+        self.update_order()
+        self.stale.clear()
+        self.needs_rebuild = False
+
+    def index(self, obj, path, parent, container, cache):
+        """Indexes an object and the objects below it, same walk as traverse_assembly"""
+        self.parents[path] = parent
+        self.paths.setdefault(obj.Name, set()).add(path)
+
+        if container is not None and is_part(container):
+            # Part children are only listed when visible
+            if not (obj.getParentGroup() in (container, None) and obj.Visibility):
+                return
+
+        if is_fusion(obj):
+            members = obj.Shapes
+        elif is_group(obj) or is_part(obj):
+            members = obj.Group
+        else:
+            profiles_data = []
+            links_data = []
+            traverse_assembly(
+                profiles_data, links_data, obj, parent=parent, full_parent_path=self.full_parent_path, cache=cache
+            )
+            self.add_rows(path, profiles_data, links_data)
+            if is_link(obj):
+                self.add_link_targets(path, obj)
+            return
+
+        child_parent = (f"{parent} / " if self.full_parent_path else "") + obj.Label
+        self.children[path] = [path + (child.Name,) for child in members]
+        for child in members:
+            self.index(child, path + (child.Name,), child_parent, obj, cache)
+
+    def forget(self, path):
+        """Drops the rows and the index of a node and of the nodes below it"""
+        for child in self.children.pop(path, ()):
+            self.forget(child)
+
+        self.parents.pop(path, None)
+        paths = self.paths.get(path[-1])
+        if paths is not None:
+            paths.discard(path)
+            if len(paths) == 0:
+                del self.paths[path[-1]]
+
+        for row in self.profiles.pop(path, ()):
+            key = profile_group_key(row)
+            self.changed_keys.add(key)
+            members = self.groups.get(key)
+            if members is not None:
+                members.discard(path)
+                if len(members) == 0:
+                    del self.groups[key]
+        self.links.pop(path, None)
+
+        for name in self.link_targets.pop(path, ()):
+            links = self.linked.get(name)
+            if links is not None:
+                links.discard(path)
+                if len(links) == 0:
+                    del self.linked[name]
+
+    def add_rows(self, path, profiles_data, links_data):
+        if len(profiles_data) > 0:
+            self.profiles[path] = profiles_data
+            for row in profiles_data:
+                key = profile_group_key(row)
+                self.changed_keys.add(key)
+                self.groups.setdefault(key, set()).add(path)
+        if len(links_data) > 0:
+            self.links[path] = links_data
+
+    def add_link_targets(self, path, link):
+        target = link.LinkedObject
+        if target is None or target.Document != self.doc:
+            return
+
+        names = {target.Name} | {o.Name for o in target.OutListRecursive if o.Document == self.doc}
+        self.link_targets[path] = names
+        for name in names:
+            self.linked.setdefault(name, set()).add(path)
+
+    def refresh(self):
+        """Traverses the stale nodes again, skipping those below another stale node"""
+        cache = TraversalCache()
+        for path in sorted(self.stale, key=len):
+            if path not in self.parents or any(path[:n] in self.stale for n in range(1, len(path))):
+                continue
+
+            parent = self.parents[path]
+            self.forget(path)
+            obj = self.doc.getObject(path[-1])
+            if obj is not None:
+                container = self.doc.getObject(path[-2]) if len(path) > 1 else None
+                self.index(obj, path, parent, container, cache)
+
+        self.stale.clear()
+        self.update_order()
+
+    def update_order(self):
+        self.order = []
+        stack = [(n,) for n in reversed(self.root_names) if (n,) in self.parents]
+        while stack:
+            path = stack.pop()
+            self.order.append(path)
+            stack.extend(reversed(self.children.get(path, ())))
+
+    # Output
+
+    def bom_data(self):
+        if not self.group:
+            self.changed_keys.clear()
+            return [r for path in self.order for r in self.profiles.get(path, ())]
+
+        if len(self.changed_keys) > 0:
+            position = {path: i for i, path in enumerate(self.order)}
+            for key in self.changed_keys:
+                members = self.groups.get(key)
+                if members is None:
+                    self.merged.pop(key, None)
+                    continue
+                rows = [
+                    r
+                    for path in sorted(members, key=position.__getitem__)
+                    for r in self.profiles[path]
+                    if profile_group_key(r) == key
+                ]
+                self.merged[key] = merge_profile_group(rows)
+            self.changed_keys.clear()
+
+        return [self.merged[k] for k in sorted(self.merged)]
+
+    def links_data(self):
+        if not self.include_links:
+            return []
+        rows = [r for path in self.order for r in self.links.get(path, ())]
+        if self.group:
+            return group_links(rows)
+        return rows
+
+    def update(self):
+        sheet = self.sheet
+        if sheet is None or len(self.roots) == 0:
+            self.stop()
+            return
+
+        if self.needs_rebuild:
+            self.rebuild()
+        elif len(self.stale) > 0:
+            self.refresh()
+        else:
+            return
+
+        cells = bom_cells(self.bom_data(), self.links_data())
+        if self.cells is None:
+            cells.write_to(sheet)
+        else:
+            cells.update(sheet, self.cells)
+        self.cells = cells
+
+        App.Console.PrintLog(f"Frameforge : {self.sheet_name} updated\n")
+
+    # Document observer
+
+    def mark(self, obj):
+        self.stale.update(self.paths.get(obj.Name, ()))
+
+    def slotRecomputedObject(self, obj):
+        if obj.Document != self.doc:
+            return
+
+        if obj.Name in self.linked:
+            self.stale.update(self.linked[obj.Name])
+        if any(path in self.profiles or path in self.links for path in self.paths.get(obj.Name, ())):
+            self.mark(obj)
+
+    def slotChangedObject(self, obj, prop):
+        if obj.Document != self.doc:
+            return
+
+        if prop in ("Group", "Shapes", "Label") and obj.Name in self.linked:
+            self.stale.update(self.linked[obj.Name])
+        if obj.Name not in self.paths:
+            return
+
+        if prop in ("Group", "Shapes", "Label"):
+            # a container label is part of the parent of the rows below it
+            self.mark(obj)
+        elif prop == "Visibility":
+            self.stale.update(p for p in self.paths[obj.Name] if len(p) > 1 and is_part(self.doc.getObject(p[-2])))
+
+    def slotDeletedObject(self, obj):
+        if obj.Document != self.doc:
+            return
+
+        if obj.Name == self.sheet_name:
+            self.stop()
+        elif obj.Name in self.root_names:
+            self.root_names.remove(obj.Name)
+            self.needs_rebuild = True
+        elif obj.Name in self.paths:
+            self.stale.update(p[:-1] for p in self.paths[obj.Name])
+
+    def slotRecomputedDocument(self, doc):
+        if doc != self.doc:
+            return
+
+        try:
+            self.update()
+        except Exception as e:
+            App.Console.PrintError(f"Frameforge : can't update {self.sheet_name} ({e})\n")
+
+    def slotDeletedDocument(self, doc):
+        if doc == self.doc:
+            self.stop()
+
+
+def restore(sheets):
+    """Restarts the live BOMs saved in these spreadsheets, they are rewritten on the next recompute"""
+    for sheet in sheets:
+        LiveBOM.from_sheet(sheet).start(up_to_date=False)
+
+
+def live_bom_changed(sheet):
+    """Starts or stops the live BOM of a spreadsheet when its LiveBOM property is toggled"""
+    live = LIVE_BOMS.get((sheet.Document.Name, sheet.Name))
+    if sheet.LiveBOM and live is None and hasattr(sheet, "LiveBOMRoots"):
+        LiveBOM.from_sheet(sheet).start(up_to_date=False)
+    elif not sheet.LiveBOM and live is not None:
+        live.stop()
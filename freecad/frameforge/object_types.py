@@ -0,0 +1,109 @@
+"""
+Registry of the FrameForge type of document objects, for the checks that run all the time (commands
+IsActive, selection filters).
+
+An object is classified from its TypeId and property names only, never from its shape, the first time it's
+looked up. A document observer drops the entry when the object is deleted or when a property that decides
+its type is set, so lookups stay O(1) while objects are edited.
+"""
+
+import FreeCAD as App
+
+PROFILE = "Profile"
+TRIMMED_PROFILE = "TrimmedProfile"
+EXTRUDED_CUTOUT = "ExtrudedCutout"
+PARAMETRIC_LINE = "ParametricLine"
+FUSION = "Fusion"
+PART = "Part"
+GROUP = "Group"
+LINK = "Link"
+
+# a change of these properties can change the type of an object
+TYPE_PROPERTIES = ("Proxy", "Family", "ProfileLength", "TrimmedBody", "baseObject", "Vertex1")
+
+CONTAINER_TYPE_IDS = {
+    "Part::MultiFuse": FUSION,
+    "App::Part": PART,
+    "App::DocumentObjectGroup": GROUP,
+    "App::Link": LINK,
+}
+
+
+def classify(obj):
+    """Returns the FrameForge type of an object, or None. Same tests as create_bom.is_*, without geometry"""
+    type_id = obj.TypeId
+    if type_id in CONTAINER_TYPE_IDS:
+        return CONTAINER_TYPE_IDS[type_id]
+
+    if type_id == "Part::FeaturePython":
+        if hasattr(obj, "TrimmedBody"):
+            return TRIMMED_PROFILE
+        if hasattr(obj, "baseObject"):
+            return EXTRUDED_CUTOUT
+        if hasattr(obj, "Family") or hasattr(obj, "ProfileLength"):
+            return PROFILE
+        if hasattr(obj, "Vertex1"):
+            return PARAMETRIC_LINE
+    return None
+
+
+class ObjectTypeRegistry:
+    def __init__(self):
+        # (document name, object name) -> type
+        self._types = {}
+        # changes whenever a classification may have changed, for the callers that cache results
+        self.generation = 0
+        # callables(document name, object name or None for the whole document), to drop per object data
+        self.deletion_listeners = []
+
+    def type_of(self, obj):
+        key = (obj.Document.Name, obj.Name)
+        try:
+            return self._types[key]
+        except KeyError:
+            obj_type = self._types[key] = classify(obj)
+            return obj_type
+
+    def is_a(self, obj, *types):
+        return self.type_of(obj) in types
+
+    def forget(self, obj):
+        if self._types.pop((obj.Document.Name, obj.Name), None) is not None:
+            self.generation += 1
+
+    def clear(self):
+        self._types.clear()
+        self.generation += 1
+
+    def start(self):
+        App.addDocumentObserver(self)
+
+    def stop(self):
+        App.removeDocumentObserver(self)
+        self.clear()
+
+    # Document observer
+
+    def slotCreatedObject(self, obj):
+        # names are reused after a deletion is undone
+        self.forget(obj)
+
+    def slotChangedObject(self, obj, prop):
+        if prop in TYPE_PROPERTIES:
+            self.forget(obj)
+
+    def slotDeletedObject(self, obj):
+        self.forget(obj)
+        for listener in self.deletion_listeners:
+            listener(obj.Document.Name, obj.Name)
+
+    def slotDeletedDocument(self, doc):
+        name = doc.Name
+        for key in [k for k in self._types if k[0] == name]:
+            del self._types[key]
+        self.generation += 1
+        for listener in self.deletion_listeners:
+            listener(name, None)
+
+
+REGISTRY = ObjectTypeRegistry()
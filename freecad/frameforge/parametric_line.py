@@ -78,26 +78,3 @@ class CreateParametricLineCommand:
                         verts.append((selobj.Object, selobj.SubElementNames[i]))
         if len(verts) == 2:
             self.make_parametric_line(verts)
-
-    def IsActive(self):
-        if App.ActiveDocument:
-            verts = []
-            sel = Gui.Selection.getSelectionEx()
-            for selobj in sel:
-                if selobj.HasSubObjects:
-                    for i in range(len(selobj.SubObjects)):
-                        if isinstance(selobj.SubObjects[i], Part.Vertex):
-                            verts.append((selobj.Object, selobj.SubElementNames[i]))
-            return len(verts) == 2
-        else:
-            return False
-
-    def GetResources(self):
-        return {
-            "Pixmap": TOOL_ICON,
-            "MenuText": "Create a Parametric Line",
-            "ToolTip": "Create a Parametric Line from two Vertex<br><br>Select two vertex then run this command",
-        }
-
-
-Gui.addCommand("FrameForge_ParametricLine", CreateParametricLineCommand())
@@ -15,6 +15,8 @@ from freecad.frameforge.extrusions import (
     vslot20x60,
     vslot20x80,
 )
+from freecad.frameforge.recompute_profiler import PROFILER, profiled
+from freecad.frameforge.shape_metrics import record_booleans
 
 # Global variable for a 3D float vector (used in Profile class)
 vec = App.Base.Vector
@@ -323,8 +325,10 @@ class Profile:
         ):
             self.execute(obj)
 
+    @profiled("Profile")
     def execute(self, obj):
         self.run_compatibility_migrations(obj)
+        booleans = 0
 
         try:
             L = obj.Target[0].getSubObject(obj.Target[1][0]).Length
@@ -548,6 +552,7 @@ class Profile:
                 p1 = Part.Face(wire1)
                 p2 = Part.Face(wire2)
                 p = p1.cut(p2)
+                booleans += 1
             else:
                 p = Part.Face(wire1)
 
@@ -950,6 +955,7 @@ class Profile:
             p1 = Part.Face(wire1)
             p2 = Part.Face(wire2)
             p = p1.cut(p2)
+            booleans += 1
 
         if obj.Family == "Custom Profile":
             custom_prof = obj.CustomProfile
@@ -992,15 +998,19 @@ class Profile:
             if H == 20.0 and W == 20.0:
                 p = tslot20x20_one_slot()
 
+        PROFILER.mark("section")
+
         if L:
             ProfileFull = p.extrude(vec(0, 0, L))
             obj.Shape = ProfileFull
+            PROFILER.mark("extrude")
 
             if B1Y or B2Y or B1X or B2X or B1Z or B2Z:  # make the bevels:
 
                 hc = 10 * max(H, W)
 
                 ProfileExt = ProfileFull.fuse(p.extrude(vec(0, 0, L + hc / 4)))
+                PROFILER.mark("bevel fuse")
                 box = Part.makeBox(hc, hc, hc)
                 box.translate(vec(-hc / 2 + w, -hc / 2 + h, L))
                 pr = vec(0, 0, L)
@@ -1010,8 +1020,10 @@ class Profile:
                 else:
                     box.rotate(pr, vec(1, 0, 0), B2X)
                 ProfileCut = ProfileExt.cut(box)
+                PROFILER.mark("bevel cut")
 
                 ProfileExt = ProfileCut.fuse(p.extrude(vec(0, 0, -hc / 4)))
+                PROFILER.mark("bevel fuse")
                 box = Part.makeBox(hc, hc, hc)
                 box.translate(vec(-hc / 2 + w, -hc / 2 + h, -hc))
                 pr = vec(0, 0, 0)
@@ -1021,8 +1033,11 @@ class Profile:
                 else:
                     box.rotate(pr, vec(1, 0, 0), B1X)
                 ProfileCut = ProfileExt.cut(box)
+                PROFILER.mark("bevel cut")
 
                 obj.Shape = ProfileCut.removeSplitter()
+                PROFILER.mark("removeSplitter")
+                booleans += 4
 
                 # if wire2: obj.Shape = Part.Compound([wire1,wire2])  # OCC Sweep doesn't be able hollow shape yet :-(
 
@@ -1031,6 +1046,7 @@ class Profile:
 
         obj.Placement = pl
         obj.positionBySupport()
+        record_booleans(obj, booleans)
         obj.recompute()
 
 
@@ -0,0 +1,90 @@
+"""
+Profile catalog: the materials, families and sizes of resources/profiles, shared by the whole process.
+
+Each material file is parsed the first time it's used and kept until its modification time (or size)
+changes, so opening a profile task panel doesn't parse the catalog again. Doesn't depend on FreeCAD, and
+can be used headless.
+"""
+
+import json
+import os
+import threading
+
+PROFILESPATH = os.path.join(os.path.dirname(__file__), "resources", "profiles")
+
+
+class ProfileCatalog:
+    """
+    Read only mapping of material name -> {family: {"norm", "unit", "fillet", "sizes", ...}}.
+
+    The parsed data is shared: callers must not modify it.
+    """
+
+    def __init__(self, path=PROFILESPATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # file name -> (stamp, parsed data)
+        self._files = {}
+
+    @staticmethod
+    def material_name(file_name):
+        return os.path.splitext(file_name)[0].capitalize()
+
+    def files(self):
+        """Returns {material name: file name}, in file name order"""
+        return {self.material_name(f): f for f in sorted(os.listdir(self.path)) if f.endswith(".json")}
+
+    def stamp(self, file_name):
+        """Changes whenever the file is written"""
+        st = os.stat(os.path.join(self.path, file_name))
+        return f"{st.st_mtime_ns}:{st.st_size}"
+
+    def load(self, file_name):
+        """Returns the parsed content of a catalog file, parsing it again only if it changed on disk"""
+        path = os.path.join(self.path, file_name)
+        stamp = self.stamp(file_name)
+
+        with self._lock:
+            cached = self._files.get(file_name)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+            with open(path, encoding="utf-8") as fd:
+                data = json.load(fd)
+            self._files[file_name] = (stamp, data)
+            return data
+
+    def invalidate(self):
+        with self._lock:
+            self._files.clear()
+
+    def materials(self):
+        return list(self.files())
+
+    def __getitem__(self, material):
+        files = self.files()
+        if material not in files:
+            raise KeyError(material)
+        return self.load(files[material])
+
+    def get(self, material, default=None):
+        try:
+            return self[material]
+        except KeyError:
+            return default
+
+    def __contains__(self, material):
+        return material in self.files()
+
+    def __iter__(self):
+        return iter(self.materials())
+
+    def __len__(self):
+        return len(self.files())
+
+    def sizes(self, material, family):
+        """Returns {size name: size data} of a family"""
+        return self[material][family]["sizes"]
+
+
+CATALOG = ProfileCatalog()
@@ -0,0 +1,156 @@
+"""Computations on Profile properties, usable on FreeCAD objects as well as on objects read from FCStd files"""
+
+import math
+
+# families whose section spans [w, w + W] x [h, h + H] in the profile local frame
+RECTANGULAR_EXTENTS_FAMILIES = (
+    "Equal Leg Angles",
+    "Unequal Leg Angles",
+    "Flat Sections",
+    "Square",
+    "Square Hollow",
+    "Rectangular Hollow",
+    "UPE",
+    "UPN",
+    "IPE",
+    "IPN",
+    "HEA",
+    "HEB",
+    "HEM",
+)
+# circular families are drawn around (H / 2 + h, H / 2 + h)
+CIRCULAR_EXTENTS_FAMILIES = ("Round Bar", "Pipe")
+
+
+def get_section_extents(obj):
+    """Returns ((xmin, xmax), (ymin, ymax)) of the profile section in its local frame, or None if unknown"""
+    W = obj.ProfileWidth
+    H = obj.ProfileHeight
+    w = -W / 2 if obj.CenteredOnWidth else 0.0
+    h = -H / 2 if obj.CenteredOnHeight else 0.0
+
+    if obj.Family in RECTANGULAR_EXTENTS_FAMILIES:
+        return ((w, w + W), (h, h + H))
+    elif obj.Family in CIRCULAR_EXTENTS_FAMILIES:
+        return ((h, h + H), (h, h + H))
+
+    return None
+
+
+def get_bevel_slopes(obj):
+    """
+    Returns the slopes (dz/dx, dz/dy) of the start and end cutting planes, as built by Profile.execute,
+    or None when a plane is rotated on both axes (the section bounding box is not exact anymore).
+    """
+    if hasattr(obj, "BevelStartCut1"):
+        b1y, b1x = obj.BevelStartCut1, -obj.BevelStartCut2
+        b2y, b2x = -obj.BevelEndCut1, obj.BevelEndCut2
+        combined = False
+    elif hasattr(obj, "BevelStartCut"):
+        b1y, b1x = obj.BevelStartCut, -obj.BevelStartRotate
+        b2y, b2x = -obj.BevelEndCut, -obj.BevelEndRotate
+        combined = True
+    else:
+        return None
+
+    def slopes(by, bx):
+        if by and bx:
+            return None
+        elif by:
+            return (-math.tan(math.radians(by)), 0.0)
+        elif bx and not combined:
+            return (0.0, math.tan(math.radians(bx)))
+        # the combined rotation spins the plane around the profile axis alone
+        return (0.0, 0.0)
+
+    start = slopes(b1y, b1x)
+    end = slopes(b2y, b2x)
+    if start is None or end is None:
+        return None
+
+    return (start, end)
+
+
+def bevelled_length(obj, L):
+    """
+    Returns the cut length of a Profile of length L along its axis, taking the bevels into account.
+
+    Returns None when the section or the bevels can't be described analytically.
+    """
+    bevels = get_bevel_slopes(obj)
+    if bevels is None:
+        return None
+
+    (sx, sy), (ex, ey) = bevels
+    if sx == sy == ex == ey == 0.0:
+        return L
+
+    extents = get_section_extents(obj)
+    if extents is None:
+        return None
+
+    (x0, x1), (y0, y1) = extents
+    corners = [(x, y) for x in (x0, x1) for y in (y0, y1)]
+
+    z_end = max(L + ex * x + ey * y for x, y in corners)
+    z_start = min(sx * x + sy * y for x, y in corners)
+
+    return z_end - z_start
+
+
+def get_profile_cutting_angles(obj, *trim_cuts):
+    """
+    Readable cutting angles of a Profile, with separate (BevelStartCut1 ...) or combined (BevelStartCut,
+    BevelStartRotate ...) bevels. The combined rotation spins the cut around the profile axis, it doesn't
+    change the cut angle. trim_cuts are the angles of the trims of a TrimmedProfile built on it.
+    """
+    if hasattr(obj, "BevelStartCut1"):
+        bevels = (obj.BevelStartCut1, obj.BevelStartCut2, obj.BevelEndCut1, obj.BevelEndCut2)
+    elif hasattr(obj, "BevelStartCut"):
+        bevels = (obj.BevelStartCut, 0.0, obj.BevelEndCut, 0.0)
+    elif len(trim_cuts) == 0:
+        return ("N/A", "N/A")
+    else:
+        bevels = (0.0, 0.0, 0.0, 0.0)
+
+    return get_readable_cutting_angles(*bevels, *trim_cuts)
+
+
+def get_readable_cutting_angles(bsc1, bsc2, bec1, bec2, *trim_cuts):
+    all_bevels = [bsc1, bsc2, bec1, bec2]
+    start_bevels = [bsc1, bsc2]
+    end_bevels = [bec1, bec2]
+
+    if len(trim_cuts) == 0:
+        # a real profile
+        if all([b == 0 for b in all_bevels]):
+            return ("0.0", "0.0")
+
+        elif bsc1 == bec1 == 0.0:
+            angles = (bsc2, bec2)
+            angles = angles if (angles[0] * angles[1] <= 0) else (abs(angles[0]), abs(angles[1]))
+            return (f"{angles[0]:.1f}", f"{angles[1]:.1f}")
+
+        elif bsc2 == bec2 == 0.0:
+            angles = (bsc1, bec1)
+            angles = angles if (angles[0] * angles[1] <= 0) else (abs(angles[0]), abs(angles[1]))
+            return (f"{angles[0]:.1f}", f"{angles[1]:.1f}")
+
+        elif (bsc1 == 0.0 and bec2 == 0.0) ^ (bsc2 == 0.0 and bec1 == 0.0):
+            return (f"{(bsc1 + bsc2):.1f}", f"* {(bec1+bec2):.1f}")
+
+        else:
+            return (f"{bsc1:.1f} / {bsc2:.1f}", f"{bec1:.1f} / {bec2:.1f}")
+
+    elif len(trim_cuts) == 2:
+        return (f"@ {trim_cuts[0]:.1f}", f"@ {trim_cuts[1]:.1f}")
+
+    elif len(trim_cuts) == 1:
+        bevels_not_zero = [b for b in all_bevels if b != 0]
+        if len(bevels_not_zero) == 0:
+            return ("0.0", f"@ {trim_cuts[0]:.1f}")
+
+        elif len(bevels_not_zero) == 1:
+            return (f"{abs(bevels_not_zero[0]):.1f}", f"@ {trim_cuts[0]:.1f}")
+
+    return ("?", "?")
@@ -0,0 +1,203 @@
+"""
+Indexed profile catalog: every size of every material, in a SQLite table with the dimensions as columns.
+
+    index = ProfileIndex()
+    index.query(family="Rectangular Hollow", height=(80, 120), thickness=(4, None), weight=(None, 12))
+    index.search("rectangular hollow h=80..120 t>=4 kg<12")
+
+The index is built from the catalog (profile_catalog.CATALOG), in memory or in a file, and built again
+only when a catalog file changed. Doesn't depend on FreeCAD.
+"""
+
+import re
+import sqlite3
+import threading
+
+from freecad.frameforge.profile_catalog import CATALOG
+
+# catalog key -> column
+DIMENSIONS = {
+    "Height": "height",
+    "Width": "width",
+    "Thickness": "thickness",
+    "Flange Thickness": "flange_thickness",
+    "Radius1": "radius1",
+    "Radius2": "radius2",
+    "Weight": "weight",
+}
+
+# search box names -> column
+SEARCH_NAMES = {
+    "h": "height",
+    "height": "height",
+    "w": "width",
+    "width": "width",
+    "t": "thickness",
+    "thickness": "thickness",
+    "tf": "flange_thickness",
+    "r1": "radius1",
+    "r2": "radius2",
+    "kg": "weight",
+    "weight": "weight",
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS catalog_files (
+    file_name TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sizes (
+    id INTEGER PRIMARY KEY,
+    material TEXT NOT NULL,
+    family TEXT NOT NULL,
+    size_name TEXT NOT NULL,
+    norm TEXT NOT NULL DEFAULT '',
+    unit TEXT NOT NULL DEFAULT '',
+    {", ".join(f"{c} REAL" for c in DIMENSIONS.values())}
+);
+CREATE INDEX IF NOT EXISTS sizes_family ON sizes (family, material);
+{"".join(f"CREATE INDEX IF NOT EXISTS sizes_{c} ON sizes ({c});" for c in DIMENSIONS.values())}
+"""
+
+NUMBER = r"[0-9]+(?:\.[0-9]+)?"
+SEARCH_CONDITION = re.compile(rf"^([a-z0-9]+)(<=|>=|<|>|=)({NUMBER})(?:\.\.({NUMBER}))?$")
+
+
+class ProfileResult:
+    __slots__ = ("material", "family", "size_name", "dimensions")
+
+    def __init__(self, material, family, size_name, dimensions):
+        self.material = material
+        self.family = family
+        self.size_name = size_name
+        # {catalog key: float}, only the dimensions the size has
+        self.dimensions = dimensions
+
+    def __str__(self):
+        return f"{self.material} / {self.family} / {self.size_name}"
+
+    def __repr__(self):
+        return f"ProfileResult<{self}>"
+
+
+class ProfileIndex:
+    def __init__(self, path=":memory:", catalog=CATALOG):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def stamps(self):
+        """Returns {file name: stamp} of the catalog files as they are on disk"""
+        return {f: self.catalog.stamp(f) for f in self.catalog.files().values()}
+
+    def refresh(self):
+        """Builds the index again when the catalog files changed since it was built"""
+        stamps = self.stamps()
+        indexed = dict(self.connection.execute("SELECT file_name, stamp FROM catalog_files"))
+        if indexed == stamps:
+            return False
+
+        rows = []
+        for material, file_name in self.catalog.files().items():
+            for family, data in self.catalog.load(file_name).items():
+                for size_name, size in data["sizes"].items():
+                    values = [size.get(k) for k in DIMENSIONS]
+                    rows.append((material, family, size_name, data.get("norm", ""), data.get("unit", ""), *values))
+
+        columns = ", ".join(["material", "family", "size_name", "norm", "unit", *DIMENSIONS.values()])
+        with self.connection:
+            self.connection.execute("DELETE FROM sizes")
+            self.connection.execute("DELETE FROM catalog_files")
+            self.connection.executemany(
+                f"INSERT INTO sizes ({columns}) VALUES ({', '.join(['?'] * (5 + len(DIMENSIONS)))})", rows
+            )
+            self.connection.executemany("INSERT INTO catalog_files VALUES (?, ?)", stamps.items())
+        return True
+
+    def query(self, material=None, family=None, text=(), limit=None, **ranges):
+        """
+        Returns the ProfileResults matching every given criterion, in catalog order.
+
+        text: words that must all appear in the material, family or size name. ranges: column=(min, max),
+        either bound can be None, for the columns of DIMENSIONS.
+        """
+        where = []
+        args = []
+        if material is not None:
+            where.append("material = ?")
+            args.append(material)
+        if family is not None:
+            where.append("family = ?")
+            args.append(family)
+        for word in text:
+            where.append("(material || ' ' || family || ' ' || size_name) LIKE ?")
+            args.append(f"%{word}%")
+        for column, (low, high) in ranges.items():
+            if column not in DIMENSIONS.values():
+                raise ValueError(f"Unknown dimension {column}")
+            if low is not None:
+                where.append(f"{column} >= ?")
+                args.append(low)
+            if high is not None:
+                where.append(f"{column} <= ?")
+                args.append(high)
+
+        sql = f"SELECT material, family, size_name, {', '.join(DIMENSIONS.values())} FROM sizes"
+        if len(where) > 0:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            self.refresh()
+            rows = self.connection.execute(sql, args).fetchall()
+
+        keys = list(DIMENSIONS)
+        return [ProfileResult(r[0], r[1], r[2], {k: v for k, v in zip(keys, r[3:]) if v is not None}) for r in rows]
+
+    def search(self, text, limit=None):
+        """Query from a search box: words, and conditions like "h=80..120", "t>=4", "kg<12" (bounds included)"""
+        return self.query(limit=limit, **parse_search(text))
+
+
+def parse_search(text):
+    """Returns the query arguments of a search text, see ProfileIndex.search"""
+    words = []
+    ranges = {}
+    for token in text.lower().split():
+        match = SEARCH_CONDITION.match(token)
+        if match is None or match.group(1) not in SEARCH_NAMES:
+            words.append(token)
+            continue
+
+        name, op, value, high = match.groups()
+        column = SEARCH_NAMES[name]
+        low_bound, high_bound = ranges.get(column, (None, None))
+        value = float(value)
+        if high is not None and op == "=":
+            low_bound, high_bound = value, float(high)
+        elif op == "=":
+            low_bound = high_bound = value
+        elif op in (">", ">="):
+            low_bound = value
+        else:
+            high_bound = value
+        ranges[column] = (low_bound, high_bound)
+
+    return dict(text=words, **ranges)
+
+
+_index = None
+
+
+def get_index():
+    """The process wide in memory index of CATALOG, built on first use"""
+    global _index
+    if _index is None:
+        _index = ProfileIndex()
+    return _index
@@ -0,0 +1,170 @@
+"""
+Optional wall time profiling of the FrameForge features recompute (Profile, TrimmedProfile, ExtrudedCutout).
+
+The execute methods are decorated with profiled() and call PROFILER.mark(phase) at the end of each phase
+(section, extrude, slice, fuse, cut, removeSplitter, ...). While the profiler is disabled, profiled() only
+reads the preference and mark() checks that no execute is recorded. Enabled, the last MAX_EXECUTES executes
+of each object are recorded as (phase, seconds), and the report can be written as JSON or as folded stacks
+("document;object;phase microseconds", the flamegraph.pl / speedscope input format).
+
+Enabled by the "Profile Recompute" preference or the FRAMEFORGE_PROFILE_RECOMPUTE environment variable.
+"""
+
+import functools
+import json
+import os
+import time
+from collections import deque
+
+import FreeCAD as App
+
+# executes kept per object, an object recomputed all session long doesn't grow the records
+MAX_EXECUTES = 20
+
+
+def is_enabled():
+    if os.environ.get("FRAMEFORGE_PROFILE_RECOMPUTE", "") not in ("", "0"):
+        return True
+    return App.ParamGet("User parameter:BaseApp/Preferences/Frameforge").GetBool("Profile Recompute", False)
+
+
+class ExecuteRecord:
+    __slots__ = ("document", "name", "label", "kind", "phases", "total", "_last")
+
+    def __init__(self, obj, kind):
+        self.document = obj.Document.Name
+        self.name = obj.Name
+        self.label = obj.Label
+        self.kind = kind
+        # phase -> seconds, in the order the phases were first reached
+        self.phases = {}
+        self.total = 0.0
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def to_dict(self):
+        return {
+            "document": self.document,
+            "name": self.name,
+            "label": self.label,
+            "kind": self.kind,
+            "total": self.total,
+            "phases": self.phases,
+        }
+
+
+class RecomputeProfiler:
+    def __init__(self):
+        # profiles whatever the preference says (the recompute report)
+        self.forced = False
+        # (document, name) -> records of the object's last executes
+        self.records = {}
+        # executes in progress, an execute can trigger the execute of another object
+        self._stack = []
+
+    @property
+    def enabled(self):
+        return self.forced or is_enabled()
+
+    def reset(self, document=None):
+        if document is None:
+            self.records.clear()
+        else:
+            for key in [k for k in self.records if k[0] == document]:
+                del self.records[key]
+
+    def start(self, obj, kind):
+        record = ExecuteRecord(obj, kind)
+        self._stack.append(record)
+        return record
+
+    def stop(self, record):
+        record.mark("other")
+        if record.phases["other"] == 0.0:
+            del record.phases["other"]
+        record.total = sum(record.phases.values())
+        self._stack.remove(record)
+        key = (record.document, record.name)
+        if key not in self.records:
+            self.records[key] = deque(maxlen=MAX_EXECUTES)
+        self.records[key].append(record)
+
+    def mark(self, phase):
+        """Ends a phase of the execute in progress: the time since the previous mark is spent in `phase`"""
+        if len(self._stack) > 0:
+            self._stack[-1].mark(phase)
+
+    # Report
+
+    def objects(self, document=None):
+        """Returns [(total seconds, executes kept, last record)] of each object, slowest first"""
+        rows = [
+            (sum(r.total for r in records), len(records), records[-1])
+            for (doc_name, _), records in self.records.items()
+            if document is None or doc_name == document
+        ]
+        return sorted(rows, key=lambda r: r[0], reverse=True)
+
+    def slowest(self, document=None, n=20):
+        return self.objects(document)[:n]
+
+    def to_dict(self, document=None):
+        return {
+            "objects": [
+                {**last.to_dict(), "executes": count, "total": total} for total, count, last in self.objects(document)
+            ],
+            # phases of every execute, for the objects that were recomputed several times
+            "executes": [
+                r.to_dict()
+                for records in self.records.values()
+                for r in records
+                if document is None or r.document == document
+            ],
+        }
+
+    def write_json(self, path, document=None):
+        with open(path, "w", encoding="utf-8") as fd:
+            json.dump(self.to_dict(document), fd, indent=2)
+
+    def folded_stacks(self, document=None):
+        """Lines of "document;kind label;phase microseconds", summed over the executes"""
+        stacks = {}
+        for records in self.records.values():
+            for r in records:
+                if document is not None and r.document != document:
+                    continue
+                for phase, seconds in r.phases.items():
+                    key = f"{r.document};{r.kind} {r.label};{phase}".replace(" ", "_")
+                    stacks[key] = stacks.get(key, 0) + int(seconds * 1e6)
+        return [f"{key} {value}" for key, value in stacks.items() if value > 0]
+
+    def write_folded(self, path, document=None):
+        with open(path, "w", encoding="utf-8") as fd:
+            fd.write("\n".join(self.folded_stacks(document)) + "\n")
+
+
+PROFILER = RecomputeProfiler()
+
+
+def profiled(kind):
+    """Decorator of the execute(self, obj) methods of the features proxies"""
+
+    def decorate(execute):
+        @functools.wraps(execute)
+        def wrapper(self, obj):
+            if not PROFILER.enabled:
+                return execute(self, obj)
+
+            record = PROFILER.start(obj, kind)
+            try:
+                return execute(self, obj)
+            finally:
+                PROFILER.stop(record)
+
+        return wrapper
+
+    return decorate
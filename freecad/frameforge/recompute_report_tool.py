@@ -0,0 +1,51 @@
+import os
+
+import FreeCAD as App
+
+from freecad.frameforge.object_types import EXTRUDED_CUTOUT, PROFILE, REGISTRY, TRIMMED_PROFILE
+from freecad.frameforge.recompute_profiler import PROFILER
+
+REPORT_SIZE = 20
+
+
+def profile_document_recompute(doc):
+    """Recomputes every FrameForge feature of a document with the profiler enabled"""
+    forced = PROFILER.forced
+    PROFILER.forced = True
+    PROFILER.reset(doc.Name)
+
+    try:
+        for obj in doc.Objects:
+            if REGISTRY.is_a(obj, PROFILE, TRIMMED_PROFILE, EXTRUDED_CUTOUT):
+                obj.touch()
+        doc.recompute()
+    finally:
+        PROFILER.forced = forced
+
+
+def format_report(rows):
+    lines = [f"{'seconds':>9} {'runs':>4}  {'object':<40} phases"]
+    for total, count, last in rows:
+        phases = ", ".join(f"{phase} {seconds:.3f}" for phase, seconds in last.phases.items())
+        lines.append(f"{total:9.3f} {count:4d}  {last.kind + ' ' + last.label:<40} {phases}")
+    return "\n".join(lines)
+
+
+class RecomputeReportCommand:
+    def Activated(self):
+        doc = App.ActiveDocument
+
+        profile_document_recompute(doc)
+        rows = PROFILER.objects(doc.Name)
+        total = sum(r[0] for r in rows)
+
+        App.Console.PrintMessage(
+            f"Frameforge : {len(rows)} features recomputed in {total:.3f} s, slowest first\n"
+            f"{format_report(rows[:REPORT_SIZE])}\n"
+        )
+
+        if doc.FileName != "":
+            stem = os.path.splitext(doc.FileName)[0]
+            PROFILER.write_json(f"{stem}_Recompute.json", doc.Name)
+            PROFILER.write_folded(f"{stem}_Recompute.folded", doc.Name)
+            App.Console.PrintMessage(f"Frameforge : recompute report written to {stem}_Recompute.json / .folded\n")
@@ -0,0 +1,271 @@
+"""
+Saw sequencing: orders the pieces within each stock, and the stocks, so the saw is set up as few times as
+possible.
+
+Each piece is cut at both ends. A cut needs the miter head at some angle, with the stock rolled 90° or not
+(angles marked "*"). Changing the angle or rolling the stock takes time, so pieces are cut in the order,
+and the way round, that keeps the setup from one cut to the next. Within a stock this is a small
+travelling salesman problem over the pieces, solved by nearest neighbour then 2-opt. Stocks cut the same
+way are cut back and forth, and the stock patterns are then ordered like the pieces.
+"""
+
+from collections import defaultdict
+
+from freecad.frameforge.best_fit import CutItem, CutListPacking, StockPattern
+
+# setup of a cut whose angle can't be read, it always needs the saw to be set by hand
+UNKNOWN = ("?",)
+
+# 2-opt is quadratic per pass, longer sequences keep the nearest neighbour order
+TWO_OPT_LIMIT = 300
+TWO_OPT_PASSES = 20
+
+
+class SawTimes:
+    """Seconds to change the angle of the saw, and to roll or turn the stock over"""
+
+    def __init__(self, angle_change=60.0, flip=20.0):
+        self.angle_change = angle_change
+        self.flip = flip
+
+    def cost(self, a, b):
+        changes, flips = setup_changes(a, b)
+        return changes * self.angle_change + flips * self.flip
+
+
+class SawEstimate:
+    """Number of angle changes and stock flips of a cut sequence, and the time they take"""
+
+    def __init__(self, angle_changes, flips, times):
+        self.angle_changes = angle_changes
+        self.flips = flips
+        self.seconds = angle_changes * times.angle_change + flips * times.flip
+
+    def __str__(self):
+        return f"{self.angle_changes} angle changes, {self.flips} flips, {self.seconds / 60.0:.1f} min"
+
+
+def cut_setup(text):
+    """Returns the (angles, rolled) setup of a readable cutting angle, UNKNOWN if it can't be read"""
+    text = str(text).strip()
+    rolled = text.startswith("*")
+    try:
+        angles = tuple(abs(float(a)) for a in text.lstrip("*@ ").split("/"))
+    except ValueError:
+        return UNKNOWN
+    return angles, rolled
+
+
+def cut_sign(text):
+    try:
+        value = float(str(text).lstrip("*@ ").split("/")[0])
+    except ValueError:
+        return 0
+    return (value > 0) - (value < 0)
+
+
+def setup_changes(a, b):
+    """Returns the (angle changes, flips) needed to go from setup a to setup b, None matches anything"""
+    if a is None or b is None:
+        return 0, 0
+    if a is UNKNOWN or b is UNKNOWN:
+        return 1, 0
+    return int(a[0] != b[0]), int(a[1] != b[1])
+
+
+def piece_setups(row):
+    """Returns the setups of the first and of the last cut of a BOM row, and whether it's turned over between"""
+    turned = cut_sign(row["cut_angle_1"]) * cut_sign(row["cut_angle_2"]) < 0
+    return cut_setup(row["cut_angle_1"]), cut_setup(row["cut_angle_2"]), turned
+
+
+def order_nodes(nodes, start, times):
+    """
+    Nearest neighbour order of nodes, each going from its first to its last setup or the other way round.
+
+    nodes: [(first, last)], start: setup of the saw before. Returns [(index, reversed)].
+    """
+    # nodes by the setup they can start from, the lowest index on top
+    by_setup = defaultdict(list)
+    for i in reversed(range(len(nodes))):
+        first, last = nodes[i]
+        by_setup[last].append((i, True))
+        by_setup[first].append((i, False))
+
+    done = [False] * len(nodes)
+    lowest = 0
+    order = []
+    current = start
+    for _ in range(len(nodes)):
+        pick = None
+        if current is not None and current is not UNKNOWN:
+            bucket = by_setup.get(current, [])
+            while len(bucket) > 0 and done[bucket[-1][0]]:
+                bucket.pop()
+            if len(bucket) > 0:
+                pick = bucket[-1]
+
+        if pick is None:
+            while done[lowest]:
+                lowest += 1
+            best = None
+            for i in range(lowest, len(nodes)):
+                if done[i]:
+                    continue
+                for reverse in (False, True):
+                    c = times.cost(current, nodes[i][reverse])
+                    if best is None or c < best:
+                        best, pick = c, (i, reverse)
+                if best == 0:
+                    break
+
+        i, reverse = pick
+        done[i] = True
+        order.append(pick)
+        current = nodes[i][not reverse]
+
+    return order
+
+
+def two_opt(nodes, order, start, times):
+    """Reverses runs of the order while it lowers the cost of the setup changes between the nodes"""
+    if len(order) > TWO_OPT_LIMIT:
+        return order
+
+    order = list(order)
+
+    def first(k):
+        i, reverse = order[k]
+        return nodes[i][reverse]
+
+    def last(k):
+        i, reverse = order[k]
+        return nodes[i][not reverse]
+
+    n = len(order)
+    for _ in range(TWO_OPT_PASSES):
+        improved = False
+        for i in range(n):
+            before = start if i == 0 else last(i - 1)
+            for j in range(i, n):
+                old = times.cost(before, first(i))
+                new = times.cost(before, last(j))
+                if j + 1 < n:
+                    old += times.cost(last(j), first(j + 1))
+                    new += times.cost(first(i), first(j + 1))
+                if new < old:
+                    order[i : j + 1] = [(k, not reverse) for k, reverse in reversed(order[i : j + 1])]
+                    improved = True
+        if not improved:
+            break
+
+    return order
+
+
+def estimate_bars(bars, times, start=None):
+    """
+    Returns (SawEstimate, setup of the saw after the last cut) of cutting bars in that order.
+
+    bars: lists of BOM rows, in cutting order, each cut from cut_angle_1 to cut_angle_2.
+    """
+    changes = flips = 0
+    current = start
+    for rows in bars:
+        for row in rows:
+            first, last, turned = piece_setups(row)
+            for a, b in ((current, first), (first, last)):
+                c, f = setup_changes(a, b)
+                changes += c
+                flips += f
+            flips += turned
+            current = last
+
+    return SawEstimate(changes, flips, times), current
+
+
+def estimate_packing(packing, times, start=None):
+    return estimate_bars(([part.obj for part in stock.parts] for stock in packing), times, start)
+
+
+def reversed_item(item, cache):
+    """The same piece cut the other way round: its angles are swapped, and the row is marked as reversed"""
+    if id(item) not in cache:
+        row = dict(
+            item.obj,
+            cut_angle_1=item.obj["cut_angle_2"],
+            cut_angle_2=item.obj["cut_angle_1"],
+            reversed=not item.obj.get("reversed", False),
+        )
+        cache[id(item)] = CutItem(item.name, item.length, 0, item.kerf, row)
+    return cache[id(item)]
+
+
+def sequence_packing(packing, times, start=None, keep_order=False):
+    """
+    Returns (CutListPacking with the stocks and pieces in cutting order, setup of the saw after the last cut).
+
+    Every stock of the result is a single stock pattern, pieces cut the other way round have their angles
+    swapped. With keep_order, the stocks stay in their order and only the pieces of each stock are
+    sequenced. The saw estimate of the result is set.
+    """
+    # each pattern is a block of stocks: (first setup, last setup, [[(item, reversed)] per stock])
+    blocks = []
+    for pattern in packing.patterns:
+        pieces = [item for item, n in pattern.cuts for _ in range(n)]
+        if len(pieces) == 0:
+            blocks.append((None, None, pattern, [[]] * pattern.count))
+            continue
+
+        setups = [piece_setups(item.obj) for item in pieces]
+        nodes = [(first, last) for first, last, turned in setups]
+        order = two_opt(nodes, order_nodes(nodes, None, times), None, times)
+
+        forward = [(pieces[i], reverse) for i, reverse in order]
+        backward = [(item, not reverse) for item, reverse in reversed(forward)]
+        first = nodes[order[0][0]][order[0][1]]
+        last = nodes[order[-1][0]][not order[-1][1]]
+
+        # identical stocks are cut back and forth, each starts where the previous one ended
+        bars = [forward if k % 2 == 0 else backward for k in range(pattern.count)]
+        blocks.append((first, last if pattern.count % 2 == 1 else first, pattern, bars))
+
+    if keep_order:
+        order = [(i, False) for i in range(len(blocks))]
+    else:
+        nodes = [(first, last) for first, last, pattern, bars in blocks]
+        order = two_opt(nodes, order_nodes(nodes, start, times), start, times)
+
+    cache = {}
+    patterns = []
+    for i, reverse in order:
+        first, last, pattern, bars = blocks[i]
+        if reverse:
+            bars = [[(item, not r) for item, r in reversed(bar)] for bar in reversed(bars)]
+
+        for bar in bars:
+            stock = StockPattern(pattern.length, 1, used=pattern.used, origin=pattern.origin)
+            for item, r in bar:
+                item = reversed_item(item, cache) if r else item
+                if len(stock.cuts) > 0 and stock.cuts[-1][0] is item:
+                    stock.cuts[-1][1] += 1
+                else:
+                    stock.cuts.append([item, 1])
+            patterns.append(stock)
+
+    sequenced = CutListPacking(patterns, packing.lower_bound, packing.method)
+    sequenced.section = packing.section
+    sequenced.saw_estimate, end = estimate_packing(sequenced, times, start)
+    return sequenced, end
+
+
+def sequence_cut_list(sorted_stocks, times, keep_order=False):
+    """
+    Sequences every material / family / size, the saw setup carries over from one to the next.
+
+    keep_order keeps the stocks numbered as they are (a repaired cut list), only their pieces are sequenced.
+    """
+    sequenced = {}
+    current = None
+    for k, packing in sorted_stocks.items():
+        sequenced[k], current = sequence_packing(packing, times, current, keep_order)
+    return sequenced
@@ -0,0 +1,117 @@
+"""
+Shape complexity of the FrameForge features: topology counts, BREP size and memory of each Profile,
+TrimmedProfile and ExtrudedCutout, and their totals per Part, to find the members that make a document slow
+to recompute, save and load.
+
+The features report how many booleans their last execute performed with record_booleans(), kept for the
+session only (a restored document has no count until it's recomputed), and dropped when the object or its
+document is deleted.
+"""
+
+from freecad.frameforge.object_types import EXTRUDED_CUTOUT, FUSION, GROUP, PART, PROFILE, REGISTRY, TRIMMED_PROFILE
+
+FEATURE_TYPES = (PROFILE, TRIMMED_PROFILE, EXTRUDED_CUTOUT)
+
+# (document name, object name) -> booleans performed by the last execute
+_booleans = {}
+
+
+def record_booleans(obj, count):
+    _booleans[(obj.Document.Name, obj.Name)] = count
+
+
+def last_booleans(obj):
+    return _booleans.get((obj.Document.Name, obj.Name))
+
+
+def forget_booleans(doc_name, obj_name=None):
+    """Drops the count of a deleted object, or of every object of a closed document"""
+    if obj_name is not None:
+        _booleans.pop((doc_name, obj_name), None)
+    else:
+        for key in [k for k in _booleans if k[0] == doc_name]:
+            del _booleans[key]
+
+
+REGISTRY.deletion_listeners.append(forget_booleans)
+
+
+class ShapeMetrics:
+    __slots__ = ("label", "kind", "solids", "faces", "edges", "vertexes", "brep_bytes", "memory_bytes", "booleans")
+
+    def __init__(self, label, kind):
+        self.label = label
+        self.kind = kind
+        self.solids = 0
+        self.faces = 0
+        self.edges = 0
+        self.vertexes = 0
+        self.brep_bytes = 0
+        self.memory_bytes = 0
+        self.booleans = 0
+
+    @classmethod
+    def of(cls, obj):
+        metrics = cls(obj.Label, REGISTRY.type_of(obj))
+        shape = obj.Shape
+        if shape.isNull():
+            return metrics
+
+        metrics.solids = len(shape.Solids)
+        metrics.faces = len(shape.Faces)
+        metrics.edges = len(shape.Edges)
+        metrics.vertexes = len(shape.Vertexes)
+        # what the shape costs in the .FCStd (uncompressed)
+        metrics.brep_bytes = len(shape.exportBrepToString())
+        metrics.memory_bytes = getattr(shape, "MemSize", 0)
+        metrics.booleans = last_booleans(obj)
+        return metrics
+
+    def add(self, other):
+        for name in ("solids", "faces", "edges", "vertexes", "brep_bytes", "memory_bytes"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.booleans = (self.booleans or 0) + (other.booleans or 0)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def document_metrics(doc):
+    """Returns {object name: ShapeMetrics} of the FrameForge features of a document"""
+    return {obj.Name: ShapeMetrics.of(obj) for obj in doc.Objects if REGISTRY.is_a(obj, *FEATURE_TYPES)}
+
+
+def part_children(obj):
+    """Same walk as create_bom.traverse_assembly, hidden objects included"""
+    obj_type = REGISTRY.type_of(obj)
+    if obj_type == FUSION:
+        return obj.Shapes
+    elif obj_type == GROUP:
+        return obj.Group
+    elif obj_type == PART:
+        return [child for child in obj.Group if child.getParentGroup() in (obj, None)]
+    return []
+
+
+def part_metrics(doc, metrics):
+    """
+    Returns {Part name: ShapeMetrics}, the totals of the features each Part is made of, in its subgroups,
+    fusions and nested Parts too (the boundaries a trim or cutout refers to aren't counted)
+    """
+    parts = {}
+    for part in doc.Objects:
+        if not REGISTRY.is_a(part, PART):
+            continue
+        total = ShapeMetrics(part.Label, PART)
+        seen = set()
+        todo = list(part_children(part))
+        while len(todo) > 0:
+            obj = todo.pop()
+            if obj.Name in seen:
+                continue
+            seen.add(obj.Name)
+            if obj.Name in metrics:
+                total.add(metrics[obj.Name])
+            todo += part_children(obj)
+        parts[part.Name] = total
+    return parts
@@ -0,0 +1,52 @@
+import json
+import os
+
+import FreeCAD as App
+
+from freecad.frameforge.shape_metrics import document_metrics, part_metrics
+
+REPORT_SIZE = 20
+
+
+def format_metrics(rows):
+    lines = [f"{'BREP kB':>9} {'mem kB':>9} {'faces':>6} {'edges':>6} {'verts':>6} {'bool':>4}  object"]
+    for m in rows:
+        booleans = "-" if m.booleans is None else str(m.booleans)
+        lines.append(
+            f"{m.brep_bytes / 1024:9.1f} {m.memory_bytes / 1024:9.1f} {m.faces:6d} {m.edges:6d} {m.vertexes:6d}"
+            f" {booleans:>4}  {m.kind} {m.label}"
+        )
+    return "\n".join(lines)
+
+
+class ShapeReportCommand:
+    def Activated(self):
+        doc = App.ActiveDocument
+
+        metrics = document_metrics(doc)
+        parts = part_metrics(doc, metrics)
+        by_size = sorted(metrics.values(), key=lambda m: m.brep_bytes, reverse=True)
+        brep_total = sum(m.brep_bytes for m in by_size)
+
+        App.Console.PrintMessage(
+            f"Frameforge : {len(by_size)} features, {brep_total / 1024 / 1024:.2f} MB of BREP, largest first\n"
+            f"{format_metrics(by_size[:REPORT_SIZE])}\n"
+        )
+        if len(parts) > 0:
+            App.Console.PrintMessage(
+                "Frameforge : totals per Part\n"
+                f"{format_metrics(sorted(parts.values(), key=lambda m: m.brep_bytes, reverse=True))}\n"
+            )
+
+        if doc.FileName != "":
+            path = f"{os.path.splitext(doc.FileName)[0]}_Shapes.json"
+            with open(path, "w", encoding="utf-8") as fd:
+                json.dump(
+                    {
+                        "objects": {name: m.to_dict() for name, m in metrics.items()},
+                        "parts": {name: m.to_dict() for name, m in parts.items()},
+                    },
+                    fd,
+                    indent=2,
+                )
+            App.Console.PrintMessage(f"Frameforge : shape report written to {path}\n")
@@ -0,0 +1,102 @@
+import os
+import re
+import tempfile
+
+import FreeCAD as App
+
+CELL_RE = re.compile(r"^([A-Z]+)([0-9]+)$")
+
+
+def parse_address(address):
+    """Returns the zero based (row, column) of a cell address like "AB12" """
+    m = CELL_RE.match(address)
+    if m is None:
+        raise ValueError(f"Invalid cell address: {address}")
+
+    col = 0
+    for c in m.group(1):
+        col = col * 26 + ord(c) - ord("A") + 1
+
+    return int(m.group(2)) - 1, col - 1
+
+
+def quote_field(content):
+    # boost escaped_list_separator, as used by Sheet.importFile: "\\" escapes "\\", '"' and "n"
+    content = content.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return '"' + content + '"'
+
+
+class SheetWriter:
+    """
+    Collects cells with the same API as Spreadsheet::Sheet.set(), then writes them all at once.
+
+    Setting cells one by one on a Sheet triggers the property change machinery for each of them,
+    importing a file fills the whole sheet in a single call.
+    """
+
+    def __init__(self):
+        self.cells = {}
+
+    def set(self, address, content):
+        self.cells[parse_address(address)] = str(content)
+
+    def write_to(self, spreadsheet):
+        """Replaces the whole content of the spreadsheet by the collected cells"""
+        spreadsheet.clearAll()
+
+        if not hasattr(spreadsheet, "importFile"):
+            self._set_cells(spreadsheet)
+            return spreadsheet
+
+        n_rows = max([r for r, c in self.cells], default=-1) + 1
+        n_cols = max([c for r, c in self.cells], default=-1) + 1
+
+        fd, path = tempfile.mkstemp(prefix="frameforge_", suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                for row in range(n_rows):
+                    fields = [self.cells.get((row, col), "") for col in range(n_cols)]
+                    f.write("\t".join([quote_field(c) if c else "" for c in fields]).rstrip("\t") + "\n")
+
+            spreadsheet.importFile(path, "\t", '"', "\\")
+
+        except Exception as e:
+            App.Console.PrintWarning(f"Frameforge : bulk spreadsheet import failed ({e}), setting cells one by one\n")
+            self._set_cells(spreadsheet)
+
+        finally:
+            os.remove(path)
+
+        return spreadsheet
+
+    def update(self, spreadsheet, previous):
+        """
+        Writes only the cells that differ from `previous`, the SheetWriter of the current content.
+
+        Falls back to write_to when most cells changed (rows inserted or removed shift the ones below).
+        """
+        changed = sorted((k, v) for k, v in self.cells.items() if previous.cells.get(k) != v)
+        removed = [k for k in previous.cells if k not in self.cells]
+        if 2 * (len(changed) + len(removed)) > len(self.cells):
+            return self.write_to(spreadsheet)
+
+        for row, col in removed:
+            spreadsheet.clear(self.address(row, col))
+        for (row, col), content in changed:
+            spreadsheet.set(self.address(row, col), content)
+
+        return spreadsheet
+
+    def _set_cells(self, spreadsheet):
+        for (row, col), content in sorted(self.cells.items()):
+            spreadsheet.set(self.address(row, col), content)
+
+    @staticmethod
+    def address(row, col):
+        letters = ""
+        col += 1
+        while col > 0:
+            col, rem = divmod(col - 1, 26)
+            letters = chr(ord("A") + rem) + letters
+
+        return f"{letters}{row + 1}"
@@ -0,0 +1,278 @@
+"""
+Stock catalog and offcut inventory, stored in a SQLite file.
+
+For each section (material, family, size name) the catalog lists the lengths that can be bought and
+their unit price, the inventory lists the offcuts on the rack. Cut lists are planned with the offcuts
+first, then with the purchasable lengths that cost the least. A recorded cut list replaces the previous
+record of the same source (document / BOM): its offcuts go back on the rack before the new plan is booked.
+
+    python -m freecad.frameforge.stock_inventory stock.sqlite add-length S235 "Square Hollow" 40x40x2 6000 24.5
+    python -m freecad.frameforge.stock_inventory stock.sqlite add-offcut S235 "Square Hollow" 40x40x2 1200 -n 3
+    python -m freecad.frameforge.stock_inventory stock.sqlite list
+"""
+
+import argparse
+import sqlite3
+import time
+
+from freecad.frameforge.best_fit import CutListPacking, StockPattern, best_fit_decreasing_counts, best_fit_into
+from freecad.frameforge.cutting_stock import optimize_cut_list
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock_lengths (
+    material TEXT NOT NULL,
+    family TEXT NOT NULL,
+    size_name TEXT NOT NULL,
+    length REAL NOT NULL,
+    price REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (material, family, size_name, length)
+);
+CREATE TABLE IF NOT EXISTS offcuts (
+    id INTEGER PRIMARY KEY,
+    material TEXT NOT NULL,
+    family TEXT NOT NULL,
+    size_name TEXT NOT NULL,
+    length REAL NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    -- source of the cut list that uses the offcut, NULL while it's on the rack
+    used_by TEXT
+);
+CREATE INDEX IF NOT EXISTS offcuts_section_length ON offcuts (material, family, size_name, length);
+"""
+
+
+class StockInventory:
+    """A catalog / inventory file, sections are (material, family, size name) tuples"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # Catalog
+
+    def set_stock_length(self, section, length, price=0.0):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO stock_lengths VALUES (?, ?, ?, ?, ?)", (*section, float(length), float(price))
+            )
+
+    def remove_stock_length(self, section, length):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM stock_lengths WHERE material = ? AND family = ? AND size_name = ? AND length = ?",
+                (*section, float(length)),
+            )
+
+    def stock_lengths(self, section):
+        """Returns [(length, price)] of a section, by increasing length"""
+        return self.connection.execute(
+            "SELECT length, price FROM stock_lengths WHERE material = ? AND family = ? AND size_name = ? "
+            "ORDER BY length",
+            section,
+        ).fetchall()
+
+    # Offcuts
+
+    def add_offcuts(self, section, lengths, source=""):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO offcuts (material, family, size_name, length, source, created) VALUES (?, ?, ?, ?, ?, ?)",
+                [(*section, float(length), source, now) for length in lengths],
+            )
+
+    def offcuts(self, section, min_length=0.0, source=None):
+        """
+        Returns [(id, length)] of the offcuts of a section at least min_length long, by increasing length.
+
+        With the source of a recorded cut list, the rack is seen as before the record: the offcuts it uses
+        are available, the ones it produced are not.
+        """
+        return self.connection.execute(
+            "SELECT id, length FROM offcuts WHERE material = ? AND family = ? AND size_name = ? AND length >= ? "
+            "AND (used_by IS NULL OR used_by = ?) AND source IS NOT ? ORDER BY length",
+            (*section, min_length, source, source),
+        ).fetchall()
+
+    def release(self, source):
+        """Cancels the record of a cut list: its offcuts go back on the rack, the ones it produced are removed"""
+        with self.connection:
+            self.connection.execute("UPDATE offcuts SET used_by = NULL WHERE used_by = ?", (source,))
+            self.connection.execute("DELETE FROM offcuts WHERE source = ?", (source,))
+
+    def sections(self):
+        return self.connection.execute(
+            "SELECT material, family, size_name FROM stock_lengths "
+            "UNION SELECT material, family, size_name FROM offcuts ORDER BY 1, 2, 3"
+        ).fetchall()
+
+    def record_cut_list(self, sorted_stocks, min_offcut, source):
+        """
+        Writes a cut list back: the offcuts it uses leave the rack, what's left of every stock and
+        offcut, when at least min_offcut long, goes on it. The previous record of the same source is
+        released first, so regenerating a cut list doesn't book it twice.
+        """
+        self.release(source)
+
+        for packing in sorted_stocks.values():
+            if packing.section is None:
+                continue
+
+            used = []
+            produced = []
+            for pattern in packing.patterns:
+                if len(pattern.cuts) == 0:
+                    # an empty bar of a repaired cut list isn't cut
+                    continue
+                if pattern.origin is not None:
+                    used.append(pattern.origin)
+                if pattern.left >= min_offcut:
+                    produced += [pattern.left] * pattern.count
+
+            with self.connection:
+                self.connection.executemany("UPDATE offcuts SET used_by = ? WHERE id = ?", [(source, i) for i in used])
+            self.add_offcuts(packing.section, produced, source)
+
+
+def stock_costs(stock_lengths):
+    """
+    {length: cost} of the stock lengths: the unit price when every length has one, the length (less
+    material) otherwise, prices and lengths can't be compared
+    """
+    priced = all(price > 0 for length, price in stock_lengths)
+    return {length: price if priced else length for length, price in stock_lengths}
+
+
+def pack_offcuts(items, offcuts):
+    """
+    Cuts the largest pieces first, each in the offcut that leaves the least.
+
+    offcuts: [(id, length)]. Returns (patterns of the offcuts used, items left to cut).
+    """
+    patterns = [StockPattern(length, 1, origin=i) for i, length in sorted(offcuts, key=lambda o: (o[1], o[0]))]
+    remaining = best_fit_into(patterns, items)
+    return [p for p in patterns if len(p.cuts) > 0], remaining
+
+
+def repack(pattern, length):
+    """Returns the pattern cut from another stock length, or None if it doesn't fit"""
+    stock = StockPattern(length, pattern.count, origin=pattern.origin)
+    for item, n in pattern.cuts:
+        placed, used = stock.capacity(item.cut_size, n)
+        if placed < n:
+            return None
+        stock.add(item, n, used)
+    return stock
+
+
+def plan_purchase(items, stock_lengths, time_budget=0.0):
+    """
+    Packs items in purchased stocks. Every catalog length is tried, the cheapest plan is kept and each
+    of its stocks is then cut from the cheapest length it fits in.
+
+    stock_lengths: [(length, price)]
+    """
+    costs = stock_costs(stock_lengths)
+    best = None
+    best_cost = None
+
+    for length, price in stock_lengths:
+        if any(item.cut_size > length for item in items if item.count > 0):
+            continue
+
+        if time_budget > 0:
+            packing = optimize_cut_list(length, items, time_budget / len(stock_lengths))
+        else:
+            packing = best_fit_decreasing_counts(length, items)
+
+        cost = len(packing) * costs[length]
+        if best is None or cost < best_cost:
+            best, best_cost = packing, cost
+
+    if best is None:
+        raise ValueError(f"No stock length is long enough for {max(items, key=lambda x: x.cut_size).name}")
+
+    by_cost = sorted(costs, key=costs.get)
+    patterns = []
+    for pattern in best.patterns:
+        for length in by_cost:
+            cheaper = repack(pattern, length) if length != pattern.length else pattern
+            if cheaper is not None:
+                patterns.append(cheaper)
+                break
+
+    return CutListPacking(patterns, best.lower_bound, best.method)
+
+
+def plan_section(items, offcuts, stock_lengths, time_budget=0.0):
+    """
+    Packs items in the offcuts first, the rest in purchased stocks.
+
+    offcuts: [(id, length)], stock_lengths: [(length, price)]
+    """
+    offcut_patterns, remaining = pack_offcuts(items, offcuts)
+
+    if any(item.count > 0 for item in remaining):
+        purchase = plan_purchase(remaining, stock_lengths, time_budget)
+    else:
+        purchase = CutListPacking([])
+
+    if len(offcut_patterns) == 0:
+        return purchase
+
+    # the bound doesn't account for the offcuts
+    return CutListPacking(offcut_patterns + purchase.patterns, None, purchase.method)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FrameForge stock catalog and offcut inventory")
+    parser.add_argument("path", help="SQLite file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_length = commands.add_parser("add-length", help="add or update a purchasable length")
+    add_offcut = commands.add_parser("add-offcut", help="put offcuts on the rack")
+    remove_length = commands.add_parser("remove-length", help="remove a purchasable length")
+    for p in (add_length, add_offcut, remove_length):
+        p.add_argument("material")
+        p.add_argument("family")
+        p.add_argument("size_name")
+        p.add_argument("length", type=float)
+    add_length.add_argument("price", type=float, nargs="?", default=0.0)
+    add_offcut.add_argument("-n", "--count", type=int, default=1)
+    commands.add_parser("list", help="list the catalog and the offcuts")
+
+    args = parser.parse_args(argv)
+
+    with StockInventory(args.path) as inventory:
+        if args.command == "list":
+            for section in inventory.sections():
+                print(" / ".join(section))
+                for length, price in inventory.stock_lengths(section):
+                    print(f"    stock  {length:10.1f}  {price:10.2f}")
+                for i, length in inventory.offcuts(section):
+                    print(f"    offcut {length:10.1f}  #{i}")
+            return 0
+
+        section = (args.material, args.family, args.size_name)
+        if args.command == "add-length":
+            inventory.set_stock_length(section, args.length, args.price)
+        elif args.command == "remove-length":
+            inventory.remove_stock_length(section, args.length)
+        elif args.command == "add-offcut":
+            inventory.add_offcuts(section, [args.length] * args.count, "manual")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
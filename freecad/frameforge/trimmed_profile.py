@@ -2,14 +2,14 @@ import glob
 import math
 import os
 
-import ArchCommands
-import BOPTools.SplitAPI
 import FreeCAD as App
 import FreeCADGui as Gui
 import Part
 from PySide import QtCore, QtGui
 
-from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, translate
+from freecad.frameforge.ff_tools import ICONPATH, PROFILEIMAGES_PATH, PROFILESPATH, UIPATH, log, translate
+from freecad.frameforge.recompute_profiler import PROFILER, profiled
+from freecad.frameforge.shape_metrics import record_booleans
 
 
 class TrimmedProfile:
@@ -42,9 +42,10 @@ class TrimmedProfile:
     def onChanged(self, fp, prop):
         pass
 
+    @profiled("TrimmedProfile")
     def execute(self, fp):
-        """Print a short message when doing a recomputation, this method is mandatory"""
-        App.Console.PrintMessage("Recompute {}\n".format(fp.Name))
+        """Trims the TrimmedBody by its boundaries, this method is mandatory"""
+        log("log", "recompute", kind="TrimmedProfile", object=fp.Name, type=fp.TrimmedProfileType, cut=fp.CutType)
         # TODO: Put these methods in proper functions
         if fp.TrimmedBody is None:
             return
@@ -52,17 +53,23 @@ class TrimmedProfile:
             return
 
         cut_shapes = []
+        booleans = 0
 
         if fp.TrimmedProfileType == "End Trim":
             if fp.CutType in ["Perfect fit", "Coped cut"]:  # Keeping Coped cut for retro-compatibility
+                import BOPTools.SplitAPI
+
                 shapes = [x[0].Shape for x in fp.TrimmingBoundary]
                 shps = BOPTools.SplitAPI.slice(fp.TrimmedBody.Shape, shapes, mode="Split")
+                PROFILER.mark("slice")
+                booleans += 1
                 for solid in shps.Solids:
                     x = fp.TrimmedBody.Shape.CenterOfGravity.x
                     y = fp.TrimmedBody.Shape.CenterOfGravity.y
                     z = fp.TrimmedBody.Shape.CenterOfGravity.z
                     if not solid.BoundBox.isInside(x, y, z):
                         cut_shapes.append(Part.Shape(solid))
+                PROFILER.mark("select solids")
 
             elif fp.CutType in ["Simple fit", "Simple cut"]:  # Keeping Simple cut for retro-compatibility
                 cut_shape = Part.Shape()
@@ -73,6 +80,7 @@ class TrimmedProfile:
                         if isinstance(face.Surface, Part.Plane):
                             shp = self.getOutsideCV(face, fp.TrimmedBody.Shape)
                             cut_shapes.append(shp)
+                PROFILER.mark("cut volumes")
 
         elif fp.TrimmedProfileType == "End Miter":
             doc = App.activeDocument()
@@ -121,15 +129,22 @@ class TrimmedProfile:
                 cutplane = Part.makePlane(10, 10, p1, vec1, normal)
                 cutplane.rotate(p1, normal, -90 + bisect)
                 cut_shapes.append(self.getOutsideCV(cutplane, fp.TrimmedBody.Shape))
+            PROFILER.mark("miter cut volumes")
 
         if len(cut_shapes) > 0:
             cut_shape = Part.Shape(cut_shapes[0])
             for sh in cut_shapes[1:]:
                 cut_shape = cut_shape.fuse(sh)
+            PROFILER.mark("fuse")
+            booleans += len(cut_shapes) - 1
 
         self.makeShape(fp, cut_shape)
+        PROFILER.mark("cut")
+        record_booleans(fp, booleans + (0 if cut_shape.isNull() else 1))
 
     def getOutsideCV(self, cutplane, shape):
+        import ArchCommands
+
         cv = ArchCommands.getCutVolume(cutplane, shape, clip=False, depth=0.0)
         if cv[1].isInside(shape.CenterOfGravity, 0.001, False):
             cv = cv[2]
@@ -142,7 +157,7 @@ class TrimmedProfile:
             fp.Shape = fp.TrimmedBody.Shape.cut(cutshape)
         else:
             # TODO: Do something when cutshape is Null
-            print("cut_shape is Null")
+            log("warning", "nothing to trim", object=fp.Name)
 
     def getTarget(self, link):
         while True:
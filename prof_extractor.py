@@ -1,49 +1,224 @@
+"""
+Profile catalog compiler: builds a material catalog (resources/profiles/<material>.json) from source tables.
+
+    python prof_extractor.py Profiles.txt -o freecad/frameforge/resources/profiles/metal.json
+    python prof_extractor.py Profiles.txt More.txt -o metal.json --index catalog.sqlite
+    python prof_extractor.py freecad/frameforge/resources/profiles/wood.json -o wood.json
+
+A source table is a text file of family blocks, separated by blank lines, "#" starts a comment:
+
+    *Equal Leg Angles*
+    *EN 10056-1*
+    *Metric Units*
+    *fillet: yes*                       (optional, defaults to yes)
+    *Size/Height/Width/Thickness/Radius1/Radius2/Weight*
+    250x250x35<tab>250<tab>250<tab>35<tab>18<tab>9<tab>128
+    (columns separated by tabs, "-" for an empty cell)
+
+A source can also be a catalog .json, to check and normalize it. Sources are read line by line, several
+of them are merged into one catalog. Units and columns are checked for each family, values are written as
+numbers. With --index, the sizes are also written to a profile_index SQLite file.
+"""
+
+import argparse
 import json
 import os
-import pprint
 import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# catalog columns, as read by the create profile panel
+DIMENSIONS = ("Height", "Width", "Thickness", "Flange Thickness", "Radius1", "Radius2", "Weight")
+
+UNITS = {"metric units": "Metric Units", "metric unit": "Metric Units"}
+
+REQUIRED_COLUMNS = {
+    "Equal Leg Angles": ("Height", "Width", "Thickness"),
+    "Unequal Leg Angles": ("Height", "Width", "Thickness"),
+    "Flat Sections": ("Height", "Width"),
+    "Square": ("Height", "Width"),
+    "Square Hollow": ("Height", "Width", "Thickness"),
+    "Rectangular Hollow": ("Height", "Width", "Thickness"),
+    "UPE": ("Height", "Width", "Thickness", "Flange Thickness"),
+    "UPN": ("Height", "Width", "Thickness", "Flange Thickness"),
+    "HEA": ("Height", "Width", "Thickness", "Flange Thickness"),
+    "HEB": ("Height", "Width", "Thickness", "Flange Thickness"),
+    "HEM": ("Height", "Width", "Thickness", "Flange Thickness"),
+    "IPE": ("Height", "Width", "Thickness", "Flange Thickness"),
+    "IPN": ("Height", "Width", "Thickness", "Flange Thickness"),
+    "Round Bar": ("Height",),
+    "Pipe": ("Height", "Thickness"),
+}
+DEFAULT_REQUIRED_COLUMNS = ("Height", "Width")
 
-output_data = {}
 
+class CatalogError(ValueError):
+    def __init__(self, source, line, message):
+        super().__init__(f"{source}:{line}: {message}")
 
-with open("Profiles.txt") as fd:
+
+def number(text):
+    """250 -> 250, 6.3 -> 6.3, "6,3" -> 6.3"""
+    value = float(str(text).strip().replace(",", "."))
+    return int(value) if value.is_integer() else value
+
+
+def parse_flag(text):
+    return text.strip().lower() in ("yes", "true", "1")
+
+
+def iter_text_source(path):
+    """Yields (line number, family, header, size name, {column: text}) from a text source table"""
     family = None
-    norm = None
-    unit = None
-    headers = None
+    header = None
+
+    with open(path, encoding="utf-8") as fd:
+        block = []
+        for line_number, line in enumerate(fd, 1):
+            line = line.rstrip("\n")
+
+            if line.startswith("#"):
+                continue
+
+            if line.strip() == "":
+                family = None
+                header = None
+                block = []
+                continue
+
+            if family is None or header is None:
+                if not line.startswith("*"):
+                    raise CatalogError(path, line_number, "expected a family header line (*...*)")
+                block.append(line.strip("*\t "))
+                # the columns line closes the header block
+                if "/" in block[-1] and len(block) >= 4:
+                    family, norm, unit = block[:3]
+                    header = {"norm": norm, "unit": unit, "fillet": True, "columns": block[-1].split("/")}
+                    for meta in block[3:-1]:
+                        key, _, value = meta.partition(":")
+                        if key.strip().lower() != "fillet":
+                            raise CatalogError(path, line_number, f"unknown family setting {key!r}")
+                        header["fillet"] = parse_flag(value)
+                continue
+
+            # columns are separated by one or more tabs, "-" stands for an empty cell
+            fields = ["" if s.strip() == "-" else s.strip() for s in re.split(r"\t+", line.rstrip("\t"))]
+            yield line_number, family, header, fields[0], dict(zip(header["columns"][1:], fields[1:]))
+
+
+def iter_json_source(path):
+    """Yields the same tuples as iter_text_source from a catalog .json"""
+    with open(path, encoding="utf-8") as fd:
+        data = json.load(fd)
+
+    for family, content in data.items():
+        header = {
+            "norm": content.get("norm", ""),
+            "unit": content.get("unit", ""),
+            "fillet": content.get("fillet", True),
+            "columns": ["Size"] + sorted({c for size in content["sizes"].values() for c in size}),
+        }
+        for size_name, size in content["sizes"].items():
+            yield 0, family, header, size_name, size
+
+
+def iter_source(path):
+    return iter_json_source(path) if path.lower().endswith(".json") else iter_text_source(path)
+
+
+def compile_catalog(sources):
+    """Returns the catalog of several sources, families and sizes in source order"""
+    catalog = {}
+
+    for path in sources:
+        for line_number, family, header, size_name, values in iter_source(path):
+            unit = UNITS.get(header["unit"].strip().lower())
+            if unit is None:
+                raise CatalogError(path, line_number, f"{family}: unknown unit {header['unit']!r}")
+
+            unknown = [c for c in header["columns"][1:] if c not in DIMENSIONS]
+            if len(unknown) > 0:
+                raise CatalogError(path, line_number, f"{family}: unknown columns {unknown}")
+
+            if family not in catalog:
+                catalog[family] = {"norm": header["norm"], "unit": unit, "fillet": header["fillet"], "sizes": {}}
+            content = catalog[family]
+            if (content["unit"], content["fillet"]) != (unit, header["fillet"]):
+                raise CatalogError(path, line_number, f"{family}: unit or fillet differs from a previous table")
+
+            missing = [c for c in REQUIRED_COLUMNS.get(family, DEFAULT_REQUIRED_COLUMNS) if values.get(c, "") == ""]
+            if len(missing) > 0:
+                raise CatalogError(path, line_number, f"{family} {size_name}: missing {missing}")
+
+            if size_name in content["sizes"]:
+                raise CatalogError(path, line_number, f"{family}: duplicate size {size_name}")
+
+            size = {}
+            for column in DIMENSIONS:
+                if values.get(column, "") == "":
+                    continue
+                try:
+                    size[column] = number(values[column])
+                except ValueError:
+                    raise CatalogError(path, line_number, f"{family} {size_name}: {column} is not a number")
+            content["sizes"][size_name] = size
+
+    return catalog
+
+
+def dumps_catalog(catalog):
+    """JSON with one line per size"""
+    families = []
+    for family, content in catalog.items():
+        sizes = ",\n".join(
+            f"            {json.dumps(name, ensure_ascii=False)}: {json.dumps(size)}"
+            for name, size in content["sizes"].items()
+        )
+        head = ",\n".join(
+            f"        {json.dumps(k)}: {json.dumps(content[k], ensure_ascii=False)}" for k in ("norm", "unit", "fillet")
+        )
+        families.append(
+            f'    {json.dumps(family, ensure_ascii=False)}: {{\n{head},\n        "sizes": {{\n{sizes}\n        }}\n    }}'
+        )
+    return "{\n" + ",\n".join(families) + "\n}\n"
 
-    while True:
-        line = fd.readline()
 
-        if line == "":
-            break
+def write_index(path, catalog_path):
+    """Writes the profile index of the catalog directory holding catalog_path"""
+    from freecad.frameforge.profile_catalog import ProfileCatalog
+    from freecad.frameforge.profile_index import ProfileIndex
 
-        elif line.startswith("#"):
-            continue
+    index = ProfileIndex(path, ProfileCatalog(os.path.dirname(os.path.abspath(catalog_path))))
+    try:
+        index.refresh()
+    finally:
+        index.close()
 
-        elif line == "\n":
-            family = None
-            norm = None
-            unit = None
-            headers = None
 
-        elif line.startswith("*"):
-            family = line.strip("*\n")
-            norm = fd.readline().strip("*\n")
-            unit = fd.readline().strip("*\n")
-            headers = fd.readline().strip("*\n").split("/")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FrameForge profile catalog compiler")
+    parser.add_argument("sources", nargs="+", help="source tables (.txt) or catalogs (.json)")
+    parser.add_argument("-o", "--output", required=True, help="catalog .json to write")
+    parser.add_argument("--index", help="also write the SQLite index of the output directory")
+    args = parser.parse_args(argv)
 
-            output_data[family] = {"norm": norm, "unit": unit, "fillet": True, "sizes": {}}
+    try:
+        catalog = compile_catalog(args.sources)
+    except CatalogError as e:
+        print(e, file=sys.stderr)
+        return 1
 
-            current_data = output_data[family]
+    with open(args.output, "w", encoding="utf-8") as fd:
+        fd.write(dumps_catalog(catalog))
 
-        else:
-            data_line = re.split(r"\t+", line.strip("\n").rstrip("\t"))
-            data_line = [s.strip() for s in data_line]
+    if args.index:
+        write_index(args.index, args.output)
 
-            d = dict(zip(headers[1:], data_line[1:]))
-            current_data["sizes"][data_line[0]] = d
+    n_sizes = sum(len(c["sizes"]) for c in catalog.values())
+    print(f"{args.output}: {len(catalog)} families, {n_sizes} sizes")
+    return 0
 
 
-with open("metal.json", "w") as fd:
-    json.dump(output_data, fd, indent=4)
+if __name__ == "__main__":
+    raise SystemExit(main())